@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Benchmark for check_logging_standards.py.
+
+Generates a deterministic synthetic Dart corpus and measures discovery,
+scanning and auto-fix separately. Each phase runs in a fresh process, so its
+peak RSS is its own. Results are written as JSON and can be compared against
+a stored baseline to catch regressions. Everything runs offline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from check_logging_standards import LoggingChecker, positive_int
+
+
+# Bump when the generated corpus or the result format changes
+BENCHMARK_VERSION = 1
+
+PHASES = ['discovery', 'scan', 'autofix']
+
+# Name of the file describing a generated corpus
+MANIFEST_FILE = 'corpus.json'
+
+# Files per generated directory
+FILES_PER_DIRECTORY = 100
+
+
+class CorpusGenerator:
+    """Writes a reproducible corpus of synthetic Dart files.
+
+    The same parameters always produce byte-identical files. Violations are
+    only placed in code; comments and strings contain decoy calls that the
+    checker must not report.
+    """
+
+    WORDS = ['user', 'verse', 'session', 'token', 'request', 'cache', 'value', 'item', 'state', 'result']
+
+    def __init__(self, files: int = 1000, density: float = 0.01, comment_ratio: float = 0.15,
+                 string_ratio: float = 0.2, line_length: int = 60, lines_per_file: Tuple[int, int] = (20, 400),
+                 seed: int = 0):
+        """Initialize the generator.
+
+        Args:
+            files: Number of files to generate
+            density: Fraction of lines holding a violation
+            comment_ratio: Fraction of lines that are comments
+            string_ratio: Fraction of lines holding a string literal
+            line_length: Typical length of a line
+            lines_per_file: Range of the number of lines of a file
+            seed: Seed of the random generator
+        """
+        self.files = files
+        self.density = density
+        self.comment_ratio = comment_ratio
+        self.string_ratio = string_ratio
+        self.line_length = line_length
+        self.lines_per_file = lines_per_file
+        self.seed = seed
+
+    def parameters(self) -> Dict:
+        """Get the parameters that determine the corpus."""
+        return {
+            'version': BENCHMARK_VERSION,
+            'files': self.files,
+            'density': self.density,
+            'comment_ratio': self.comment_ratio,
+            'string_ratio': self.string_ratio,
+            'line_length': self.line_length,
+            'lines_per_file': list(self.lines_per_file),
+            'seed': self.seed,
+        }
+
+    def text(self, rng: random.Random, length: int) -> str:
+        """Generate filler text of about the given length."""
+        words = []
+        size = 0
+        while size < length:
+            word = rng.choice(self.WORDS)
+            words.append(word)
+            size += len(word) + 1
+        return ' '.join(words)
+
+    def line(self, rng: random.Random) -> Tuple[str, int]:
+        """Generate a line of a method body.
+
+        Returns:
+            (line, number of violations on it)
+        """
+        filler = self.text(rng, max(0, self.line_length - 30))
+        roll = rng.random()
+        if roll < self.density:
+            if rng.random() < 0.5:
+                return f"    debugPrint('{filler}');", 1
+            if rng.random() < 0.5:
+                return f"    log('{filler}', name: 'Bench');", 1
+            return f"    log('{filler}');", 1
+        roll -= self.density
+        if roll < self.comment_ratio:
+            return rng.choice([f"    // {filler} log(x)", f"    /* debugPrint('{filler}') */"]), 0
+        roll -= self.comment_ratio
+        if roll < self.string_ratio:
+            return rng.choice([f"    final s = 'log({filler})';", f'    final s = "debugPrint ${{{rng.randrange(9)}}} {filler}";']), 0
+        return f"    final {rng.choice(self.WORDS)}{rng.randrange(100)} = compute('{filler}');", 0
+
+    def file(self, rng: random.Random, index: int) -> Tuple[str, int]:
+        """Generate the contents of one file.
+
+        Returns:
+            (contents, number of violations in it)
+        """
+        lines = ["import 'dart:developer';", "import 'package:flutter/foundation.dart';", '',
+                 '/// Generated for benchmarking.', f'class Bench{index} {{']
+        violations = 0
+        remaining = rng.randint(*self.lines_per_file) - len(lines)
+        method = 0
+        while remaining > 0:
+            body = min(remaining, rng.randint(5, 30))
+            lines.append(f'  void method{method}() {{')
+            for _ in range(body):
+                line, count = self.line(rng)
+                lines.append(line)
+                violations += count
+            lines.append('  }')
+            lines.append('')
+            method += 1
+            remaining -= body + 3
+        lines.append('}')
+        return '\n'.join(lines) + '\n', violations
+
+    def generate(self, directory: str) -> Dict:
+        """Write the corpus and its manifest.
+
+        Args:
+            directory: Directory to write into; files are put under its lib directory
+
+        Returns:
+            The manifest
+        """
+        rng = random.Random(self.seed)
+        total_bytes = 0
+        total_violations = 0
+        for index in range(self.files):
+            subdirectory = os.path.join(directory, 'lib', f'feature_{index // FILES_PER_DIRECTORY}')
+            if index % FILES_PER_DIRECTORY == 0:
+                os.makedirs(subdirectory, exist_ok=True)
+            content, violations = self.file(rng, index)
+            data = content.encode('utf-8')
+            with open(os.path.join(subdirectory, f'file_{index}.dart'), 'wb') as file:
+                file.write(data)
+            total_bytes += len(data)
+            total_violations += violations
+
+        manifest = {'parameters': self.parameters(), 'bytes': total_bytes, 'violations': total_violations}
+        with open(os.path.join(directory, MANIFEST_FILE), 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=2)
+        return manifest
+
+    def ensure(self, directory: str) -> Dict:
+        """Reuse a corpus generated with the same parameters, or generate it.
+
+        Args:
+            directory: Corpus directory
+
+        Returns:
+            The manifest
+        """
+        try:
+            with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as file:
+                manifest = json.load(file)
+            if manifest.get('parameters') == self.parameters():
+                return manifest
+        except (OSError, ValueError):
+            pass
+        shutil.rmtree(os.path.join(directory, 'lib'), ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+        return self.generate(directory)
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Get the peak resident set size of this process and its children, in KiB."""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # macOS reports bytes, Linux KiB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_phase(phase: str, corpus_dir: str, jobs: int) -> Dict:
+    """Run and time one phase in the current process.
+
+    Args:
+        phase: One of PHASES
+        corpus_dir: The corpus to run on
+        jobs: Number of scan processes
+
+    Returns:
+        Wall time, files and violations of the phase
+    """
+    checker = LoggingChecker([os.path.join(corpus_dir, 'lib')], jobs=jobs, use_git=False)
+    if phase == 'discovery':
+        started = time.perf_counter()
+        files = sum(1 for _ in checker.find_dart_files())
+        return {'wall_s': time.perf_counter() - started, 'files': files}
+
+    if phase == 'scan':
+        started = time.perf_counter()
+        violations = checker.find_violations()
+        return {'wall_s': time.perf_counter() - started, 'violations': len(violations)}
+
+    if phase == 'autofix':
+        violations = checker.find_violations()
+        started = time.perf_counter()
+        results = checker.fix_files(violations)
+        wall = time.perf_counter() - started
+        fixed = sum(1 for result in results for _, success, _ in result.outcomes if success)
+        return {'wall_s': wall, 'violations': len(violations), 'fixed': fixed}
+
+    raise ValueError(f"Unknown phase: {phase}")
+
+
+def measure_phase(phase: str, corpus_dir: str, manifest: Dict, jobs: int, repeat: int) -> Dict:
+    """Run a phase in fresh processes and keep the fastest run.
+
+    Args:
+        phase: One of PHASES
+        corpus_dir: The corpus to run on
+        manifest: The corpus manifest
+        jobs: Number of scan processes
+        repeat: Number of runs
+
+    Returns:
+        The phase's measurements
+    """
+    best = None
+    for _ in range(repeat):
+        target = corpus_dir
+        work_dir = None
+        if phase == 'autofix':
+            # Fixing rewrites files, so it runs on a throwaway copy
+            work_dir = tempfile.mkdtemp(prefix='logging_bench_fix_')
+            target = os.path.join(work_dir, 'corpus')
+            shutil.copytree(corpus_dir, target)
+        try:
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-phase', phase,
+                                     '--corpus-dir', target, '--jobs', str(jobs)],
+                                    stdout=subprocess.PIPE, check=True).stdout
+        finally:
+            if work_dir is not None:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        result = json.loads(output)
+        if best is None or result['wall_s'] < best['wall_s']:
+            best = result
+
+    files = manifest['parameters']['files']
+    wall = max(best['wall_s'], 1e-9)
+    best.update({
+        'files_per_s': files / wall,
+        'mb_per_s': manifest['bytes'] / wall / 1e6,
+    })
+    return best
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Compare results against a baseline.
+
+    Args:
+        results: The current results
+        baseline: Results of an earlier run
+        tolerance: Allowed relative slowdown or memory growth
+
+    Returns:
+        Descriptions of the regressions, empty if there are none
+    """
+    regressions = []
+    if results['corpus'] != baseline.get('corpus'):
+        regressions.append("corpus parameters differ from the baseline, results are not comparable")
+        return regressions
+
+    for phase, current in results['phases'].items():
+        previous = baseline.get('phases', {}).get(phase)
+        if previous is None:
+            continue
+        if current['files_per_s'] < previous['files_per_s'] * (1 - tolerance):
+            regressions.append(f"{phase}: {current['files_per_s']:.0f} files/s, "
+                               f"baseline {previous['files_per_s']:.0f} files/s")
+        if current.get('peak_rss_kb') and previous.get('peak_rss_kb') and \
+                current['peak_rss_kb'] > previous['peak_rss_kb'] * (1 + tolerance):
+            regressions.append(f"{phase}: peak RSS {current['peak_rss_kb']} KiB, "
+                               f"baseline {previous['peak_rss_kb']} KiB")
+    return regressions
+
+
+def parse_range(value: str) -> Tuple[int, int]:
+    """Parse a MIN:MAX range of positive integers for argparse."""
+    try:
+        low, high = (int(part) for part in value.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected MIN:MAX, got {value!r}")
+    if not 0 < low <= high:
+        raise argparse.ArgumentTypeError(f"expected 0 < MIN <= MAX, got {value!r}")
+    return low, high
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description='Benchmark the logging standards checker on a synthetic corpus.')
+    parser.add_argument('--files', type=positive_int, default=1000,
+                        help='Number of generated files (default: 1000)')
+    parser.add_argument('--density', type=float, default=0.01,
+                        help='Fraction of lines with a violation (default: 0.01)')
+    parser.add_argument('--comment-ratio', type=float, default=0.15,
+                        help='Fraction of comment lines (default: 0.15)')
+    parser.add_argument('--string-ratio', type=float, default=0.2,
+                        help='Fraction of lines with a string literal (default: 0.2)')
+    parser.add_argument('--line-length', type=positive_int, default=60,
+                        help='Typical line length (default: 60)')
+    parser.add_argument('--lines-per-file', type=parse_range, default=(20, 400), metavar='MIN:MAX',
+                        help='Range of lines per file (default: 20:400)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed (default: 0)')
+    parser.add_argument('--corpus-dir',
+                        help='Where to keep the corpus; reused if generated with the same parameters '
+                             '(default: a temporary directory)')
+    parser.add_argument('--phases', nargs='+', choices=PHASES, default=PHASES,
+                        help='Phases to measure (default: all)')
+    parser.add_argument('--jobs', type=positive_int, default=1,
+                        help='Number of scan processes (default: 1)')
+    parser.add_argument('--repeat', type=positive_int, default=3,
+                        help='Runs per phase, the fastest is kept (default: 3)')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against results stored in this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Allowed relative slowdown or memory growth against the baseline (default: 0.1)')
+    parser.add_argument('--run-phase', choices=PHASES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_phase:
+        result = run_phase(args.run_phase, args.corpus_dir, args.jobs)
+        result['peak_rss_kb'] = peak_rss_kb()
+        json.dump(result, sys.stdout)
+        return
+
+    generator = CorpusGenerator(args.files, args.density, args.comment_ratio, args.string_ratio,
+                                args.line_length, args.lines_per_file, args.seed)
+    temporary = None
+    corpus_dir = args.corpus_dir
+    if corpus_dir is None:
+        temporary = tempfile.TemporaryDirectory(prefix='logging_bench_')
+        corpus_dir = temporary.name
+
+    try:
+        started = time.perf_counter()
+        manifest = generator.ensure(corpus_dir)
+        print(f"Corpus: {args.files} files, {manifest['bytes'] / 1e6:.1f} MB, "
+              f"{manifest['violations']} violations ({time.perf_counter() - started:.1f}s to prepare)")
+
+        results = {
+            'corpus': generator.parameters(),
+            'jobs': args.jobs,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'phases': {},
+        }
+        failed = False
+        for phase in args.phases:
+            result = measure_phase(phase, corpus_dir, manifest, args.jobs, args.repeat)
+            results['phases'][phase] = result
+            print(f"{phase:>10}: {result['wall_s']:8.3f}s {result['files_per_s']:10.0f} files/s "
+                  f"{result['mb_per_s']:8.1f} MB/s  peak RSS {result['peak_rss_kb']} KiB")
+            if 'violations' in result and result['violations'] != manifest['violations']:
+                print(f"{phase:>10}: found {result['violations']} violations, expected {manifest['violations']}")
+                failed = True
+    finally:
+        if temporary is not None:
+            temporary.cleanup()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        failed = failed or bool(regressions)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
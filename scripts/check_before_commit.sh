@@ -3,8 +3,8 @@
 set -e
 
 echo "==== CHECKING FOR PROHIBITED LOGGING METHODS ===="
-! grep -r --include="*.dart" "print(" lib || (echo "❌ Found prohibited logging method 'print'. Use AppLogger instead." && exit 1)
-echo "✓ No prohibited logging methods found"
+# One pass checks every rule in scripts/logging_rules.json, print() included
+python3 scripts/check_logging_standards.py --mode local --staged --fail-fast
 echo
 
 echo "==== CHECKING DEPENDENCIES ===="
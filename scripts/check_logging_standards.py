@@ -5,15 +5,89 @@ Can be used by both the check_before_commit.sh script and CI pipeline.
 """
 
 import argparse
+import codecs
+import ctypes
+import ctypes.util
+import fnmatch
+import cProfile
+import hashlib
+import heapq
+import io
+import itertools
+import json
+import mmap
 import os
+import queue
 import re
+import select
+import struct
 import sys
+import time
 import subprocess
-from typing import List, Dict, Tuple, Optional
+import tempfile
+import threading
+from bisect import bisect_right
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from typing import Any, Callable, Deque, List, Dict, Iterable, Iterator, Set, Tuple, Optional
 from enum import Enum
 from pathlib import Path
 
 
+# Bump when a change to the checker alters which violations are reported
+CHECKER_VERSION = '4'
+
+# Default location of the persistent scan cache
+DEFAULT_CACHE_FILE = os.path.join('.dart_tool', 'logging_check_cache')
+
+# Default location of the SQLite violation store written with --store and read by store_logging_standards.py
+DEFAULT_STORE_FILE = os.path.join('.dart_tool', 'logging_check.db')
+
+# Import added to files whose logging calls are replaced with AppLogger; {package}
+# stands for the name of the package holding the file
+APP_LOGGER_PACKAGE_TEMPLATE = "package:{package}/src/utils/app_logger.dart"
+
+# Libraries that make debugPrint() and log() available
+DEBUG_PRINT_LIBRARIES = ['package:flutter/foundation.dart', 'package:flutter/widgets.dart',
+                         'package:flutter/material.dart', 'package:flutter/cupertino.dart']
+LOG_LIBRARIES = ['dart:developer']
+
+# Package of files outside any package with a pubspec.yaml
+DEFAULT_PACKAGE = 'memverse'
+
+APP_LOGGER_PACKAGE = APP_LOGGER_PACKAGE_TEMPLATE.replace('{package}', DEFAULT_PACKAGE)
+APP_LOGGER_IMPORT = f"import '{APP_LOGGER_PACKAGE}';"
+
+# Marks the root of a Dart package, and a package's own rule configuration
+PUBSPEC_FILE = 'pubspec.yaml'
+PACKAGE_RULES_FILE = 'logging_rules.json'
+
+# Files at least this large are memory-mapped rather than read into memory
+MMAP_MIN_SIZE = 1 << 20
+
+# Files at least this large are scanned window by window instead of being decoded whole
+STREAM_MIN_SIZE = 4 << 20
+
+# Longest line kept whole in a violation; longer lines are cut to this many characters around the call
+DEFAULT_CONTEXT_WIDTH = 200
+
+# How much of a file is searched for a generated code header
+GENERATED_HEADER_SIZE = 1024
+
+# Rule configuration used by default, if present
+DEFAULT_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logging_rules.json')
+
+# Default statistics and profile outputs, by format
+DEFAULT_STATS_FILES = {'json': 'logging_check_stats.json', 'openmetrics': 'logging_check_stats.prom'}
+DEFAULT_PROFILE_FILE = 'logging_check.prof'
+
+# Sentinel for exhausted iterators
+_END = object()
+
+
 class Colors:
     """Terminal colors for output formatting."""
     GREEN = '\033[0;32m'
@@ -23,141 +97,4046 @@ class Colors:
     NC = '\033[0m'  # No Color
 
 
-class Mode(Enum):
-    """Operation mode of the script."""
-    LOCAL = "local"
-    CI = "ci"
+class Mode(Enum):
+    """Operation mode of the script."""
+    LOCAL = "local"
+    CI = "ci"
+
+
+class LoggingViolation:
+    """Represents a logging violation found in a file."""
+    __slots__ = ('file_path', 'line_number', 'line_content', 'violation_type')
+
+    def __init__(self, file_path: str, line_number: int, line_content: str, violation_type: str):
+        self.file_path = file_path
+        self.line_number = line_number
+        self.line_content = line_content.strip()
+        self.violation_type = violation_type
+
+    def __str__(self) -> str:
+        return f"{self.file_path}:{self.line_number}: {self.line_content}"
+
+    def to_dict(self) -> Dict:
+        """Get the violation as a JSON-serializable dict."""
+        return {'file': self.file_path, 'line': self.line_number, 'rule': self.violation_type,
+                'content': self.line_content}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LoggingViolation':
+        """Create a violation from the dict made by to_dict."""
+        return cls(data['file'], data['line'], data['content'], data['rule'])
+
+
+class FileScanResult:
+    """Violations found in a single file, with the file state they were computed from."""
+    def __init__(self, file_path: str, violations: List[LoggingViolation], size: int = 0,
+                 mtime_ns: int = 0, digest: Optional[str] = None):
+        self.file_path = file_path
+        self.violations = violations
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.digest = digest
+        self.decoded = False  # Whether the contents passed the prefilter and were decoded
+        self.timings: Optional[Tuple[float, float, float]] = None  # (read, scan, CPU) seconds, with --stats
+
+
+class FileFixResult:
+    """Outcome of fixing all violations in a single file."""
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.outcomes: List[Tuple[LoggingViolation, bool, str]] = []  # (violation, success, message)
+        self.import_added = False
+        self.bytes_written = 0
+        # Kept by dry runs: the original lines and the (start, end, new_lines) changes to them
+        self.lines: List[str] = []
+        self.changes: List[Tuple[int, int, List[str]]] = []
+
+    def edits(self) -> List['LineEdit']:
+        """Get the changes as line edits, numbered by the original lines."""
+        return [LineEdit(start + 1, self.lines[start:end], new_lines) for start, end, new_lines in self.changes]
+
+
+class LineEdit:
+    """Lines of a file replaced by a fix."""
+    __slots__ = ('line_number', 'removed', 'added')
+
+    def __init__(self, line_number: int, removed: List[str], added: List[str]):
+        self.line_number = line_number  # First replaced line, or the line the added ones go before
+        self.removed = removed
+        self.added = added
+
+    def to_dict(self) -> Dict:
+        """Get the edit as a JSON-serializable dict."""
+        return {'line': self.line_number, 'remove': self.removed, 'add': self.added}
+
+
+def _write_atomic(file_path: str, content: str) -> int:
+    """Replace a file's contents atomically, via a temporary file and a rename.
+
+    Args:
+        file_path: Path to the file to replace
+        content: The new contents
+
+    Returns:
+        Number of bytes written
+    """
+    # Dart source is always UTF-8; undecodable bytes read with surrogateescape are written back unchanged
+    data = content.encode('utf-8', 'surrogateescape')
+    directory = os.path.dirname(file_path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.")
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        # Keep the original permissions rather than mkstemp's private ones
+        os.chmod(temp_path, os.stat(file_path).st_mode & 0o7777)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return len(data)
+
+
+def _apply_edits(text: str, edits: List[Tuple[int, int, str]]) -> str:
+    """Apply (start, end, replacement) edits to a string.
+
+    Edits overlapping an earlier edit are dropped.
+
+    Args:
+        text: The original string
+        edits: Edits with offsets into the original string
+
+    Returns:
+        The edited string
+    """
+    parts = []
+    position = 0
+    for start, end, replacement in sorted(set(edits)):
+        if start < position:
+            continue
+        parts.append(text[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+def _apply_line_changes(lines: List[str], changes: List[Tuple[int, int, List[str]]]) -> List[str]:
+    """Apply (start, end, new_lines) changes to a list of lines.
+
+    Args:
+        lines: The original lines
+        changes: Sorted, non-overlapping changes with indexes into the original lines
+
+    Returns:
+        The changed lines
+    """
+    result = []
+    position = 0
+    for start, end, new_lines in changes:
+        result.extend(lines[position:start])
+        result.extend(new_lines)
+        position = end
+    result.extend(lines[position:])
+    return result
+
+
+def _unified_diff(path: str, lines: List[str], changes: List[Tuple[int, int, List[str]]],
+                  context: int = 3) -> Iterator[str]:
+    """Format line changes as a unified diff that `git apply` accepts.
+
+    The hunks are built straight from the known changes, so no line matching
+    is needed and the cost is linear in the size of the diff.
+
+    Args:
+        path: Path of the file, relative to the repository root
+        lines: The original lines, including line endings
+        changes: Sorted, non-overlapping (start, end, new_lines) changes
+        context: Number of unchanged lines around each hunk
+
+    Yields:
+        Lines of the diff, including line endings
+    """
+    if not changes:
+        return
+    yield f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+
+    def diff_line(prefix: str, line: str) -> str:
+        if line.endswith(('\n', '\r')):
+            return prefix + line
+        return f"{prefix}{line}\n\\ No newline at end of file\n"
+
+    # Group changes whose context overlaps into hunks
+    hunks: List[List[Tuple[int, int, List[str]]]] = []
+    for change in changes:
+        if hunks and change[0] - hunks[-1][-1][1] <= 2 * context:
+            hunks[-1].append(change)
+        else:
+            hunks.append([change])
+
+    offset = 0  # Lines added by earlier hunks
+    for hunk in hunks:
+        old_start = max(0, hunk[0][0] - context)
+        old_end = min(len(lines), hunk[-1][1] + context)
+        body = []
+        position = old_start
+        growth = 0
+        for start, end, new_lines in hunk:
+            body.extend(diff_line(' ', line) for line in lines[position:start])
+            body.extend(diff_line('-', line) for line in lines[start:end])
+            body.extend(diff_line('+', line) for line in new_lines)
+            growth += len(new_lines) - (end - start)
+            position = end
+        body.extend(diff_line(' ', line) for line in lines[position:old_end])
+
+        old_length = old_end - old_start
+        new_length = old_length + growth
+        new_start = old_start + offset
+        # Empty ranges are given by the line before them
+        yield (f"@@ -{old_start + 1 if old_length else old_start},{old_length} "
+               f"+{new_start + 1 if new_length else new_start},{new_length} @@\n")
+        yield from body
+        offset += growth
+
+
+def _decode_source(data) -> str:
+    """Decode Dart source, which is always UTF-8.
+
+    Undecodable bytes are replaced instead of failing the scan, and line
+    endings are translated like universal newlines, so line numbers match
+    those of the file read in text mode.
+
+    Args:
+        data: Raw file contents, as bytes or any other buffer such as an mmap
+
+    Returns:
+        The decoded text with universal newlines
+    """
+    text = str(data, 'utf-8', 'replace')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def _iter_source_windows(data, size: int, overlap: int) -> Iterator[Tuple[str, int, int, int, bool]]:
+    """Decode Dart source window by window, like _decode_source but in bounded memory.
+
+    Each window repeats the last overlap characters of the one before and
+    reads overlap characters ahead of the one after, so anything shorter than
+    that is whole in the window it starts in.
+
+    Args:
+        data: Raw file contents, as bytes or any other buffer such as an mmap
+        size: Number of characters new to each window
+        overlap: Number of characters of context on either side
+
+    Yields:
+        (text, base, lo, hi, final) tuples: text holds the decoded characters
+        from offset base on, text[lo:hi] are new to the window, and final is
+        set on the last window, which ends with the source
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    length = len(data)
+    read = 0
+    text = carry = ''
+    base = lo = 0
+    while True:
+        while read < length and len(text) < lo + size + overlap:
+            end = read + size + overlap
+            piece = carry + decoder.decode(data[read:end], end >= length)
+            read = end
+            # A CR at the end of a piece may be the first half of a CRLF
+            carry = '\r' if read < length and piece.endswith('\r') else ''
+            if carry:
+                piece = piece[:-1]
+            if '\r' in piece:
+                piece = piece.replace('\r\n', '\n').replace('\r', '\n')
+            text += piece
+        final = read >= length
+        hi = len(text) if final else lo + size
+        yield text, base, lo, hi, final
+        if final:
+            return
+        cut = max(hi - overlap, 0)
+        text = text[cut:]
+        base += cut
+        lo = hi - cut
+
+
+def _excerpt(text: str, line_start: int, line_end: int, offset: int, width: int) -> str:
+    """Get a line of a buffer, cut to at most width characters around an offset if it is longer.
+
+    Cut ends are marked with '...'. The result only depends on the line within
+    width characters of the offset, so a window holding that much of a line
+    gives the excerpt of the whole line.
+
+    Args:
+        text: The buffer
+        line_start: Offset of the line
+        line_end: Offset past its end
+        offset: Offset to keep in the excerpt, such as the start of a call
+        width: Most characters to keep
+
+    Returns:
+        The excerpt
+    """
+    if line_end - line_start <= width:
+        return text[line_start:line_end]
+    start = max(line_start, min(offset - width // 2, line_end - width))
+    end = start + width
+    return ('...' if start > line_start else '') + text[start:end] + ('...' if end < line_end else '')
+
+
+def _match_violations(violations: List[LoggingViolation], others: Iterable[Tuple[str, str, Any]]
+                      ) -> Tuple[List[Tuple[LoggingViolation, Any]], List[LoggingViolation], List[Any]]:
+    """Pair violations with others of the same rule and line content, in order.
+
+    Line numbers are ignored, so a violation that only moved is still matched.
+
+    Args:
+        violations: The violations of one side
+        others: (rule, line content, item) of the other side
+
+    Returns:
+        (matched pairs of violation and item, unmatched violations, unmatched items)
+    """
+    others = list(others)
+    remaining: Dict[Tuple[str, str], Deque[int]] = {}
+    for index, (rule, content, _) in enumerate(others):
+        remaining.setdefault((rule, content), deque()).append(index)
+    matched = []
+    unmatched = []
+    used = [False] * len(others)
+    for violation in violations:
+        indexes = remaining.get((violation.violation_type, violation.line_content))
+        if indexes:
+            index = indexes.popleft()
+            used[index] = True
+            matched.append((violation, others[index][2]))
+        else:
+            unmatched.append(violation)
+    return matched, unmatched, [item for (_, _, item), taken in zip(others, used) if not taken]
+
+
+class ScanCache:
+    """Persistent cache of per-file scan results, keyed on file content.
+
+    A file whose size and mtime match its entry is answered from the cache
+    without being read. If only the mtime differs, as after a fresh checkout
+    with a restored cache, the content hash decides whether the entry is
+    still valid.
+    """
+
+    # Files modified this close to the last save may change without a visible mtime change
+    RACY_WINDOW_NS = 2 * 10**9
+
+    def __init__(self, path: str, fingerprint: str):
+        """Initialize the cache.
+
+        Args:
+            path: Location of the cache file
+            fingerprint: Fingerprint of the rules and checker; entries made with
+                another fingerprint are discarded
+        """
+        self.path = path
+        self.fingerprint = fingerprint
+        self.entries: Dict[str, Dict] = {}
+        self.saved_at_ns = 0
+        self.hits = 0
+        self.content_hits = 0
+        self.misses = 0
+
+    def load(self) -> None:
+        """Load the cache file, starting empty if it is missing, unreadable or stale."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+
+        if isinstance(data, dict) and data.get('fingerprint') == self.fingerprint:
+            self.entries = data.get('files', {})
+            self.saved_at_ns = data.get('saved_at_ns', 0)
+
+    def lookup(self, file_path: str) -> Optional[List[LoggingViolation]]:
+        """Get the cached violations of a file if the file is unchanged.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            The cached violations, or None if the file has to be scanned
+        """
+        entry = self.entries.get(file_path)
+        try:
+            stat = os.stat(file_path)
+            if entry is None or stat.st_size != entry['size']:
+                self.misses += 1
+                return None
+
+            if stat.st_mtime_ns != entry['mtime_ns'] or \
+                    stat.st_mtime_ns >= self.saved_at_ns - self.RACY_WINDOW_NS:
+                with open(file_path, 'rb') as file:
+                    digest = hashlib.sha256(file.read()).hexdigest()
+                if digest != entry['sha256']:
+                    self.misses += 1
+                    return None
+                entry['mtime_ns'] = stat.st_mtime_ns
+                self.content_hits += 1
+            else:
+                self.hits += 1
+        except OSError:
+            self.misses += 1
+            return None
+
+        return [
+            LoggingViolation(file_path, line_number, line_content, violation_type)
+            for line_number, line_content, violation_type in entry['violations']
+        ]
+
+    def store(self, result: FileScanResult) -> None:
+        """Record the scan result of a file.
+
+        Args:
+            result: The scan result, including its content digest
+        """
+        self.entries[result.file_path] = {
+            'size': result.size,
+            'mtime_ns': result.mtime_ns,
+            'sha256': result.digest,
+            'violations': [
+                [violation.line_number, violation.line_content, violation.violation_type]
+                for violation in result.violations
+            ],
+        }
+
+    def has_violations(self, file_path: str) -> bool:
+        """Check whether a file had violations when it was last scanned, whether or not it changed since."""
+        entry = self.entries.get(file_path)
+        return bool(entry and entry['violations'])
+
+    def save(self) -> None:
+        """Write the cache file atomically, so concurrent runs never see a partial file."""
+        # Entries of deleted files would otherwise accumulate forever
+        self.entries = {path: entry for path, entry in self.entries.items() if os.path.exists(path)}
+
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.logging_check_cache.')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump({
+                    'fingerprint': self.fingerprint,
+                    'saved_at_ns': time.time_ns(),
+                    'files': self.entries,
+                }, file, separators=(',', ':'))
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def summary(self) -> str:
+        """Describe how many files were answered from the cache."""
+        total = self.hits + self.content_hits + self.misses
+        return (f"Scan cache: {self.hits + self.content_hits}/{total} files unchanged "
+                f"({self.content_hits} verified by content hash), {self.misses} scanned")
+
+
+# Regex syntax that ends the literal prefix of a pattern
+_REGEX_METACHARS = set('.^$*+?{}[]|()')
+_REGEX_QUANTIFIERS = set('*+?{')
+_LEADING_LOOKBEHIND = re.compile(r'^\(\?<[!=](?:[^()\\]|\\.)*\)')
+
+
+def _required_literal(pattern: str) -> Optional[str]:
+    """Extract the literal text every match of a pattern must start with.
+
+    Args:
+        pattern: The regex pattern
+
+    Returns:
+        The literal prefix, or None if the pattern has no usable prefix
+    """
+    # Leading lookbehinds only constrain the text before the match
+    while True:
+        lookbehind = _LEADING_LOOKBEHIND.match(pattern)
+        if not lookbehind:
+            break
+        pattern = pattern[lookbehind.end():]
+    # A match of a top-level alternation need only contain one of its branches
+    if _has_top_level_alternation(pattern):
+        return None
+
+    literal = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                break
+            char = pattern[i + 1]
+            i += 2
+        elif char in _REGEX_METACHARS:
+            break
+        else:
+            i += 1
+
+        # A quantified character is optional or repeated, so it is not part of the prefix
+        if i < len(pattern) and pattern[i] in _REGEX_QUANTIFIERS:
+            break
+        literal.append(char)
+
+    return ''.join(literal) or None
+
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    """Check whether a regex pattern has a | outside of groups and character classes."""
+    depth = 0
+    i = 0
+    in_class = False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            i += 1
+        elif in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+            # A ] right after the opening bracket or its negation is a literal
+            if pattern[i + 1:i + 2] == '^':
+                i += 1
+            if pattern[i + 1:i + 2] == ']':
+                i += 1
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+        i += 1
+    return False
+
+
+def _is_identifier_char(char: str) -> bool:
+    """Check whether a character can be part of a Dart identifier."""
+    return char.isalnum() or char == '_' or char == '$'
+
+
+class DartLexer:
+    """Streaming tokenizer that splits Dart source into code, comment and string regions.
+
+    The lexer is a linear state machine over the whole buffer. Each state
+    jumps straight to the next token that can end it, so plain code is
+    skipped at regex speed, and strings without interpolation are consumed
+    as a single token. Block comments nest as they do in Dart, raw strings
+    ignore escapes, and the contents of ${...} interpolations are code.
+    """
+
+    CODE = 'code'
+    COMMENT = 'comment'
+    STRING = 'string'
+
+    # Complete strings without interpolation, matched as a single token, keyed on (quote, raw)
+    SIMPLE_STRINGS = {
+        ("'", False): re.compile(r"'[^'\\\r\n$]*(?:(?:\\[^\r\n]|\$(?!\{))[^'\\\r\n$]*)*'"),
+        ('"', False): re.compile(r'"[^"\\\r\n$]*(?:(?:\\[^\r\n]|\$(?!\{))[^"\\\r\n$]*)*"'),
+        ("'''", False): re.compile(r"'''[^\\$']*(?:(?:\\[\s\S]|\$(?!\{)|'(?!''))[^\\$']*)*'''"),
+        ('"""', False): re.compile(r'"""[^\\$"]*(?:(?:\\[\s\S]|\$(?!\{)|"(?!""))[^\\$"]*)*"""'),
+        ("'", True): re.compile(r"'[^'\r\n]*'"),
+        ('"', True): re.compile(r'"[^"\r\n]*"'),
+        ("'''", True): re.compile(r"'''[\s\S]*?'''"),
+        ('"""', True): re.compile(r'"""[\s\S]*?"""'),
+    }
+
+    CODE_TOKEN = re.compile(r'''(?P<quote>\'\'\'|"""|'|")|(?P<line_comment>//[^\r\n]*)|(?P<block_comment>/\*)''')
+    # Inside ${...} braces have to be counted to find the end of the interpolation
+    INTERPOLATION_TOKEN = re.compile(CODE_TOKEN.pattern + r'|(?P<brace>[{}])')
+    BLOCK_COMMENT_TOKEN = re.compile(r'/\*|\*/')
+
+    # Tokens that end or interrupt a string, keyed on (quote, raw); single-line strings end at CR or LF
+    STRING_TOKENS = {
+        (quote, raw): re.compile(
+            ('' if raw else (r'\\.' if len(quote) == 3 else r'\\[^\r\n]') + r'|\$\{|') + quote +
+            ('' if len(quote) == 3 else r'|[\r\n]'),
+            re.DOTALL if len(quote) == 3 else 0
+        )
+        for quote in ("'", '"', "'''", '"""') for raw in (False, True)
+    }
+
+    @classmethod
+    def regions(cls, text: str) -> List[Tuple[int, int, str]]:
+        """Split a buffer into regions.
+
+        Args:
+            text: The Dart source
+
+        Returns:
+            Non-empty (start, end, kind) regions covering the buffer, in order,
+            where kind is CODE, COMMENT or STRING
+        """
+        return list(cls.iter_regions(text))
+
+    @classmethod
+    def iter_regions(cls, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Split a buffer into regions lazily, so callers can stop early.
+
+        Args:
+            text: The Dart source
+
+        Yields:
+            Non-empty (start, end, kind) regions covering the buffer, in order
+        """
+        code, comment, string = cls.CODE, cls.COMMENT, cls.STRING
+        length = len(text)
+        pos = start = 0  # start of the pending code region
+        brace_depth = 0
+        # Strings and brace depths enclosing the ${...} interpolation being lexed
+        interpolations: List[Tuple[re.Pattern, int]] = []
+
+        while pos < length:
+            token_regex = cls.INTERPOLATION_TOKEN if interpolations else cls.CODE_TOKEN
+            match = token_regex.search(text, pos)
+            if not match:
+                break
+            token_start, pos = match.span()
+            kind = match.lastgroup
+
+            if kind == 'brace':
+                if match.group() == '{':
+                    brace_depth += 1
+                    continue
+                if brace_depth:
+                    brace_depth -= 1
+                    continue
+                # The closing brace of ${...} resumes the enclosing string
+                string_token, brace_depth = interpolations.pop()
+                string_start = token_start
+                if string_start > start:
+                    yield start, string_start, code
+            elif kind == 'line_comment':
+                if token_start > start:
+                    yield start, token_start, code
+                yield token_start, pos, comment
+                start = pos
+                continue
+            elif kind == 'block_comment':
+                depth = 1
+                while depth:
+                    comment_match = cls.BLOCK_COMMENT_TOKEN.search(text, pos)
+                    if not comment_match:
+                        pos = length
+                        break
+                    depth += 1 if comment_match.group() == '/*' else -1
+                    pos = comment_match.end()
+                if token_start > start:
+                    yield start, token_start, code
+                yield token_start, pos, comment
+                start = pos
+                continue
+            else:
+                # An r directly before the quote makes a raw string, unless it ends an identifier
+                raw = (token_start > 0 and text[token_start - 1] == 'r' and
+                       (token_start < 2 or not _is_identifier_char(text[token_start - 2])))
+                quote = match.group()
+                string_start = token_start - 1 if raw else token_start
+                if string_start > start:
+                    yield start, string_start, code
+
+                simple = cls.SIMPLE_STRINGS[(quote, raw)].match(text, token_start)
+                if simple:
+                    pos = simple.end()
+                    yield string_start, pos, string
+                    start = pos
+                    continue
+                string_token = cls.STRING_TOKENS[(quote, raw)]
+
+            # Inside a string with interpolation or without an end
+            while True:
+                string_match = string_token.search(text, pos)
+                if not string_match:
+                    yield string_start, length, string
+                    return
+                pos = string_match.end()
+                token = string_match.group()
+                if token[0] != '\\':
+                    break
+
+            if token == '${':
+                yield string_start, pos, string
+                interpolations.append((string_token, brace_depth))
+                brace_depth = 0
+                start = pos
+            elif token in '\r\n':
+                # Unterminated single-line string; resume with the next line as code
+                pos = string_match.start()
+                yield string_start, pos, string
+                start = pos
+            else:
+                yield string_start, pos, string
+                start = pos
+
+        if length > start:
+            yield start, length, code
+
+
+# Rest of a line after the start of an interpolation
+_INTERPOLATION_TO_EOL = re.compile(r'\$\{[^\n]*')
+
+
+def _lines_are_independent(text: str) -> bool:
+    """Check whether every line of a buffer starts in code.
+
+    That holds if there are no block comments, no multi-line strings and no
+    interpolation running over the end of a line. The check is conservative:
+    a '/*' inside a string also makes it fail.
+
+    Args:
+        text: The Dart source
+
+    Returns:
+        True if each line can be lexed on its own
+    """
+    if '/*' in text or "'''" in text or '"""' in text:
+        return False
+    for match in _INTERPOLATION_TO_EOL.finditer(text):
+        rest = match.group()
+        if rest.count('{') > rest.count('}'):
+            return False
+    return True
+
+
+class CodeMap:
+    """Answers whether an offset of a buffer lies in code rather than a comment or string.
+
+    Nothing is lexed until the first query. If every line starts in code,
+    only the queried lines are lexed; otherwise the buffer is lexed from the
+    start, but only as far as the queried offsets.
+    """
+
+    def __init__(self, text: str):
+        """Initialize the map.
+
+        Args:
+            text: The Dart source
+        """
+        self.text = text
+        self.line_local: Optional[bool] = None
+        self.regions: Optional[Iterator[Tuple[int, int, str]]] = None
+        self.lexed_up_to = 0
+        self.line_start = -1
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+
+    def is_code(self, offset: int) -> bool:
+        """Check whether an offset lies in a code region.
+
+        Args:
+            offset: Offset into the buffer
+
+        Returns:
+            True if the character at offset is code
+        """
+        if self.line_local is None:
+            self.line_local = _lines_are_independent(self.text)
+            if not self.line_local:
+                self.regions = DartLexer.iter_regions(self.text)
+
+        if self.line_local:
+            line_start = self.text.rfind('\n', 0, offset) + 1
+            if line_start != self.line_start:
+                line_end = self.text.find('\n', offset)
+                line_end = len(self.text) if line_end == -1 else line_end
+                self.line_start = line_start
+                self.starts, self.ends = [], []
+                for start, end, kind in DartLexer.iter_regions(self.text[line_start:line_end]):
+                    if kind == DartLexer.CODE:
+                        self.starts.append(line_start + start)
+                        self.ends.append(line_start + end)
+        elif offset >= self.lexed_up_to:
+            for start, end, kind in self.regions:
+                if kind == DartLexer.CODE:
+                    self.starts.append(start)
+                    self.ends.append(end)
+                self.lexed_up_to = end
+                if end > offset:
+                    break
+            if offset >= self.lexed_up_to:
+                return False
+
+        index = bisect_right(self.starts, offset) - 1
+        return index >= 0 and offset < self.ends[index]
+
+
+class StreamingLexer:
+    """DartLexer for a buffer that arrives window by window.
+
+    The state at the end of a window, down to open interpolations and nested
+    comments, carries over to the next one, so the regions are those of
+    lexing the whole buffer at once. If every line starts in code, only the
+    lines asked about are lexed, like in CodeMap, and a line is only carried
+    over to the next window when asked to. Only code regions are kept, and
+    only as far back as they are still asked about.
+    """
+
+    LINE_COMMENT = 'line_comment'
+    BLOCK_COMMENT = 'block_comment'
+
+    def __init__(self, line_local: bool = False):
+        """Initialize the lexer.
+
+        Args:
+            line_local: Whether every line of the buffer starts in code
+        """
+        self.line_local = line_local
+        self.text = ''
+        self.base = 0
+        self.final = False
+        self.reset(0)
+
+    def reset(self, offset: int) -> None:
+        """Start lexing afresh at an offset where code starts."""
+        self.pos = self.line = offset
+        self.state = DartLexer.CODE
+        self.start = offset  # start of the pending code region
+        self.depth = 0  # nesting of the open block comment
+        self.brace_depth = 0
+        self.interpolations: List[Tuple[re.Pattern, int]] = []
+        self.string_token: Optional[re.Pattern] = None
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+
+    def window(self, text: str, base: int, hi: int, final: bool) -> None:
+        """Move on to the next window, as made by _iter_source_windows.
+
+        Args:
+            text: The window
+            base: Its offset in the buffer
+            hi: End of its new part; unless lines are lexed on their own, the
+                window is lexed this far
+            final: Whether it ends the buffer
+        """
+        self.text, self.base, self.final = text, base, final
+        self.forget(base)
+        if not self.line_local:
+            self.lex(base + hi)
+
+    def carry(self, hi: int, overlap: int) -> None:
+        """Lex the line running on from the new part of the window, if the next window won't hold its start.
+
+        Args:
+            hi: End of the new part of the window
+            overlap: Context the next window keeps before it
+        """
+        if self.final:
+            return
+        text, base = self.text, self.base
+        line_start = text.rfind('\n', 0, hi) + 1
+        if line_start or not base:
+            if line_start > hi - overlap:
+                return
+            if self.line != base + line_start:
+                self.reset(base + line_start)
+        self.lex(base + hi)
+
+    def is_code(self, offset: int) -> bool:
+        """Check whether an offset of the window lies in a code region.
+
+        Offsets asked about go forward line by line, and lie before the end of
+        the new part of the window.
+        """
+        position = self.base + offset
+        if self.line_local and position >= self.pos:
+            line_start = self.text.rfind('\n', 0, offset) + 1
+            # A line starting before the window was carried over
+            if (line_start or not self.base) and self.base + line_start != self.line:
+                self.reset(self.base + line_start)
+            self.lex(position + 1)
+        if self.state == DartLexer.CODE and position >= self.start:
+            return position < self.pos
+        index = bisect_right(self.starts, position) - 1
+        return index >= 0 and position < self.ends[index]
+
+    def lex(self, stop: int) -> None:
+        """Lex the tokens of the window starting before an offset of the buffer.
+
+        The window holds everything from the offset lexed up to, and unless it
+        is final at least three characters past stop.
+        """
+        lexer = DartLexer
+        code, string = lexer.CODE, lexer.STRING
+        text, base, final = self.text, self.base, self.final
+        length = len(text)
+        pos, limit, start, state = self.pos - base, stop - base, self.start - base, self.state
+        while pos < limit:
+            if state == code:
+                match = (lexer.INTERPOLATION_TOKEN if self.interpolations else lexer.CODE_TOKEN).search(text, pos)
+                if not match or match.start() >= limit:
+                    pos = limit
+                    break
+                token_start, pos = match.span()
+                kind = match.lastgroup
+                if kind == 'brace':
+                    if match.group() == '{':
+                        self.brace_depth += 1
+                    elif self.brace_depth:
+                        self.brace_depth -= 1
+                    else:
+                        # The closing brace of ${...} resumes the enclosing string
+                        self.string_token, self.brace_depth = self.interpolations.pop()
+                        self.add_code(base + start, base + token_start)
+                        state = string
+                    continue
+                if kind == 'line_comment':
+                    self.add_code(base + start, base + token_start)
+                    if pos < length or final:
+                        start = pos
+                    else:
+                        state = self.LINE_COMMENT  # Runs on past the window
+                    continue
+                if kind == 'block_comment':
+                    self.add_code(base + start, base + token_start)
+                    self.depth = 1
+                    state = self.BLOCK_COMMENT
+                    continue
+                # An r directly before the quote makes a raw string, unless it ends an identifier
+                raw = (base + token_start > 0 and text[token_start - 1] == 'r' and
+                       (base + token_start < 2 or not _is_identifier_char(text[token_start - 2])))
+                quote = match.group()
+                self.add_code(base + start, base + (token_start - 1 if raw else token_start))
+                simple = lexer.SIMPLE_STRINGS[(quote, raw)].match(text, token_start)
+                if simple:
+                    pos = start = simple.end()
+                    continue
+                self.string_token = lexer.STRING_TOKENS[(quote, raw)]
+                state = string
+            elif state == string:
+                match = self.string_token.search(text, pos)
+                if not match or match.start() >= limit:
+                    pos = limit
+                    break
+                pos = match.end()
+                token = match.group()
+                if token[0] == '\\':
+                    continue
+                if token == '${':
+                    self.interpolations.append((self.string_token, self.brace_depth))
+                    self.brace_depth = 0
+                elif token in '\r\n':
+                    # Unterminated single-line string; resume with the next line as code
+                    pos = match.start()
+                start = pos
+                state = code
+            elif state == self.BLOCK_COMMENT:
+                match = lexer.BLOCK_COMMENT_TOKEN.search(text, pos)
+                if not match or match.start() >= limit:
+                    pos = limit
+                    break
+                self.depth += 1 if match.group() == '/*' else -1
+                pos = match.end()
+                if not self.depth:
+                    start = pos
+                    state = code
+            else:
+                end = text.find('\n', pos, limit)
+                if end == -1:
+                    pos = limit
+                    break
+                pos = start = end
+                state = code
+        self.pos, self.start, self.state = base + pos, base + start, state
+
+    def add_code(self, start: int, end: int) -> None:
+        """Record a code region, unless it is empty."""
+        if end > start:
+            self.starts.append(start)
+            self.ends.append(end)
+
+    def forget(self, offset: int) -> None:
+        """Drop the code regions ending before an offset, which won't be asked about again."""
+        count = bisect_right(self.ends, offset)
+        if count:
+            del self.starts[:count]
+            del self.ends[:count]
+
+
+class Rule:
+    """A prohibited pattern, with how its violations are reported and fixed."""
+
+    SEVERITIES = ('error', 'warning')
+
+    FIELDS = {'id', 'pattern', 'severity', 'message', 'fix', 'drop_arguments', 'fix_import', 'include', 'exclude',
+              'symbol', 'libraries'}
+
+    def __init__(self, rule_id: str, pattern: str, severity: str = 'error', message: Optional[str] = None,
+                 fix: Optional[str] = None, drop_arguments: Optional[List[str]] = None,
+                 fix_import: Optional[str] = None, include: Optional[List[str]] = None,
+                 exclude: Optional[List[str]] = None, symbol: Optional[str] = None,
+                 libraries: Optional[List[str]] = None):
+        """Initialize the rule.
+
+        Args:
+            rule_id: Identifier reported as the violation type
+            pattern: Regex matching a prohibited call in code
+            severity: 'error' fails the check, 'warning' is only reported
+            message: Description for reports; a default one is derived from the id
+            fix: Replacement for the matched text, may use regex group references;
+                None if the rule can't be fixed automatically
+            drop_arguments: Named arguments removed from the call when fixing; the
+                pattern must then end with the call's opening parenthesis
+            fix_import: Package imported into files fixed by this rule; {package}
+                stands for the name of the package holding the file
+            include: Globs of files the rule applies to, all files if empty
+            exclude: Globs of files the rule doesn't apply to
+            symbol: The function the pattern calls, checked against the imports
+            libraries: Libraries declaring or exporting the symbol; if given, only
+                calls that can resolve to one of them are violations
+
+        Raises:
+            ValueError: If the rule is invalid
+        """
+        if severity not in self.SEVERITIES:
+            raise ValueError(f"severity must be one of {', '.join(self.SEVERITIES)}, got {severity!r}")
+        try:
+            self.regex = re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"invalid pattern {pattern!r}: {e}")
+        if drop_arguments and not (pattern.endswith(r'\(') and (fix or '').endswith('(')):
+            raise ValueError("drop_arguments needs a pattern and fix ending in the call's opening parenthesis")
+        if libraries and not (symbol and re.fullmatch(r'[A-Za-z_$][\w$]*', symbol)):
+            raise ValueError("libraries needs the symbol the pattern calls")
+        self.rule_id = rule_id
+        self.pattern = pattern
+        self.severity = severity
+        self.message = message or f"{rule_id}() is prohibited, use AppLogger.d() or AppLogger.e() instead"
+        self.fix = fix
+        self.drop_arguments = list(drop_arguments or [])
+        self.fix_import = fix_import
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        self.symbol = symbol
+        self.libraries = list(libraries or [])
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Rule':
+        """Create a rule from its configuration entry.
+
+        Raises:
+            ValueError: If the entry is invalid
+        """
+        if not isinstance(data, dict):
+            raise ValueError("expected an object")
+        unknown = set(data) - cls.FIELDS
+        if unknown:
+            raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+        if not isinstance(data.get('id'), str) or not isinstance(data.get('pattern'), str):
+            raise ValueError("'id' and 'pattern' are required strings")
+        return cls(data['id'], data['pattern'], data.get('severity', 'error'), data.get('message'),
+                   data.get('fix'), data.get('drop_arguments'), data.get('fix_import'),
+                   data.get('include'), data.get('exclude'), data.get('symbol'), data.get('libraries'))
+
+    def to_dict(self) -> Dict:
+        """Get the rule's configuration entry."""
+        return {'id': self.rule_id, 'pattern': self.pattern, 'severity': self.severity, 'message': self.message,
+                'fix': self.fix, 'drop_arguments': self.drop_arguments, 'fix_import': self.fix_import,
+                'include': self.include, 'exclude': self.exclude, 'symbol': self.symbol, 'libraries': self.libraries}
+
+    @property
+    def scoped(self) -> bool:
+        """Whether the rule only applies to some files."""
+        return bool(self.include or self.exclude)
+
+    def import_uri(self, package: str) -> Optional[str]:
+        """Get the package imported into a fixed file of a package, if any."""
+        return self.fix_import.replace('{package}', package) if self.fix_import else None
+
+    def applies_to(self, file_path: str, base: Optional[str] = None) -> bool:
+        """Check whether the rule applies to a file.
+
+        Globs are matched like --exclude: against the path relative to the
+        base directory, and for globs without a slash against the file name.
+
+        Args:
+            file_path: Path of the file
+            base: Directory the globs are relative to, the working directory by default
+        """
+        if base is not None:
+            file_path = os.path.relpath(file_path, base)
+        elif os.path.isabs(file_path):
+            file_path = os.path.relpath(file_path)
+        normalized = os.path.normpath(file_path).replace(os.sep, '/')
+        name = os.path.basename(normalized)
+
+        def matches(glob: str) -> bool:
+            return fnmatch.fnmatchcase(normalized, glob) or ('/' not in glob and fnmatch.fnmatchcase(name, glob))
+
+        if self.include and not any(matches(glob) for glob in self.include):
+            return False
+        return not any(matches(glob) for glob in self.exclude)
+
+
+def load_rules(path: str) -> List[Rule]:
+    """Load a rule configuration file.
+
+    The file is JSON: {"rules": [{"id": ..., "pattern": ..., ...}, ...]}, with
+    the fields of Rule.
+
+    Args:
+        path: The configuration file
+
+    Returns:
+        The rules, in reporting order
+
+    Raises:
+        OSError: If the file can't be read
+        ValueError: If the file or one of its rules is invalid
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        try:
+            data = json.load(file)
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}")
+    if not isinstance(data, dict) or not isinstance(data.get('rules'), list):
+        raise ValueError(f"{path}: expected an object with a 'rules' list")
+
+    rules = []
+    for index, entry in enumerate(data['rules']):
+        try:
+            rules.append(Rule.from_dict(entry))
+        except ValueError as e:
+            raise ValueError(f"{path}: rule {index + 1}: {e}")
+    if len({rule.rule_id for rule in rules}) != len(rules):
+        raise ValueError(f"{path}: rule ids must be unique")
+    return rules
+
+
+def configured_rules(path: Optional[str]) -> Optional[List[Rule]]:
+    """Load the rules of a configuration file, or of logging_rules.json next to this script.
+
+    Args:
+        path: The configuration file, or None for the default one
+
+    Returns:
+        The rules, or None for the built-in rules if no file is given and
+        the default one is missing
+
+    Raises:
+        OSError: If the file can't be read
+        ValueError: If the file or one of its rules is invalid
+    """
+    if path is None and not os.path.exists(DEFAULT_RULES_FILE):
+        return None
+    return load_rules(path or DEFAULT_RULES_FILE)
+
+
+class ImportTable:
+    """The imports of a Dart library, and the prohibited symbols it declares itself.
+
+    Tells whether a call of a rule's symbol can resolve to one of the rule's
+    libraries: `log(` is only dart:developer's log if the library imports
+    dart:developer without a prefix, without hiding log and without declaring
+    a top-level log of its own, and `dev.log(` only if it imports
+    dart:developer as dev. Part files get their imports from their library,
+    so every call resolves in them.
+    """
+
+    # Comments and annotations, which may precede a directive
+    PREAMBLE = re.compile(r'(?:\s|//[^\r\n]*|/\*.*?\*/|@[\w$.]+(?:\([^;]*?\))?)*', re.DOTALL)
+    # A directive with the comments and annotations before it; directives precede all declarations
+    DIRECTIVE = re.compile(PREAMBLE.pattern + r'(import|export|library|part)\b([^;]*);', re.DOTALL)
+    # What follows the preamble when the text ends within a directive, a comment or an annotation's arguments
+    CUT_OFF = re.compile(r'(?:import|export|library|part)\b|/\*|\(|\Z')
+    STRING = re.compile(r'''r?(?:'([^'\r\n]*)'|"([^"\r\n]*)")''')
+    IDENTIFIER = re.compile(r'[A-Za-z_$][\w$]*')
+
+    # How much of a file is decoded at first to parse its directives
+    HEADER_SIZE = 4096
+
+    # Compiled patterns of declare(), by symbol
+    _declaration_patterns: Dict[str, Tuple[re.Pattern, re.Pattern]] = {}
+
+    def __init__(self):
+        # (URIs, prefix, show and hide combinators) of every import
+        self.imports: List[Tuple[List[str], Optional[str], List[Tuple[str, Set[str]]]]] = []
+        self.part_of = False
+        self.declared: Set[str] = set()
+        self._visible: Dict[str, Set[Optional[str]]] = {}
+
+    @classmethod
+    def parse(cls, text: str) -> Tuple['ImportTable', int]:
+        """Parse the directives at the start of a library.
+
+        Args:
+            text: The library's source, or a prefix of it
+
+        Returns:
+            (table, end) tuple, where end is the offset parsing stopped at,
+            the start of the first declaration
+        """
+        table = cls()
+        end = 0
+        while True:
+            directive = cls.DIRECTIVE.match(text, end)
+            if directive is None:
+                return table, end
+            end = directive.end()
+            keyword, body = directive.groups()
+            if keyword == 'part' and body.split()[:1] == ['of']:
+                table.part_of = True
+            elif keyword == 'import':
+                strings = list(cls.STRING.finditer(body))
+                if not strings:
+                    continue
+                # Conditional imports name several libraries, any of which may be the one imported
+                uris = [string.group(1) if string.group(1) is not None else string.group(2) for string in strings]
+                prefix = None
+                combinators: List[Tuple[str, Set[str]]] = []
+                words = iter(cls.IDENTIFIER.findall(body, strings[-1].end()))
+                for word in words:
+                    if word == 'as':
+                        prefix = next(words, None)
+                    elif word in ('show', 'hide'):
+                        combinators.append((word, set()))
+                    elif combinators:
+                        combinators[-1][1].add(word)
+                table.imports.append((uris, prefix, combinators))
+
+    @classmethod
+    def from_bytes(cls, data) -> 'ImportTable':
+        """Parse the directives of a library without decoding more than its header.
+
+        Args:
+            data: The raw contents, as bytes or any other buffer such as an mmap
+
+        Returns:
+            The table, without declarations
+        """
+        size = cls.HEADER_SIZE
+        while True:
+            text = bytes(data[:size]).decode('utf-8', 'replace')
+            table, end = cls.parse(text)
+            # Parsing also stops at a directive cut off by the end of the text; anything else is a declaration
+            if size >= len(data) or not cls.CUT_OFF.match(text, cls.PREAMBLE.match(text, end).end()):
+                return table
+            size *= 4
+
+    def declare(self, text: str, symbols: Iterable[str], first_line: int = 0) -> None:
+        """Find which symbols the library declares at the top level.
+
+        Declarations are recognized at the start of a line, as formatted by
+        dart format: functions, getters and variables.
+
+        Args:
+            text: The library's source, or a window of it
+            symbols: The symbols to look for
+            first_line: Offset of the first whole line of text, when it is a
+                window starting within a line
+        """
+        for symbol in symbols:
+            if symbol in self.declared:
+                continue
+            occurrence, declaration = self.declaration_patterns(symbol)
+            # Only lines holding the symbol are tried, which is much faster than searching for line starts
+            for match in occurrence.finditer(text, first_line):
+                start = match.start()
+                if start and (text[start - 1].isalnum() or text[start - 1] in '_$'):
+                    continue  # Part of a longer identifier
+                if declaration.match(text, self.line_start(text, start)):
+                    self.declared.add(symbol)
+                    break
+
+    @classmethod
+    def declaration_patterns(cls, symbol: str) -> Tuple[re.Pattern, re.Pattern]:
+        """Get the patterns of the occurrences of a symbol, and of a line declaring it at the top level."""
+        patterns = cls._declaration_patterns.get(symbol)
+        if patterns is not None:
+            return patterns
+        name = re.escape(symbol)
+        # Starts with the symbol itself, so the regex engine can skip ahead to it
+        occurrence = re.compile(rf'{name}(?![\w$])')
+        declaration = re.compile(
+            rf'(?:(?:external|final|const|late|var)\s+)*(?:[A-Za-z_$][\w$.]*(?:<[^\n;{{}}=]*>)?\??\s+)?'
+            rf'(?:get\s+{name}\s*(?:=>|\{{)|'
+            rf'{name}\s*(?:<[^\n>]*>\s*)?(?:\([^)]*\)\s*(?:async\s*)?(?:=>|\{{)|=(?!=)|;))')
+        patterns = cls._declaration_patterns[symbol] = (occurrence, declaration)
+        return patterns
+
+    def visible_prefixes(self, rule: 'Rule') -> Set[Optional[str]]:
+        """Get the prefixes a rule's symbol is imported with from one of its libraries.
+
+        Returns:
+            The import prefixes, with None for an unprefixed import
+        """
+        visible = self._visible.get(rule.rule_id)
+        if visible is None:
+            visible = set()
+            core_imported = False
+            for uris, prefix, combinators in self.imports:
+                core_imported = core_imported or 'dart:core' in uris
+                if any(uri in rule.libraries for uri in uris) and all(
+                        (rule.symbol in names) == (kind == 'show') for kind, names in combinators):
+                    visible.add(prefix)
+            # dart:core is imported implicitly, unless it is imported explicitly
+            if 'dart:core' in rule.libraries and not core_imported:
+                visible.add(None)
+            self._visible[rule.rule_id] = visible
+        return visible
+
+    def reaches(self, rule: 'Rule') -> bool:
+        """Check whether any call of a rule's symbol can resolve to one of its libraries."""
+        return self.part_of or bool(self.visible_prefixes(rule))
+
+    def resolves(self, rule: 'Rule', before: str) -> bool:
+        """Check whether a call of a rule's symbol resolves to one of its libraries.
+
+        Args:
+            rule: The rule
+            before: The code before the symbol, on the same line
+
+        Returns:
+            True if the call resolves to the rule's libraries
+        """
+        if self.part_of:
+            return True
+        before = before.rstrip()
+        if not before.endswith('.'):
+            return None in self.visible_prefixes(rule) and rule.symbol not in self.declared
+        if before.endswith(('?.', '..')):
+            return False  # A member of an object
+        # A prefix is a lone identifier; a.b.log( and f().log( call members
+        qualifier = re.search(r'(?<![\w$.])([A-Za-z_$][\w$]*)\s*$', before[:-1])
+        return qualifier is not None and qualifier.group(1) in self.visible_prefixes(rule)
+
+    def accepts(self, rule: 'Rule', text: str) -> Callable[[re.Match], bool]:
+        """Get a filter of the matches of an import-aware rule in a text.
+
+        Args:
+            rule: The rule
+            text: The text the matches are in
+
+        Returns:
+            A function telling whether a match is a call resolving to the rule's libraries
+        """
+        return lambda match: self.resolves_span(rule, text, match.start(), match.end())
+
+    def resolves_span(self, rule: 'Rule', text: str, start: int, end: int) -> bool:
+        """Check whether the call a rule matched at text[start:end] resolves to the rule's libraries."""
+        position = text.find(rule.symbol, start, end)
+        if position == -1:
+            return True
+        return self.resolves(rule, text[self.line_start(text, position):position])
+
+    @staticmethod
+    def line_start(text: str, position: int) -> int:
+        """Get the start of the line holding a position, whatever the line endings of the text."""
+        return max(text.rfind('\n', 0, position), text.rfind('\r', 0, position)) + 1
+
+
+class PatternMatcher:
+    """Matches a whole rule set against a file buffer in a single pass.
+
+    All patterns are compiled into one alternation that is run over the full
+    buffer. Only lines that contain a candidate match in code are split out and
+    checked against the individual patterns.
+    """
+
+    def __init__(self, patterns: List[Tuple[str, str]]):
+        """Initialize the matcher.
+
+        Args:
+            patterns: List of (pattern, violation_type) tuples, in reporting order
+        """
+        self.patterns = list(patterns)
+        self.compiled = [(re.compile(pattern), violation_type) for pattern, violation_type in self.patterns]
+        self.combined = re.compile(
+            '|'.join(f'(?:{pattern})' for pattern, _ in self.patterns) or r'(?!)',
+            re.MULTILINE
+        )
+
+        # Cheap substring prefilter, only usable if every pattern has a literal prefix
+        literals = [_required_literal(pattern) for pattern, _ in self.patterns]
+        self.literals: Optional[List[str]] = None if None in literals else literals
+        self.byte_literals: Optional[List[bytes]] = (
+            None if self.literals is None else [literal.encode('utf-8') for literal in self.literals]
+        )
+
+    def may_match(self, text: str) -> bool:
+        """Check whether a buffer can contain any match at all.
+
+        Args:
+            text: The buffer to check
+
+        Returns:
+            False if the buffer certainly has no match, True otherwise
+        """
+        if self.literals is None:
+            return True
+        return any(literal in text for literal in self.literals)
+
+    def may_match_bytes(self, data) -> bool:
+        """Check whether raw UTF-8 file contents can contain any match at all.
+
+        Lets files without a candidate skip decoding entirely.
+
+        Args:
+            data: The raw contents, as bytes or any other buffer such as an mmap
+
+        Returns:
+            False if the contents certainly have no match, True otherwise
+        """
+        if self.byte_literals is None:
+            return True
+        return any(data.find(literal) != -1 for literal in self.byte_literals)
+
+    def search(self, text: str, pos: int, next_literal: List[int]) -> Optional[re.Match]:
+        """Find the next match of the combined pattern.
+
+        With literal prefixes available, candidates are located with str.find
+        and only verified by the regex, since a pattern starting with a
+        lookbehind can't use the regex engine's own prefix scan.
+
+        Args:
+            text: The buffer to search
+            pos: Offset to start searching at
+            next_literal: Next known occurrence of each literal, updated in place
+
+        Returns:
+            The next match, or None
+        """
+        if self.literals is None:
+            return self.combined.search(text, pos)
+
+        while True:
+            for index, literal in enumerate(self.literals):
+                if next_literal[index] < pos:
+                    found = text.find(literal, pos)
+                    next_literal[index] = len(text) if found == -1 else found
+            start = min(next_literal)
+            if start >= len(text):
+                return None
+            match = self.combined.match(text, start)
+            if match:
+                return match
+            pos = start + 1
+
+    def scan(self, text: str, in_code: Optional[Callable[[int], bool]] = None,
+             accepts: Optional[Dict[str, Callable[[re.Match], bool]]] = None) -> Iterator[Tuple[int, str, List[str]]]:
+        """Find the lines of a buffer that violate a rule.
+
+        Args:
+            text: The buffer to scan
+            in_code: Tells whether an offset lies in code; matches elsewhere
+                are ignored. None treats the whole buffer as code.
+            accepts: Further filters of the matches of some violation types
+
+        Yields:
+            (line_number, line, violation_types) tuples, where line keeps its
+            trailing newline and violation_types are in pattern order
+        """
+        for line_number, line_start, line_end, hits in self.scan_hits(text, in_code, accepts):
+            yield line_number, text[line_start:line_end], list(hits)
+
+    def scan_hits(self, text: str, in_code: Optional[Callable[[int], bool]] = None,
+                  accepts: Optional[Dict[str, Callable[[re.Match], bool]]] = None,
+                  start: int = 0, stop: Optional[int] = None,
+                  line_number: int = 1) -> Iterator[Tuple[int, int, int, Dict[str, int]]]:
+        """Find the lines of a buffer that violate a rule, and where.
+
+        Args:
+            text: The buffer to scan
+            in_code: Tells whether an offset lies in code; matches elsewhere
+                are ignored. None treats the whole buffer as code.
+            accepts: Further filters of the matches of some violation types
+            start: Offset of the first match to consider
+            stop: Only consider matches starting before this offset, the end of the buffer by default
+            line_number: Number of the line holding the start of the buffer
+
+        Yields:
+            (line_number, line_start, line_end, hits) tuples, where the line
+            spans text[line_start:line_end] with its trailing newline, and hits
+            holds the offset of the first match of every violation type, in
+            pattern order
+        """
+        if not self.may_match(text):
+            return
+
+        counted_up_to = 0
+        length = len(text)
+        stop = length if stop is None else stop
+        next_literal = [-1] * len(self.literals or ())
+        match = self.search(text, start, next_literal)
+        while match and match.start() < stop:
+            match_start = match.start()
+            if in_code is not None and not in_code(match_start):
+                match = self.search(text, match_start + 1, next_literal)
+                continue
+
+            line_start = text.rfind('\n', 0, match_start) + 1
+            line_end = text.find('\n', match_start)
+            line_end = length if line_end == -1 else line_end + 1
+
+            # Line numbers are only computed for actual hits
+            line_number += text.count('\n', counted_up_to, line_start)
+            counted_up_to = line_start
+
+            hits = {}
+            for regex, violation_type in self.compiled:
+                accept = accepts.get(violation_type) if accepts else None
+                for rule_match in regex.finditer(text, line_start, line_end):
+                    if rule_match.start() >= stop:
+                        break
+                    if (in_code is None or in_code(rule_match.start())) and (accept is None or accept(rule_match)):
+                        hits[violation_type] = rule_match.start()
+                        break
+            if hits:
+                yield line_number, line_start, line_end, hits
+
+            if line_end >= length:
+                break
+            match = self.search(text, line_end, next_literal)
+
+
+def _is_generated_source(data) -> bool:
+    """Check whether a file starts with a `// GENERATED CODE` header comment.
+
+    Args:
+        data: The raw file contents, as bytes or any other buffer such as an mmap
+
+    Returns:
+        True if the leading comment lines mark the file as generated
+    """
+    for line in bytes(data[:GENERATED_HEADER_SIZE]).splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith(b'//'):
+            return False
+        if line.lstrip(b'/ ').startswith(b'GENERATED CODE'):
+            return True
+    return False
+
+
+def _glob_to_regex(glob: str) -> str:
+    """Translate a .gitignore glob into a regex over '/'-separated paths.
+
+    Args:
+        glob: The glob, without negation or trailing slash
+
+    Returns:
+        The regex source
+    """
+    parts = []
+    i = 0
+    while i < len(glob):
+        char = glob[i]
+        if glob.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+            continue
+        if glob.startswith('**', i):
+            parts.append('.*')
+            i += 2
+            continue
+        if char == '*':
+            parts.append('[^/]*')
+        elif char == '?':
+            parts.append('[^/]')
+        elif char == '[' and ']' in glob[i + 2:]:
+            end = glob.index(']', i + 2)
+            content = glob[i + 1:end]
+            if content.startswith('!'):
+                content = '^' + content[1:]
+            parts.append('[' + content.replace('\\', '\\\\') + ']')
+            i = end
+        elif char == '\\' and i + 1 < len(glob):
+            i += 1
+            parts.append(re.escape(glob[i]))
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return ''.join(parts)
+
+
+class GitIgnore:
+    """The rules of a single .gitignore file."""
+
+    def __init__(self, base: str, lines: List[str]):
+        """Parse the rules.
+
+        Args:
+            base: Directory holding the .gitignore file; rules match paths relative to it
+            lines: Lines of the .gitignore file
+        """
+        self.base = base
+        self.prefix = '' if base == os.curdir else os.path.join(base, '')
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []  # (regex, negated, directories only)
+        for line in lines:
+            line = line.rstrip('\n').rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negated = line.startswith('!')
+            if negated or line.startswith('\\!') or line.startswith('\\#'):
+                line = line[1:]
+            directories_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            # A slash anywhere but at the end anchors the pattern to the base directory
+            anchored = '/' in line
+            body = _glob_to_regex(line.lstrip('/'))
+            regex = re.compile(('' if anchored else '(?:.*/)?') + body + r'\Z')
+            self.rules.append((regex, negated, directories_only))
+
+    @classmethod
+    def load(cls, directory: str) -> Optional['GitIgnore']:
+        """Read the .gitignore file of a directory.
+
+        Args:
+            directory: The directory
+
+        Returns:
+            The parsed rules, or None if the directory has no readable .gitignore
+        """
+        try:
+            with open(os.path.join(directory, '.gitignore'), 'r', encoding='utf-8', errors='replace') as file:
+                return cls(directory, file.readlines())
+        except OSError:
+            return None
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """Check a path against the rules; the last matching rule wins.
+
+        Args:
+            path: Path of the file or directory
+            is_dir: Whether the path is a directory
+
+        Returns:
+            True if ignored, False if re-included, None if no rule matches
+        """
+        if path.startswith(self.prefix):
+            relative = path[len(self.prefix):]
+        else:
+            relative = os.path.relpath(path, self.base)
+            if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+                return None  # Rules only apply below the .gitignore file
+        relative = relative.replace(os.sep, '/')
+        ignored = None
+        for regex, negated, directories_only in self.rules:
+            if (is_dir or not directories_only) and regex.match(relative):
+                ignored = not negated
+        return ignored
+
+
+def _repository_root() -> str:
+    """Find the root of the work tree holding the working directory, or the working directory itself."""
+    current = os.getcwd()
+    while not os.path.exists(os.path.join(current, '.git')):
+        parent = os.path.dirname(current)
+        if parent == current:
+            return os.getcwd()
+        current = parent
+    return current
+
+
+class DartFileFinder:
+    """Lazily discovers the dart files to check.
+
+    Inside a git work tree the file list comes from `git ls-files`. Otherwise
+    the directories are walked with os.scandir, pruning directories that never
+    hold sources to check and honoring .gitignore files. Generated files and
+    paths matching an exclude glob are skipped either way.
+    """
+
+    # Tool output and caches, never descended into
+    PRUNED_DIRECTORIES = {'build', 'node_modules'}
+
+    # Platform folders are pruned when they sit next to a pubspec.yaml
+    PLATFORM_DIRECTORIES = {'android', 'ios', 'linux', 'macos', 'web', 'windows'}
+
+    GENERATED_SUFFIXES = ('.g.dart', '.freezed.dart')
+
+    def __init__(self, directories: List[str], excludes: Optional[List[str]] = None,
+                 use_git: bool = True, use_gitignore: bool = True, shard: Optional[Tuple[int, int]] = None):
+        """Initialize the finder.
+
+        Args:
+            directories: Directories to search
+            excludes: Globs of files and directories to skip, matched against the
+                path and, for globs without a slash, against the name
+            use_git: Whether to list files with `git ls-files` when possible
+            use_gitignore: Whether the directory walk honors .gitignore files
+            shard: (K, N) to only find the files of the K-th of N shards, counting from 1
+        """
+        self.directories = directories
+        self.excludes = [exclude.rstrip('/') for exclude in excludes or []]
+        self.use_git = use_git
+        self.use_gitignore = use_gitignore
+        self.shard = shard
+        self._shard_root: Optional[str] = None
+
+    def find(self) -> Iterator[Path]:
+        """Yield the dart files to check, as they are found.
+
+        Yields:
+            Paths of dart files
+        """
+        if self.use_git and self.directories:
+            try:
+                paths = self.git_files()
+            except (OSError, subprocess.CalledProcessError):
+                pass  # Not a git work tree, or no git at all
+            else:
+                yield from self.filter_paths(paths)
+                return
+
+        for directory in self.directories:
+            for path in self.walk(directory):
+                if self.in_shard(str(path)):
+                    yield path
+
+    def in_shard(self, path: str) -> bool:
+        """Check whether a file belongs to the shard being found.
+
+        Files are assigned by a stable hash of their path relative to the
+        repository root, so every runner agrees on the assignment, whatever
+        directory layout or discovery method it ends up using.
+
+        Args:
+            path: Path of the file
+
+        Returns:
+            True if the file is in the shard, or no shard is set
+        """
+        if self.shard is None:
+            return True
+        index, count = self.shard
+        if self._shard_root is None:
+            self._shard_root = _repository_root()
+        key = os.path.relpath(os.path.abspath(path), self._shard_root).replace(os.sep, '/')
+        digest = hashlib.sha1(key.encode('utf-8', 'surrogateescape')).digest()
+        return int.from_bytes(digest[:8], 'big') % count == index - 1
+
+    def git_files(self) -> List[str]:
+        """List the tracked and untracked, not ignored, files of the directories.
+
+        Returns:
+            Sorted paths relative to the working directory
+
+        Raises:
+            subprocess.CalledProcessError: If git fails, e.g. outside a work tree
+        """
+        result = subprocess.run(['git', 'ls-files', '-z', '--cached', '--others', '--exclude-standard',
+                                 '--', *self.directories],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        # Unmerged files are listed once per stage, and untracked files after tracked ones
+        return sorted({path for path in result.stdout.decode('utf-8', 'surrogateescape').split('\0') if path})
+
+    def changed_paths(self) -> Set[str]:
+        """List the files of the directories that differ from HEAD or are untracked, if git is used.
+
+        Returns:
+            Normalized paths relative to the working directory; empty outside a
+            git work tree
+        """
+        if not self.use_git or not self.directories:
+            return set()
+        output = b''
+        for args in (['diff', 'HEAD', '--name-only', '-z', '--relative'],
+                     ['ls-files', '-z', '--others', '--exclude-standard']):
+            try:
+                output += subprocess.run(['git', *args, '--', *self.directories], stdout=subprocess.PIPE,
+                                         stderr=subprocess.PIPE, check=True).stdout + b'\0'
+            except (OSError, subprocess.CalledProcessError):
+                pass  # Not a git work tree, or no commit yet
+        return {os.path.normpath(path) for path in output.decode('utf-8', 'surrogateescape').split('\0') if path}
+
+    def filter_paths(self, paths: List[str], existing_only: bool = True) -> Iterator[Path]:
+        """Apply the file and directory exclusions to an existing list of paths.
+
+        Args:
+            paths: Paths to filter
+            existing_only: Whether to drop paths that are not files in the work tree
+
+        Yields:
+            The paths of existing dart files that are not excluded
+        """
+        excluded_directories: Dict[str, bool] = {}
+
+        def is_excluded_directory(directory: str) -> bool:
+            if directory not in excluded_directories:
+                parent = os.path.dirname(directory)
+                package_root = os.path.isfile(os.path.join(parent, PUBSPEC_FILE))
+                excluded_directories[directory] = (
+                    parent not in ('', directory) and is_excluded_directory(parent)
+                    or self.is_excluded(directory, os.path.basename(directory), True, package_root)
+                )
+            return excluded_directories[directory]
+
+        for path in paths:
+            directory = os.path.dirname(path)
+            if self.is_excluded(path, os.path.basename(path), False):
+                continue
+            if directory and is_excluded_directory(directory):
+                continue
+            if not self.in_shard(path):
+                continue
+            if not existing_only or os.path.isfile(path):  # Tracked files can be deleted in the work tree
+                yield Path(path)
+
+    def walk(self, directory: str) -> Iterator[Path]:
+        """Walk a directory tree, pruning excluded directories before descending.
+
+        Args:
+            directory: Root of the walk
+
+        Yields:
+            Paths of dart files, directory by directory in name order
+        """
+        for _, dart_files in self.walk_directories(directory):
+            yield from dart_files
+
+    def walk_directories(self, directory: str) -> Iterator[Tuple[str, List[Path]]]:
+        """Walk a directory tree, pruning excluded directories before descending.
+
+        Args:
+            directory: Root of the walk
+
+        Yields:
+            (directory, dart files directly in it) for every directory walked, in name order
+        """
+        # .gitignore files only have a meaning inside a work tree
+        ignores = self.parent_ignores(directory) if self.use_gitignore else None
+        stack = [(directory, ignores)]
+        while stack:
+            path, ignores = stack.pop()
+            try:
+                with os.scandir(path) as iterator:
+                    entries = sorted(iterator, key=lambda entry: entry.name)
+            except OSError:
+                continue
+
+            names = {entry.name for entry in entries}
+            package_root = PUBSPEC_FILE in names
+            if ignores is not None and '.gitignore' in names:
+                ignore = GitIgnore.load(path)
+                if ignore is not None:
+                    ignores = ignores + [ignore]
+            dart_files = []
+            subdirectories = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+                if self.is_excluded(entry.path, entry.name, is_dir, package_root, ignores or []):
+                    continue
+                if not is_dir:
+                    dart_files.append(Path(entry.path))
+                elif not entry.is_symlink():  # Like os.walk, don't follow directory links
+                    subdirectories.append(entry.path)
+
+            yield path, dart_files
+            stack.extend((subdirectory, ignores) for subdirectory in reversed(subdirectories))
+
+    def accepts(self, path: str) -> bool:
+        """Check whether a single file, e.g. one reported by a file watcher, is checked.
+
+        Args:
+            path: Path of the file
+
+        Returns:
+            True if discovery would have yielded the file
+        """
+        if next(self.filter_paths([path], existing_only=False), None) is None:
+            return False
+        if not self.use_gitignore:
+            return True
+
+        directory = os.path.dirname(path) or os.curdir
+        ignores = self.parent_ignores(directory)
+        if ignores is None:
+            return True
+        ignore = GitIgnore.load(directory)
+        if ignore is not None:
+            ignores.append(ignore)
+
+        # A directory ignored anywhere above the file ignores the file too
+        current = os.path.abspath(path)
+        is_dir = False
+        while True:
+            ignored = None
+            for ignore in ignores:
+                matched = ignore.match(current, is_dir)
+                if matched is not None:
+                    ignored = matched
+            if ignored:
+                return False
+            parent = os.path.dirname(current)
+            if parent == current or os.path.exists(os.path.join(parent, '.git')):
+                return True
+            current = parent
+            is_dir = True
+
+    def parent_ignores(self, directory: str) -> Optional[List[GitIgnore]]:
+        """Load the .gitignore files that apply to a directory from above it.
+
+        Args:
+            directory: The directory
+
+        Returns:
+            The rules from the work tree root down to the directory's parent, or
+            None if the directory is not inside a work tree
+        """
+        ignores = []
+        current = os.path.abspath(directory)
+        while True:
+            if os.path.exists(os.path.join(current, '.git')):
+                return ignores
+            parent = os.path.dirname(current)
+            if parent == current:
+                return None
+            # Keep relative walks relative, so rules match paths by prefix
+            ignore = GitIgnore.load(parent if os.path.isabs(directory) else os.path.relpath(parent))
+            if ignore is not None:
+                ignores.insert(0, ignore)
+            current = parent
+
+    def is_excluded(self, path: str, name: str, is_dir: bool, package_root: bool = False,
+                    ignores: Optional[List[GitIgnore]] = None) -> bool:
+        """Check whether a file or directory is skipped.
+
+        Args:
+            path: Path of the file or directory
+            name: Its name
+            is_dir: Whether it is a directory
+            package_root: Whether its parent directory holds a pubspec.yaml
+            ignores: .gitignore rules that apply, outermost first
+
+        Returns:
+            True if the file or directory is skipped
+        """
+        if is_dir:
+            if name.startswith('.') and name not in ('.', '..') or name in self.PRUNED_DIRECTORIES:
+                return True
+            if package_root and name in self.PLATFORM_DIRECTORIES:
+                return True
+        elif not name.endswith('.dart') or name.endswith(self.GENERATED_SUFFIXES):
+            return True
+
+        if self.excludes:
+            normalized = os.path.normpath(path).replace(os.sep, '/')
+            for exclude in self.excludes:
+                if fnmatch.fnmatchcase(normalized, exclude) or (
+                        '/' not in exclude and fnmatch.fnmatchcase(name, exclude)):
+                    return True
+
+        ignored = None
+        for ignore in ignores or []:
+            matched = ignore.match(path, is_dir)
+            if matched is not None:
+                ignored = matched
+        return bool(ignored)
+
+
+class DartPackage:
+    """A Dart package of the repository, found by its pubspec.yaml."""
+
+    __slots__ = ('root', 'name')
+
+    def __init__(self, root: str, name: str):
+        self.root = root
+        self.name = name
+
+    def rules(self, shared: List[Rule]) -> List[Rule]:
+        """Get the rules of the package: its own rule configuration if it has one, the shared rules otherwise.
+
+        Raises:
+            OSError: If the package's rule configuration can't be read
+            ValueError: If it is invalid
+        """
+        rules_file = os.path.join(self.root, PACKAGE_RULES_FILE)
+        return load_rules(rules_file) if os.path.isfile(rules_file) else shared
+
+    def __repr__(self) -> str:
+        return f"DartPackage({self.root!r}, {self.name!r})"
+
+
+class PackageIndex:
+    """Finds the Dart packages of a repository, and the package holding a file.
+
+    Every pubspec.yaml is read once for the package name, and the package root
+    of every directory looked up is remembered, so resolving the package of
+    each fixed file costs a dictionary lookup. Safe to use from several threads.
+    """
+
+    NAME_PATTERN = re.compile(r'''^name:\s*['"]?([A-Za-z_]\w*)['"]?\s*(?:#.*)?$''', re.MULTILINE)
+
+    def __init__(self):
+        self._names: Dict[str, Optional[str]] = {}  # Package name by package root
+        self._roots: Dict[str, Optional[str]] = {}  # Package root by absolute directory
+        self._lock = threading.Lock()
+
+    def name(self, root: str) -> Optional[str]:
+        """Get the name of the package at a root directory.
+
+        Args:
+            root: Directory holding a pubspec.yaml
+
+        Returns:
+            The package name, or None if there is no valid pubspec.yaml
+        """
+        key = os.path.abspath(root)
+        with self._lock:
+            if key in self._names:
+                return self._names[key]
+        try:
+            with open(os.path.join(key, PUBSPEC_FILE), 'r', encoding='utf-8', errors='replace') as file:
+                match = self.NAME_PATTERN.search(file.read())
+        except OSError:
+            match = None
+        name = match.group(1) if match else None
+        with self._lock:
+            self._names[key] = name
+        return name
+
+    def package_of(self, path: str) -> Optional[DartPackage]:
+        """Get the innermost package holding a file.
+
+        Args:
+            path: Path of the file
+
+        Returns:
+            The package, with an absolute root, or None if the file is in no package
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        visited = []
+        root = None
+        while True:
+            with self._lock:
+                if directory in self._roots:
+                    root = self._roots[directory]
+                    break
+            visited.append(directory)
+            if os.path.isfile(os.path.join(directory, PUBSPEC_FILE)) and self.name(directory):
+                root = directory
+                break
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
+        with self._lock:
+            for directory in visited:
+                self._roots[directory] = root
+        return DartPackage(root, self.name(root)) if root is not None else None
+
+    def discover(self, roots: List[str], excludes: Optional[List[str]] = None) -> List[DartPackage]:
+        """Find every package under some directories.
+
+        Directories are walked like DartFileFinder walks them, so excluded and
+        ignored directories, tool output and platform folders are skipped.
+
+        Args:
+            roots: Directories to search
+            excludes: Globs of directories to skip
+
+        Returns:
+            The packages, ordered by root
+        """
+        finder = DartFileFinder(roots, excludes, use_git=False)
+        packages: Dict[str, DartPackage] = {}
+        for root in roots:
+            for directory, _ in finder.walk_directories(root):
+                directory = os.path.normpath(directory)
+                if directory not in packages and os.path.isfile(os.path.join(directory, PUBSPEC_FILE)):
+                    name = self.name(directory)
+                    if name is not None:
+                        packages[directory] = DartPackage(directory, name)
+        return sorted(packages.values(), key=lambda package: package.root)
+
+
+# Package names and roots, shared by every checker of the process
+_package_index = PackageIndex()
+
+
+class ChangedFile:
+    """A dart file changed in git, with the lines added or modified in it."""
+    def __init__(self, path: str, blob: Optional[str] = None, added_lines: Optional[Set[int]] = None):
+        self.path = path
+        self.blob = blob  # Index blob holding the content, None to read the working tree
+        self.added_lines = added_lines  # None if every line is new
+
+    def is_added(self, line_number: int) -> bool:
+        """Check whether a line was added or modified."""
+        return self.added_lines is None or line_number in self.added_lines
+
+
+class GitChanges:
+    """Finds the dart files and lines changed in git, staged or since a ref."""
+
+    HUNK_HEADER = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@')
+    INDEX_LINE = re.compile(r'^index [0-9a-f]+\.\.([0-9a-f]+)')
+    # C-style escapes of quoted paths: an octal byte or an escaped character
+    QUOTED_CHAR = re.compile(rb'\\([0-7]{3}|.)', re.DOTALL)
+    ESCAPES = {b'a': b'\a', b'b': b'\b', b't': b'\t', b'n': b'\n', b'v': b'\v', b'f': b'\f', b'r': b'\r'}
+
+    def __init__(self, staged: bool = False, since: Optional[str] = None):
+        """Initialize the change finder.
+
+        Args:
+            staged: Compare the index against HEAD, reading contents from the index
+            since: Compare the working tree against this ref
+        """
+        if staged == (since is not None):
+            raise ValueError("Exactly one of staged or since must be given")
+        self.staged = staged
+        self.since = since
+
+    def describe(self) -> str:
+        """Describe which changes are checked."""
+        return "staged changes" if self.staged else f"changes since {self.since}"
+
+    def run_git(self, *args: str, input_data: Optional[bytes] = None) -> bytes:
+        """Run a git command and return its output.
+
+        Raises:
+            subprocess.CalledProcessError: If git fails
+        """
+        result = subprocess.run(['git', *args], input=input_data, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, check=True)
+        return result.stdout
+
+    def changed_files(self, directories: List[str]) -> List[ChangedFile]:
+        """Find the changed dart files in the given directories.
+
+        Args:
+            directories: Directories to restrict the diff to
+
+        Returns:
+            Changed files with their added line numbers, sorted by path
+        """
+        diff_target = ['--cached'] if self.staged else [self.since]
+        diff = self.run_git('-c', 'core.quotePath=false', 'diff', *diff_target, '--relative',
+                            '--no-color', '--no-ext-diff', '--full-index', '-U0',
+                            '--diff-filter=ACMR', '--', *directories)
+        files = self.parse_diff(diff.decode('utf-8', 'surrogateescape'))
+
+        if not self.staged:
+            # New files the ref has never seen are entirely added
+            untracked = self.run_git('ls-files', '--others', '--exclude-standard', '-z', '--', *directories)
+            for path in untracked.decode('utf-8', 'surrogateescape').split('\0'):
+                if path:
+                    files.append(ChangedFile(path))
+
+        return sorted((changed for changed in files if changed.path.endswith('.dart')),
+                      key=lambda changed: changed.path)
+
+    def parse_diff(self, diff: str) -> List[ChangedFile]:
+        """Parse a zero-context unified diff into changed files.
+
+        Args:
+            diff: Output of git diff -U0 --full-index
+
+        Returns:
+            Changed files with their added line numbers
+        """
+        files = []
+        blob = None
+        current = None
+        for line in diff.splitlines():
+            if line.startswith('diff --git '):
+                blob = None
+                current = None
+            elif line.startswith('index '):
+                index_match = self.INDEX_LINE.match(line)
+                blob = index_match.group(1) if index_match else None
+            elif line.startswith('+++ '):
+                path = self.unquote_path(line[4:])
+                path = path[2:] if path.startswith('b/') else path
+                current = ChangedFile(path, blob if self.staged else None, set())
+                files.append(current)
+            elif line.startswith('@@') and current is not None:
+                hunk = self.HUNK_HEADER.match(line)
+                if hunk:
+                    start = int(hunk.group(1))
+                    count = int(hunk.group(2)) if hunk.group(2) is not None else 1
+                    current.added_lines.update(range(start, start + count))
+        return files
+
+    @classmethod
+    def unquote_path(cls, path: str) -> str:
+        """Get a path as written in the header of a diff.
+
+        Git quotes paths holding quotes, backslashes or control characters,
+        even with core.quotePath=false, and ends paths holding spaces with a tab.
+
+        Args:
+            path: The path, decoded with surrogateescape
+
+        Returns:
+            The path
+        """
+        if not (len(path) >= 2 and path.startswith('"') and path.endswith('"')):
+            return path[:-1] if path.endswith('\t') else path
+        quoted = path[1:-1].encode('utf-8', 'surrogateescape')
+        return cls.QUOTED_CHAR.sub(
+            lambda escape: (bytes([int(escape.group(1), 8)]) if len(escape.group(1)) == 3
+                            else cls.ESCAPES.get(escape.group(1), escape.group(1))),
+            quoted).decode('utf-8', 'surrogateescape')
+
+    def read_contents(self, files: List[ChangedFile]) -> Dict[str, bytes]:
+        """Read the contents of changed files.
+
+        Staged files are read from the index in one git cat-file process, so
+        partially staged files are checked as they will be committed.
+
+        Args:
+            files: The changed files
+
+        Returns:
+            Mapping of path to file contents
+        """
+        contents = {}
+        blobs = [changed for changed in files if changed.blob]
+        if blobs:
+            output = self.run_git('cat-file', '--batch',
+                                  input_data=''.join(f"{changed.blob}\n" for changed in blobs).encode())
+            offset = 0
+            for changed in blobs:
+                header_end = output.index(b'\n', offset)
+                size = int(output[offset:header_end].split()[2])
+                contents[changed.path] = output[header_end + 1:header_end + 1 + size]
+                offset = header_end + 1 + size + 1
+
+        for changed in files:
+            if not changed.blob:
+                with open(changed.path, 'rb') as file:
+                    contents[changed.path] = file.read()
+        return contents
+
+
+class ReadAheadPipeline:
+    """Overlaps file reads with matching, for filesystems where reads are slow.
+
+    A discovery thread hands paths to a pool of reader threads through a
+    bounded queue, and the readers pass the loaded files back through another
+    one. The calling thread matches them in discovery order. At most `depth`
+    files are in flight between discovery and matching, so memory stays
+    capped whatever the size of the tree; discovery blocks until matching
+    catches up.
+    """
+
+    METRICS = ['discovery_stall_s', 'reader_idle_s', 'reader_busy_s', 'match_wait_s',
+               'read_queue_max', 'read_queue_mean', 'loaded_queue_max', 'loaded_queue_mean']
+
+    def __init__(self, load: Callable[[Path], Any], readers: int, depth: int):
+        """Initialize the pipeline.
+
+        Args:
+            load: Reads a file, called on the reader threads
+            readers: Number of reader threads
+            depth: Maximum number of files in flight
+        """
+        self.load = load
+        self.readers = max(1, readers)
+        self.depth = max(depth, self.readers)
+        self.metrics: Dict[str, float] = {metric: 0.0 for metric in self.METRICS}
+        self.lock = threading.Lock()
+
+    def add_metrics(self, **values: float) -> None:
+        """Add to the metrics from any stage."""
+        with self.lock:
+            for metric, value in values.items():
+                self.metrics[metric] += value
+
+    def run(self, paths: Iterable[Path]) -> Iterator[Tuple[Path, Any]]:
+        """Load files on the reader threads.
+
+        Args:
+            paths: Files to load, iterated on the discovery thread
+
+        Yields:
+            (path, loaded contents) in the order of paths; an exception raised by
+            load or by paths is raised here in its place
+        """
+        slots = threading.BoundedSemaphore(self.depth)
+        # Every queued file holds a slot, so only the end markers can exceed the depth
+        to_read: queue.Queue = queue.Queue(self.depth + self.readers)
+        loaded: queue.Queue = queue.Queue(self.depth + 1)
+        stop = threading.Event()
+
+        def discover() -> None:
+            count = 0
+            stalled = 0.0
+            end: Any = _END
+            try:
+                for path in paths:
+                    started = time.perf_counter()
+                    # Backpressure: wait for matching to finish a file
+                    while not slots.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    stalled += time.perf_counter() - started
+                    if stop.is_set():
+                        return
+                    to_read.put((count, path))
+                    count += 1
+            except Exception as e:
+                end = e
+            finally:
+                loaded.put((count, None, None, end))
+                for _ in range(self.readers):
+                    to_read.put(None)
+                self.add_metrics(discovery_stall_s=stalled)
+
+        def read() -> None:
+            idle = busy = 0.0
+            while True:
+                started = time.perf_counter()
+                item = to_read.get()
+                read_started = time.perf_counter()
+                idle += read_started - started
+                if item is None:
+                    break
+                index, path = item
+                contents, error = None, None
+                if not stop.is_set():
+                    try:
+                        contents = self.load(path)
+                    except Exception as e:
+                        error = e
+                busy += time.perf_counter() - read_started
+                loaded.put((index, path, contents, error))
+            self.add_metrics(reader_idle_s=idle, reader_busy_s=busy)
+
+        threads = [threading.Thread(target=discover, name='discovery', daemon=True)]
+        threads.extend(threading.Thread(target=read, name=f'reader-{i}', daemon=True) for i in range(self.readers))
+        for thread in threads:
+            thread.start()
+
+        # Files loaded ahead of the next one in order
+        ready: Dict[int, Tuple[Optional[Path], Any, Any]] = {}
+        waited = 0.0
+        samples = 0
+        read_depths = loaded_depths = 0
+        read_max = loaded_max = 0
+        try:
+            next_index = 0
+            while True:
+                while next_index not in ready:
+                    started = time.perf_counter()
+                    index, path, contents, error = loaded.get()
+                    waited += time.perf_counter() - started
+                    ready[index] = (path, contents, error)
+                read_depth, loaded_depth = to_read.qsize(), loaded.qsize() + len(ready)
+                samples += 1
+                read_depths += read_depth
+                loaded_depths += loaded_depth
+                read_max = max(read_max, read_depth)
+                loaded_max = max(loaded_max, loaded_depth)
+
+                path, contents, error = ready.pop(next_index)
+                next_index += 1
+                if path is None:
+                    # Discovery is done, or failed
+                    if error is not _END:
+                        raise error
+                    return
+                try:
+                    if error is not None:
+                        raise error
+                    yield path, contents
+                finally:
+                    slots.release()
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            self.add_metrics(match_wait_s=waited)
+            with self.lock:
+                self.metrics['read_queue_max'] = max(self.metrics['read_queue_max'], read_max)
+                self.metrics['loaded_queue_max'] = max(self.metrics['loaded_queue_max'], loaded_max)
+                if samples:
+                    self.metrics['read_queue_mean'] = read_depths / samples
+                    self.metrics['loaded_queue_mean'] = loaded_depths / samples
+
+
+class ScanStats:
+    """Phase timers, counters and the slowest files of a run, for --stats.
+
+    The checker only creates this when statistics are requested; otherwise
+    every instrumentation point is a single None check.
+    """
+
+    PHASES = ['discovery', 'cache', 'store', 'git', 'read', 'scan', 'fix']
+
+    COUNTERS = ['files_discovered', 'files_cached', 'files_scanned', 'files_decoded', 'bytes_read',
+                'violations', 'files_fixed', 'bytes_written']
+
+    def __init__(self, top: int = 10):
+        """Initialize empty statistics.
+
+        Args:
+            top: Number of slowest files to keep
+        """
+        self.top = top
+        self.wall: Dict[str, float] = {phase: 0.0 for phase in self.PHASES}
+        self.cpu: Dict[str, float] = {phase: 0.0 for phase in self.PHASES}
+        self.counters: Dict[str, int] = {counter: 0 for counter in self.COUNTERS}
+        self.slowest: List[Tuple[float, str]] = []  # Min-heap of (seconds, path)
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.total_wall = 0.0
+        self.total_cpu = 0.0
+        self.pipeline: Dict[str, float] = {}  # Queue depths and stalls of a pipelined scan
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the wall and CPU time of a block to a phase."""
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            yield
+        finally:
+            self.wall[name] += time.perf_counter() - started
+            self.cpu[name] += time.process_time() - cpu_started
+
+    def timed(self, name: str, iterator: Iterable) -> Iterator:
+        """Yield from an iterator, adding the time spent producing items to a phase."""
+        iterator = iter(iterator)
+        while True:
+            with self.phase(name):
+                item = next(iterator, _END)
+            if item is _END:
+                return
+            yield item
+
+    def add_file(self, result: 'FileScanResult') -> None:
+        """Account for a scanned file.
+
+        Args:
+            result: The scan result, with timings recorded by the scan
+        """
+        self.counters['files_scanned'] += 1
+        self.counters['bytes_read'] += result.size
+        self.counters['files_decoded'] += result.decoded
+        if result.timings is None:
+            return
+        read, scan, cpu = result.timings
+        self.wall['read'] += read
+        self.wall['scan'] += scan
+        self.cpu['scan'] += cpu  # CPU of reading and scanning, in whichever process did it
+        entry = (read + scan, result.file_path)
+        if len(self.slowest) < self.top:
+            heapq.heappush(self.slowest, entry)
+        elif self.top:
+            heapq.heappushpop(self.slowest, entry)
+
+    def finish(self) -> None:
+        """Record the total wall and CPU time of the run."""
+        self.total_wall = time.perf_counter() - self.started
+        self.total_cpu = time.process_time() - self.cpu_started
+
+    def to_dict(self) -> Dict:
+        """Get the statistics as a JSON-serializable dict."""
+        return {
+            'wall_s': self.total_wall,
+            'cpu_s': self.total_cpu,
+            'phases': {phase: {'wall_s': self.wall[phase], 'cpu_s': self.cpu[phase]} for phase in self.PHASES},
+            'counters': dict(self.counters),
+            'slowest_files': [{'file': path, 'seconds': seconds} for seconds, path in sorted(self.slowest, reverse=True)],
+            'pipeline': dict(self.pipeline),
+        }
+
+    def to_openmetrics(self) -> str:
+        """Get the statistics in the OpenMetrics text format."""
+        def label(value: str) -> str:
+            return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+        lines = ['# TYPE logging_check_wall_seconds gauge', f'logging_check_wall_seconds {self.total_wall}',
+                 '# TYPE logging_check_cpu_seconds gauge', f'logging_check_cpu_seconds {self.total_cpu}',
+                 '# TYPE logging_check_phase_wall_seconds gauge']
+        lines.extend(f'logging_check_phase_wall_seconds{{phase="{phase}"}} {self.wall[phase]}' for phase in self.PHASES)
+        lines.append('# TYPE logging_check_phase_cpu_seconds gauge')
+        lines.extend(f'logging_check_phase_cpu_seconds{{phase="{phase}"}} {self.cpu[phase]}' for phase in self.PHASES)
+        for counter in self.COUNTERS:
+            lines.append(f'# TYPE logging_check_{counter} gauge')
+            lines.append(f'logging_check_{counter} {self.counters[counter]}')
+        for metric, value in self.pipeline.items():
+            lines.append(f'# TYPE logging_check_pipeline_{metric} gauge')
+            lines.append(f'logging_check_pipeline_{metric} {value}')
+        lines.append('# TYPE logging_check_file_seconds gauge')
+        lines.extend(f'logging_check_file_seconds{{file="{label(path)}"}} {seconds}'
+                     for seconds, path in sorted(self.slowest, reverse=True))
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> List[str]:
+        """Get a human-readable summary, one line per entry."""
+        lines = [f"Total: {self.total_wall * 1000:.1f} ms wall, {self.total_cpu * 1000:.1f} ms CPU in this process"]
+        for phase in self.PHASES:
+            if self.wall[phase] or self.cpu[phase]:
+                lines.append(f"  {phase:<10} {self.wall[phase] * 1000:10.1f} ms wall {self.cpu[phase] * 1000:10.1f} ms CPU")
+        lines.append("  " + ", ".join(f"{counter.replace('_', ' ')}: {value}"
+                                      for counter, value in self.counters.items()))
+        if self.pipeline:
+            lines.append("  pipeline: " + ", ".join(f"{metric.replace('_', ' ')}: {value:g}"
+                                                    for metric, value in self.pipeline.items()))
+        if self.slowest:
+            lines.append("Slowest files:")
+            lines.extend(f"  {seconds * 1000:8.2f} ms  {path}" for seconds, path in sorted(self.slowest, reverse=True))
+        return lines
+
+    def write(self, path: str, file_format: str = 'json') -> None:
+        """Write the statistics to a file.
+
+        Args:
+            path: Output file
+            file_format: 'json' or 'openmetrics'
+        """
+        content = self.to_openmetrics() if file_format == 'openmetrics' else json.dumps(self.to_dict(), indent=2) + '\n'
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+
+
+class ViolationSummary:
+    """Counts of all violations of a run, including those past --max-violations."""
+
+    def __init__(self):
+        """Initialize empty counts."""
+        self.total = 0
+        self.reported = 0
+        self.errors = 0
+        self.by_file: Counter = Counter()
+        self.by_rule: Counter = Counter()
+        # Set for scans that may stop early
+        self.progress: Optional[ScanProgress] = None
+
+    def add(self, violation: LoggingViolation, reported: bool, error: bool = True) -> None:
+        """Count a violation, which fails the check if it is an error."""
+        self.total += 1
+        self.reported += reported
+        self.errors += error
+        self.by_file[violation.file_path] += 1
+        self.by_rule[violation.violation_type] += 1
+
+    @property
+    def truncated(self) -> bool:
+        """Whether some violations were counted but not reported."""
+        return self.reported < self.total
+
+    def to_dict(self) -> Dict:
+        """Get the counts as a JSON-serializable dict."""
+        return {
+            'total': self.total,
+            'reported': self.reported,
+            'errors': self.errors,
+            'by_rule': dict(self.by_rule.most_common()),
+            'by_file': dict(self.by_file.most_common()),
+            **(self.progress.to_dict() if self.progress is not None else {}),
+        }
+
+
+class ScanProgress:
+    """How far a scan that may stop early got through its files."""
+
+    __slots__ = ('files_total', 'files_checked', 'stopped')
+
+    def __init__(self):
+        self.files_total = 0
+        self.files_checked = 0
+        # 'fail-fast' or 'time-budget' when files were left unchecked
+        self.stopped: Optional[str] = None
+
+    @property
+    def complete(self) -> bool:
+        """Whether every file was checked."""
+        return self.stopped is None
+
+    def to_dict(self) -> Dict:
+        """Get the progress as a JSON-serializable dict."""
+        return {'complete': self.complete, 'stopped': self.stopped,
+                'files_checked': self.files_checked, 'files_total': self.files_total}
+
+
+class ViolationReporter:
+    """Writes violations to a stream as they are found, in the plain text format."""
+
+    def __init__(self, checker: 'LoggingChecker', stream=None):
+        """Initialize the reporter.
+
+        Args:
+            checker: The checker, for its mode and message helpers
+            stream: Output stream, stdout by default
+        """
+        self.checker = checker
+        self.stream = stream or sys.stdout
+
+    def write(self, text: str) -> None:
+        """Write a line to the stream."""
+        self.stream.write(text + '\n')
+
+    def rule(self, violation: LoggingViolation) -> Rule:
+        """Get the rule a violation breaks."""
+        rule = self.checker.violation_rule(violation)
+        return rule if rule is not None else Rule(violation.violation_type, re.escape(violation.violation_type))
+
+    def describe(self, violation: LoggingViolation) -> str:
+        """Format a violation as a line of text, marking warnings."""
+        if self.rule(violation).severity == 'warning':
+            return f"{violation} (warning)"
+        return str(violation)
+
+    def start(self) -> None:
+        """Write whatever precedes the first violation."""
+
+    def violation(self, violation: LoggingViolation, first: bool) -> None:
+        """Write a violation.
+
+        Args:
+            violation: The violation
+            first: Whether it is the first one reported
+        """
+        if self.checker.mode == Mode.CI:
+            if first:
+                self.checker.print_error("Found prohibited logging methods. Please use AppLogger.d() or AppLogger.e() instead:")
+            self.write(self.describe(violation))
+        else:
+            if first:
+                self.checker.print_error("Found prohibited logging methods.")
+                self.write("Offending lines:")
+            self.write(f"  {self.describe(violation)}")
+
+    def finish(self, summary: ViolationSummary) -> None:
+        """Write whatever follows the last violation."""
+        if not summary.truncated:
+            return
+        self.checker.print_info(f"{summary.total - summary.reported} more violations not shown "
+                                f"({summary.total} in total)")
+        self.write("Violations per rule: " + ", ".join(f"{rule}: {count}" for rule, count in summary.by_rule.most_common()))
+        self.write("Violations per file:")
+        for file_path, count in summary.by_file.most_common():
+            self.write(f"  {count:6d}  {file_path}")
+
+
+class JsonReporter(ViolationReporter):
+    """Writes a single JSON document, streaming the violations array."""
+
+    def start(self) -> None:
+        self.stream.write('{"violations": [')
+
+    def violation(self, violation: LoggingViolation, first: bool) -> None:
+        self.stream.write(('\n  ' if first else ',\n  ') + json.dumps(violation.to_dict()))
+
+    def finish(self, summary: ViolationSummary) -> None:
+        # Shard results record their shard, so merging can check that none is missing
+        shard = self.checker.shard or (1, 1)
+        packages = self.checker.package_summaries()
+        self.write(('\n' if summary.reported else '') + '], "summary": ' + json.dumps(summary.to_dict())
+                   + ', "shard": ' + json.dumps({'index': shard[0], 'count': shard[1]})
+                   + (', "packages": ' + json.dumps(packages) if packages is not None else '') + '}')
+
+
+class JsonLinesReporter(ViolationReporter):
+    """Writes one JSON object per violation, followed by a summary object."""
+
+    def violation(self, violation: LoggingViolation, first: bool) -> None:
+        self.write(json.dumps(violation.to_dict()))
+
+    def finish(self, summary: ViolationSummary) -> None:
+        self.write(json.dumps({'summary': summary.to_dict()}))
+
+
+class SarifReporter(ViolationReporter):
+    """Writes a SARIF 2.1.0 log, as accepted by code scanning upload."""
+
+    def start(self) -> None:
+        rules = [{
+            'id': rule.rule_id,
+            'shortDescription': {'text': rule.message},
+            'defaultConfiguration': {'level': rule.severity},
+        } for rule in self.checker.rules]
+        tool = {'driver': {'name': 'check_logging_standards', 'version': CHECKER_VERSION, 'rules': rules}}
+        # Leave the run open, so results can follow one by one
+        self.stream.write('{"$schema": "https://json.schemastore.org/sarif-2.1.0.json", "version": "2.1.0", '
+                          '"runs": [{"tool": ' + json.dumps(tool) + ', "results": [')
+
+    def violation(self, violation: LoggingViolation, first: bool) -> None:
+        path = Path(violation.file_path)
+        rule = self.rule(violation)
+        location = {'uri': path.as_uri()} if path.is_absolute() else {'uri': path.as_posix(), 'uriBaseId': '%SRCROOT%'}
+        result = {
+            'ruleId': violation.violation_type,
+            'level': rule.severity,
+            'message': {'text': rule.message},
+            'locations': [{'physicalLocation': {
+                'artifactLocation': location,
+                'region': {'startLine': violation.line_number, 'snippet': {'text': violation.line_content}},
+            }}],
+        }
+        self.stream.write(('\n' if first else ',\n') + json.dumps(result))
+
+    def finish(self, summary: ViolationSummary) -> None:
+        self.write('], "properties": {"summary": ' + json.dumps(summary.to_dict()) + '}}]}')
+
+
+class GithubReporter(ViolationReporter):
+    """Writes GitHub Actions workflow commands, which annotate the lines in pull requests."""
+
+    @staticmethod
+    def escape(value: str, is_property: bool = False) -> str:
+        """Escape a workflow command message or property value."""
+        value = value.replace('%', '%25').replace('\r', '%0D').replace('\n', '%0A')
+        if is_property:
+            value = value.replace(':', '%3A').replace(',', '%2C')
+        return value
+
+    def violation(self, violation: LoggingViolation, first: bool) -> None:
+        rule = self.rule(violation)
+        self.write(f"::{rule.severity} file={self.escape(violation.file_path, True)},line={violation.line_number},"
+                   f"title={self.escape('Prohibited ' + violation.violation_type + '()', True)}::"
+                   f"{self.escape(rule.message + ': ' + violation.line_content)}")
+
+    def finish(self, summary: ViolationSummary) -> None:
+        if summary.truncated:
+            self.write(f"::warning::{summary.total - summary.reported} more logging violations not annotated "
+                       f"({summary.total} in total)")
+
+
+# Reporter class of each --format
+REPORTERS = {
+    'text': ViolationReporter,
+    'json': JsonReporter,
+    'jsonl': JsonLinesReporter,
+    'sarif': SarifReporter,
+    'github': GithubReporter,
+}
+
+
+class ViolationIndex:
+    """In-memory map from each file to its violations, used by watch mode.
+
+    Updates report which violations were introduced or resolved. Violations are
+    compared by type and line content, so lines that only moved are neither.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self.files: Dict[str, List[LoggingViolation]] = {}
+
+    @staticmethod
+    def key(file_path: str) -> str:
+        """Normalize a path, so watcher events and discovery agree on it."""
+        return os.path.abspath(file_path)
+
+    def update(self, file_path: str,
+               violations: Optional[List[LoggingViolation]]) -> Tuple[List[LoggingViolation], List[LoggingViolation]]:
+        """Replace the violations of a file.
+
+        Args:
+            file_path: Path to the file
+            violations: The file's current violations, or None if it was removed
+
+        Returns:
+            (introduced, resolved) violations
+        """
+        key = self.key(file_path)
+        old = self.files.pop(key, [])
+        new = violations or []
+        if violations is not None:
+            self.files[key] = violations
+
+        _, introduced, resolved = _match_violations(new, ((v.violation_type, v.line_content, v) for v in old))
+        return introduced, resolved
+
+    def paths_under(self, directory: str) -> List[str]:
+        """Get the indexed files inside a directory, e.g. one that was removed."""
+        prefix = os.path.join(self.key(directory), '')
+        return [key for key in self.files if key.startswith(prefix)]
+
+    def violation_count(self) -> int:
+        """Count the violations of all files."""
+        return sum(len(violations) for violations in self.files.values())
+
+
+class PollingWatcher:
+    """Reports changed files by comparing stat snapshots of the discovered files."""
+
+    def __init__(self, finder: DartFileFinder):
+        """Take the first snapshot.
+
+        Args:
+            finder: Discovers the files to watch
+        """
+        self.finder = finder
+        self.snapshot = self.take_snapshot()
+
+    def take_snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """Get the (mtime_ns, size) of every discovered file."""
+        snapshot = {}
+        for file_path in self.finder.find():
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            snapshot[str(file_path)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout: float) -> Optional[Set[str]]:
+        """Wait, then report the files created, modified or deleted since the last poll.
+
+        Args:
+            timeout: Seconds to wait before looking
+
+        Returns:
+            Paths of the changed files
+        """
+        time.sleep(timeout)
+        snapshot = self.take_snapshot()
+        changed = {path for path, state in snapshot.items() if self.snapshot.get(path) != state}
+        changed.update(path for path in self.snapshot if path not in snapshot)
+        self.snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        """Release the watcher's resources."""
+
+
+class InotifyWatcher:
+    """Reports changed paths under the watched directories using Linux inotify."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_CLOEXEC = 0o2000000
+    IN_NONBLOCK = 0o4000
+
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    # struct inotify_event, followed by a NUL-padded name
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, finder: DartFileFinder, directories: List[str]):
+        """Watch every directory the finder would walk.
+
+        Args:
+            finder: Decides which directories are watched
+            directories: Roots of the watched trees
+
+        Raises:
+            OSError: If inotify is unavailable or runs out of watches
+        """
+        try:
+            self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            init = self.libc.inotify_init1
+        except (OSError, AttributeError) as e:
+            raise OSError(f"inotify is not available: {e}") from e
+
+        self.finder = finder
+        self.fd = init(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_init1: {os.strerror(error)}")
+        self.watches: Dict[int, str] = {}
+        try:
+            for directory in directories:
+                self.add_tree(directory)
+        except OSError:
+            self.close()
+            raise
+
+    def add_tree(self, directory: str) -> List[str]:
+        """Watch a directory tree.
+
+        Args:
+            directory: Root of the tree
+
+        Returns:
+            The dart files in the tree, which are all new to the caller
+        """
+        dart_files = []
+        for path, files in self.finder.walk_directories(directory):
+            watch = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+            if watch < 0:
+                error = ctypes.get_errno()
+                raise OSError(error, f"inotify_add_watch: {os.strerror(error)}", path)
+            self.watches[watch] = path
+            dart_files.extend(str(file_path) for file_path in files)
+        return dart_files
+
+    def poll(self, timeout: float) -> Optional[Set[str]]:
+        """Wait up to timeout seconds for events and report the changed paths.
+
+        Args:
+            timeout: Seconds to wait for the first event
+
+        Returns:
+            Paths of changed files and removed directories, or None if the kernel
+            dropped events and everything has to be rescanned
+        """
+        changed: Set[str] = set()
+        overflow = False
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        while ready:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                watch, mask, _, length = self.EVENT.unpack_from(data, offset)
+                name = os.fsdecode(data[offset + self.EVENT.size:offset + self.EVENT.size + length].rstrip(b'\0'))
+                offset += self.EVENT.size + length
+
+                if mask & self.IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                directory = self.watches.get(watch)
+                if directory is None:
+                    continue
+                if mask & self.IN_IGNORED:
+                    del self.watches[watch]
+                    continue
+                path = os.path.join(directory, name)
+                if not mask & self.IN_ISDIR:
+                    changed.add(path)
+                elif mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    if not self.finder.is_excluded(path, name, True):
+                        changed.update(self.add_tree(path))
+                elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                    changed.add(path)
+        return None if overflow else changed
+
+    def close(self) -> None:
+        """Release the watcher's resources."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class LoggingChecker:
+    """Main class for checking prohibited logging methods."""
+
+    # Patterns to identify prohibited logging methods
+    PROHIBITED_PATTERNS = [
+        (r'(?<!\w)debugPrint\(', 'debugPrint'),
+        (r'(?<!\w)log\(', 'log')
+    ]
+
+    # How the default rules are resolved and fixed, by rule id
+    DEFAULT_FIXES = {
+        'debugPrint': {'fix': 'AppLogger.d(', 'fix_import': APP_LOGGER_PACKAGE_TEMPLATE,
+                       'symbol': 'debugPrint', 'libraries': DEBUG_PRINT_LIBRARIES},
+        'log': {'fix': 'AppLogger.d(', 'drop_arguments': ['name'], 'fix_import': APP_LOGGER_PACKAGE_TEMPLATE,
+                'symbol': 'log', 'libraries': LOG_LIBRARIES},
+    }
+
+    # Below this many files a process pool costs more than it saves
+    PARALLEL_MIN_FILES = 64
+
+    # Files handed to a worker process at a time
+    PARALLEL_CHUNK_SIZE = 32
+
+    # Pipelined mode: most files read ahead of matching; files of MMAP_MIN_SIZE
+    # and more are mapped, so this also caps the memory holding file contents
+    PIPELINE_DEPTH = 64
+
+    # Streamed files: characters new to each window, and characters of context
+    # repeated on either side; matches, the code before a call on its line and
+    # declaration lines longer than the context may be missed
+    STREAM_WINDOW = 1 << 20
+    STREAM_OVERLAP = 1 << 12
+
+    # Watch mode: seconds between polls without inotify, of quiet that ends a
+    # burst of events, and at most spent collecting one burst
+    WATCH_POLL_INTERVAL = 1.0
+    WATCH_DEBOUNCE = 0.2
+    WATCH_MAX_DELAY = 2.0
+
+    def __init__(self, directories: List[str], mode: Mode = Mode.LOCAL, auto_fix: bool = False,
+                 jobs: int = 1, cache_file: Optional[str] = None,
+                 git_changes: Optional[GitChanges] = None, all_lines: bool = False,
+                 excludes: Optional[List[str]] = None, use_git: bool = True,
+                 stats: Optional[ScanStats] = None, output_format: str = 'text',
+                 max_violations: Optional[int] = None, rules: Optional[List[Rule]] = None,
+                 emit_patch: Optional[str] = None, patch_format: str = 'diff',
+                 shard: Optional[Tuple[int, int]] = None, readers: int = 0,
+                 package: Optional[str] = None, package_root: Optional[str] = None,
+                 fail_fast: bool = False, time_budget: Optional[float] = None,
+                 store: Optional[Any] = None, context_width: int = DEFAULT_CONTEXT_WIDTH,
+                 stream_min_size: int = STREAM_MIN_SIZE):
+        """Initialize the checker.
+
+        Args:
+            directories: List of directories to scan
+            mode: Operation mode (local or ci)
+            auto_fix: Whether to automatically fix violations
+            jobs: Number of worker processes used for scanning
+            cache_file: Location of the persistent scan cache, or None to disable it
+            git_changes: Only scan the files changed in git, or None to scan everything
+            all_lines: With git_changes, report violations on unchanged lines too
+            excludes: Globs of files and directories to skip
+            use_git: Whether file discovery may use `git ls-files`
+            stats: Collects timings and counters of the run, or None to skip instrumentation
+            output_format: How violations are reported, a key of REPORTERS; with
+                anything but 'text', messages go to stderr
+            max_violations: Report at most this many violations, only counting the rest
+            rules: The rules to check, or None for the default rules
+            emit_patch: Write the fixes as a patch to this file, or '-' for stdout,
+                instead of applying them; everything else then goes to stderr
+            patch_format: 'diff' for a unified diff, 'json' for a list of line edits
+            shard: (K, N) to only check the files of the K-th of N shards, counting from 1
+            readers: Read files on this many threads ahead of a single matching
+                stage instead of using worker processes; 0 to read while matching
+            package: Name of the package whose AppLogger fixes import, or None for
+                the package holding each fixed file, found by its pubspec.yaml
+            package_root: Directory the globs of scoped rules are relative to, the
+                working directory by default
+            fail_fast: Stop at the first file with an error violation
+            time_budget: Stop once this many seconds have passed, or None to check every file
+            store: ViolationStore of store_logging_standards.py recording every
+                scan of the directories, or None
+            context_width: Longest line content kept in a violation; longer lines
+                are cut to this many characters around the call
+            stream_min_size: Files of at least this many bytes are scanned window
+                by window in bounded memory
+        """
+        self.directories = directories
+        self.mode = mode
+        self.auto_fix = auto_fix and mode == Mode.LOCAL  # Only allow auto-fix in local mode
+        self.jobs = max(1, jobs)
+        self.readers = readers
+        self.git_changes = git_changes
+        self.all_lines = all_lines
+        self.violations: List[LoggingViolation] = []
+        self.rules = rules if rules is not None else self.default_rules()
+        self.rules_by_id = {rule.rule_id: rule for rule in self.rules}
+        self.scoped_rules = {rule.rule_id: rule for rule in self.rules if rule.scoped}
+        # Rules only reported where their symbol resolves to one of their libraries
+        self.import_rules = [rule for rule in self.rules if rule.libraries]
+        # Every rule is compiled into one matcher, so a single pass checks them all
+        self.matcher = PatternMatcher([(rule.pattern, rule.rule_id) for rule in self.rules])
+        self.shard = shard
+        self.finder = DartFileFinder(directories, excludes, use_git=use_git, shard=shard)
+        self.stats = stats
+        self.collect_timings = stats is not None  # Also seen by scan worker processes
+        self.output_format = output_format
+        self.max_violations = max_violations
+        self.emit_patch = emit_patch
+        self.patch_format = patch_format
+        self.package = package
+        self.package_root = package_root
+        self.fail_fast = fail_fast
+        self.time_budget = time_budget
+        self.context_width = context_width
+        self.stream_min_size = stream_min_size
+        # How far the last scan got, if it may stop early
+        self.progress: Optional[ScanProgress] = None
+        self.cache: Optional[ScanCache] = None
+        if cache_file:
+            self.cache = ScanCache(cache_file, self.cache_fingerprint())
+            self.cache.load()
+        self.store = store
+
+    @classmethod
+    def default_rules(cls) -> List[Rule]:
+        """Get the rules used without a rule configuration."""
+        return [Rule(rule_id, pattern, **cls.DEFAULT_FIXES.get(rule_id, {}))
+                for pattern, rule_id in cls.PROHIBITED_PATTERNS]
+
+    def package_summaries(self) -> Optional[List[Dict]]:
+        """Get the counts and timing of every package checked, None if not checking a monorepo."""
+        return None
+
+    def violation_rule(self, violation: LoggingViolation) -> Optional[Rule]:
+        """Get the rule a violation breaks, None for a rule this checker doesn't know."""
+        return self.rules_by_id.get(violation.violation_type)
+
+    def __getstate__(self) -> Dict:
+        """Get the state sent to scan worker processes, leaving out the cache."""
+        state = self.__dict__.copy()
+        state['cache'] = None
+        state['store'] = None
+        state['stats'] = None
+        state['violations'] = []
+        return state
+
+    def cache_fingerprint(self) -> str:
+        """Fingerprint everything that affects scan results.
+
+        The checker's own source is included, so any change to the scanning
+        code invalidates old cache entries even without a CHECKER_VERSION bump.
+
+        Returns:
+            Hex digest identifying the rules and checker version
+        """
+        with open(__file__, 'rb') as file:
+            source = file.read()
+        rules = json.dumps({'version': CHECKER_VERSION, 'rules': [rule.to_dict() for rule in self.rules],
+                            'context_width': self.context_width})
+        return hashlib.sha256(rules.encode('utf-8') + source).hexdigest()
+
+    @property
+    def message_stream(self):
+        """Stream for messages, kept off stdout when it carries machine-readable output."""
+        return sys.stdout if self.output_format == 'text' and self.emit_patch != '-' else sys.stderr
+
+    def print_success(self, message: str) -> None:
+        """Print a success message."""
+        if self.mode == Mode.LOCAL:
+            print(f"{Colors.GREEN}✓ {message}{Colors.NC}", file=self.message_stream)
+        else:
+            print(message, file=self.message_stream)
+
+    def print_error(self, message: str) -> None:
+        """Print an error message."""
+        if self.mode == Mode.LOCAL:
+            print(f"{Colors.RED}✗ {message}{Colors.NC}", file=self.message_stream)
+        else:
+            print(f"::error::{message}", file=self.message_stream)
+
+    def print_info(self, message: str) -> None:
+        """Print an info message."""
+        if self.mode == Mode.LOCAL:
+            print(f"{Colors.YELLOW}➤ {message}{Colors.NC}", file=self.message_stream)
+        else:
+            print(message, file=self.message_stream)
+
+    def find_dart_files(self) -> Iterator[Path]:
+        """Find the dart files to check in the specified directories.
+
+        Returns:
+            Iterator over the dart file paths, yielding them as they are found
+        """
+        return self.finder.find()
+
+    def is_line_commented(self, line: str) -> bool:
+        """Check if a line is commented out.
+
+        A line is commented out if it holds a comment and nothing else. Scans
+        lex whole files instead, which also covers lines inside block comments.
+
+        Args:
+            line: The line to check
+
+        Returns:
+            True if the line is commented out, False otherwise
+        """
+        has_comment = False
+        for start, end, kind in DartLexer.regions(line):
+            if kind == DartLexer.COMMENT:
+                has_comment = True
+            elif line[start:end].strip():
+                return False
+        return has_comment
+
+    def find_violations(self) -> List[LoggingViolation]:
+        """Find logging violations in dart files.
+
+        Returns:
+            List of violations
+        """
+        return list(self.iter_violations())
+
+    def iter_violations(self) -> Iterator[LoggingViolation]:
+        """Find logging violations in dart files, yielding them as files are scanned.
+
+        With fail_fast or a time_budget, the files most likely to hold a
+        violation are scanned first, see prioritized_files, and the scan stops
+        as soon as either is reached; self.progress then tells whether every
+        file was checked.
+
+        Yields:
+            Violations, file by file in discovery order, or in priority order
+            when the scan may stop early
+        """
+        if not self.fail_fast and self.time_budget is None:
+            self.progress = None
+            if self.git_changes is not None:
+                yield from self.iter_changed_violations()
+                return
+            for _, file_violations in self.iter_violations_by_file():
+                yield from file_violations
+            return
+
+        started = time.monotonic()
+        self.progress = ScanProgress()
+        if self.git_changes is not None:
+            by_file = self.iter_changed_violations_by_file()
+        else:
+            dart_files = self.prioritized_files()
+            self.progress.files_total = len(dart_files)
+            by_file = self.iter_violations_by_file(dart_files)
+        try:
+            for _, file_violations in by_file:
+                self.progress.files_checked += 1
+                yield from file_violations
+                if self.progress.files_checked >= self.progress.files_total:
+                    continue
+                if self.fail_fast and any(self.is_error(violation) for violation in file_violations):
+                    self.progress.stopped = 'fail-fast'
+                    break
+                if self.time_budget is not None and time.monotonic() - started >= self.time_budget:
+                    self.progress.stopped = 'time-budget'
+                    break
+        finally:
+            # Cancels the files still being read or scanned
+            by_file.close()
+
+    def is_error(self, violation: LoggingViolation) -> bool:
+        """Check whether a violation fails the check."""
+        rule = self.violation_rule(violation)
+        return rule is None or rule.severity == 'error'
+
+    def prioritized_files(self) -> List[Path]:
+        """Find the dart files to check, those most likely to hold a violation first.
+
+        Files changed in git come first, then the files the cache holds
+        violations of, and each group newest first by mtime. Discovery has to
+        finish before scanning starts.
+
+        Returns:
+            Paths of dart files
+        """
+        with self.stats.phase('discovery') if self.stats is not None else nullcontext():
+            changed = self.finder.changed_paths()
+
+            def priority(file_path: Path) -> Tuple[bool, bool, int]:
+                path = str(file_path)
+                try:
+                    mtime_ns = os.stat(path).st_mtime_ns
+                except OSError:
+                    mtime_ns = 0
+                previous_hits = self.cache is not None and self.cache.has_violations(path)
+                return os.path.normpath(path) not in changed, not previous_hits, -mtime_ns
+
+            return sorted(self.find_dart_files(), key=priority)
+
+    def find_violations_by_file(self) -> List[Tuple[str, List[LoggingViolation]]]:
+        """Find logging violations in every dart file, using the cache if enabled.
+
+        Returns:
+            (file path, violations) for every file, including files without violations
+        """
+        return list(self.iter_violations_by_file())
+
+    def iter_violations_by_file(self, dart_files: Optional[Iterable[Path]] = None
+                                ) -> Iterator[Tuple[str, List[LoggingViolation]]]:
+        """Find logging violations in every dart file, using the cache if enabled.
+
+        Closing the iterator early stops the scan, saving the cache of the
+        files scanned so far.
+
+        Args:
+            dart_files: The files to check in this order, or None to discover them
+
+        Yields:
+            (file path, violations) for every file, including files without
+            violations, in discovery order as soon as the file is done
+        """
+        # Discovered files, oldest first, with their violations once known
+        entries: Deque[List] = deque()
+        discovered = 0
+        stats = self.stats
+        store = self.store
+        if store is not None:
+            with stats.phase('store') if stats is not None else nullcontext():
+                store.begin_run(self.cache_fingerprint(), self.rules, self.directories)
+
+        def record(file_path: str, violations: List[LoggingViolation],
+                   result: Optional[FileScanResult] = None) -> Tuple[str, List[LoggingViolation]]:
+            # Unchanged files are only looked up, and the changed ones written in batches
+            if store is not None:
+                if result is None:
+                    # Answered from the cache, with the digest of its entry
+                    entry = self.cache.entries[file_path]
+                    store.record(file_path, entry['sha256'], entry['size'], violations)
+                else:
+                    store.record(file_path, result.digest, result.size, violations)
+            return file_path, violations
+
+        def lookup(file_path: str) -> Optional[List[LoggingViolation]]:
+            if stats is None:
+                return self.cache.lookup(file_path)
+            with stats.phase('cache'):
+                return self.cache.lookup(file_path)
+
+        def uncached_files() -> Iterator[Path]:
+            # Files are handed to the scan as discovery finds them
+            nonlocal discovered
+            files = self.find_dart_files() if dart_files is None else dart_files
+            if stats is not None and dart_files is None:
+                files = stats.timed('discovery', files)
+            for file_path in files:
+                discovered += 1
+                cached = lookup(str(file_path)) if self.cache is not None else None
+                entries.append([str(file_path), cached])
+                if cached is None:
+                    yield file_path
+
+        scanned = 0
+        finished = False
+        results = self.iter_scan_files(uncached_files())
+        try:
+            for result in results:
+                scanned += 1
+                if self.cache is not None:
+                    self.cache.store(result)
+                if stats is not None:
+                    stats.add_file(result)
+                # Results arrive in discovery order, so this is the oldest file still waiting
+                while entries[0][1] is not None:
+                    yield record(*entries.popleft())
+                entries.popleft()
+                yield record(result.file_path, result.violations, result)
+            while entries:
+                yield record(*entries.popleft())
+            finished = True
+        finally:
+            results.close()
+            if store is not None:
+                with stats.phase('store') if stats is not None else nullcontext():
+                    store.finish(complete=finished)
+            if self.cache is not None:
+                try:
+                    if stats is None:
+                        self.cache.save()
+                    else:
+                        with stats.phase('cache'):
+                            self.cache.save()
+                except OSError as e:
+                    self.print_info(f"Could not save scan cache to {self.cache.path}: {e}")
+
+            if stats is not None:
+                stats.counters['files_discovered'] += discovered
+                stats.counters['files_cached'] += discovered - scanned
+
+    def find_changed_violations(self) -> List[LoggingViolation]:
+        """Find logging violations in the files changed in git.
+
+        Returns:
+            List of violations, only on added or modified lines unless all_lines is set
+        """
+        return list(self.iter_changed_violations())
+
+    def iter_changed_violations(self) -> Iterator[LoggingViolation]:
+        """Find logging violations in the files changed in git, file by file.
+
+        Yields:
+            Violations, only on added or modified lines unless all_lines is set
+        """
+        for _, file_violations in self.iter_changed_violations_by_file():
+            yield from file_violations
+
+    def iter_changed_violations_by_file(self) -> Iterator[Tuple[str, List[LoggingViolation]]]:
+        """Find logging violations in the files changed in git.
+
+        Yields:
+            (file path, violations) for every changed file, in path order; only
+            violations on added or modified lines unless all_lines is set
+        """
+        with self.stats.phase('git') if self.stats is not None else nullcontext():
+            changed_files = self.git_changes.changed_files(self.directories)
+            wanted = {str(path) for path in self.finder.filter_paths([changed.path for changed in changed_files],
+                                                                         existing_only=False)}
+            changed_files = [changed for changed in changed_files if changed.path in wanted]
+            contents = self.git_changes.read_contents(changed_files)
+        if self.progress is not None:
+            self.progress.files_total = len(changed_files)
+
+        for changed in changed_files:
+            result = self.scan_bytes(Path(changed.path), contents.pop(changed.path))
+            if self.stats is not None:
+                self.stats.add_file(result)
+            yield changed.path, [violation for violation in result.violations
+                                 if self.all_lines or changed.is_added(violation.line_number)]
+
+    def scan_files(self, dart_files: Iterable[Path]) -> List[FileScanResult]:
+        """Scan files, in parallel if enough files and jobs are available.
+
+        Args:
+            dart_files: Files to scan, possibly still being discovered
+
+        Returns:
+            Scan results, in the same order as dart_files
+        """
+        return list(self.iter_scan_files(dart_files))
+
+    def iter_scan_files(self, dart_files: Iterable[Path]) -> Iterator[FileScanResult]:
+        """Scan files, in parallel if enough files and jobs are available.
+
+        Args:
+            dart_files: Files to scan, possibly still being discovered
+
+        Yields:
+            Scan results, in the same order as dart_files
+        """
+        with_digest = self.cache is not None or self.store is not None
+        if self.readers:
+            yield from self.scan_files_pipelined(dart_files, with_digest)
+            return
+        dart_files = iter(dart_files)
+        head = list(itertools.islice(dart_files, self.PARALLEL_MIN_FILES))
+        if self.jobs > 1 and len(head) >= self.PARALLEL_MIN_FILES:
+            yield from self.scan_files_parallel(itertools.chain(head, dart_files), with_digest)
+            return
+        for file_path in itertools.chain(head, dart_files):
+            yield self.scan_file_result(file_path, with_digest)
+
+    def scan_files_parallel(self, dart_files: Iterable[Path], with_digest: bool = False) -> Iterator[FileScanResult]:
+        """Scan files on a pool of worker processes.
+
+        Args:
+            dart_files: Files to scan, possibly still being discovered
+            with_digest: Whether to compute content digests for the cache and the violation store
+
+        Yields:
+            Scan results, in the same order as dart_files
+        """
+        dart_files = iter(dart_files)
+        submitted: List[Path] = []
+        done = 0
+
+        def track(files: Iterator[Path]) -> Iterator[Path]:
+            for file_path in files:
+                submitted.append(file_path)
+                yield file_path
+
+        # Only failures of the pool itself fall back to a serial scan; errors scanning a file are raised as they are
+        unavailable: Optional[Exception] = None
+        pool = None
+        try:
+            pool = ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_scan_worker, initargs=(self,))
+            # Hand out files in chunks so small files don't pay one round trip each; submitting starts the workers
+            results = pool.map(partial(_scan_file_in_worker, with_digest=with_digest),
+                               track(dart_files), chunksize=self.PARALLEL_CHUNK_SIZE)
+        except (OSError, NotImplementedError) as e:
+            unavailable = e
+        else:
+            try:
+                for result in results:
+                    done += 1
+                    yield result
+            except BrokenProcessPool as e:
+                unavailable = e
+        finally:
+            if pool is not None:
+                # When the scan stops early, chunks no worker has started are dropped
+                pool.shutdown(cancel_futures=True)
+
+        if unavailable is not None:
+            self.print_info(f"Parallel scan unavailable ({unavailable}), scanning serially")
+            for file_path in itertools.chain(submitted[done:], dart_files):
+                yield self.scan_file_result(file_path, with_digest)
+
+    def scan_files_pipelined(self, dart_files: Iterable[Path], with_digest: bool = False) -> Iterator[FileScanResult]:
+        """Scan files while reader threads read ahead, see ReadAheadPipeline.
+
+        Args:
+            dart_files: Files to scan, iterated on a discovery thread
+            with_digest: Whether to compute content digests for the cache and the violation store
+
+        Yields:
+            Scan results, in the same order as dart_files
+        """
+        pipeline = ReadAheadPipeline(self.load_source, self.readers, self.PIPELINE_DEPTH)
+        try:
+            for file_path, (mtime_ns, data, read_time, read_cpu) in pipeline.run(dart_files):
+                started = time.perf_counter()
+                cpu_started = time.thread_time()
+                try:
+                    result = self.scan_bytes(file_path, data, mtime_ns, with_digest)
+                finally:
+                    if isinstance(data, mmap.mmap):
+                        data.close()
+                if self.collect_timings:
+                    result.timings = (read_time, time.perf_counter() - started,
+                                      read_cpu + time.thread_time() - cpu_started)
+                yield result
+        finally:
+            if self.stats is not None:
+                self.stats.pipeline = {'readers': pipeline.readers, 'depth': pipeline.depth, **pipeline.metrics}
+
+    def load_source(self, file_path: Path) -> Tuple[int, Any, float, float]:
+        """Read a file for the pipelined scan, on a reader thread.
+
+        Large files are mapped, and the kernel is asked to read them ahead.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            (mtime_ns, contents, read seconds, read CPU seconds) tuple
+        """
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        mtime_ns, data = self.read_source(file_path)
+        if isinstance(data, mmap.mmap) and hasattr(mmap, 'MADV_WILLNEED'):
+            data.madvise(mmap.MADV_WILLNEED)
+        return mtime_ns, data, time.perf_counter() - started, time.thread_time() - cpu_started
+
+    def read_source(self, file_path: Path) -> Tuple[int, Any]:
+        """Read the raw contents of a file.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            (mtime_ns, contents) tuple, where the contents are bytes, or an mmap
+            that the caller closes for large files
+        """
+        # Stat before reading, so a concurrent edit makes the recorded mtime stale rather than new
+        mtime_ns = os.stat(file_path).st_mtime_ns
+        with open(file_path, 'rb') as file:
+            # Large files are mapped, so one without candidates is never copied into memory
+            if os.fstat(file.fileno()).st_size >= MMAP_MIN_SIZE:
+                try:
+                    return mtime_ns, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    pass
+            return mtime_ns, file.read()
+
+    def scan_file(self, file_path: Path) -> List[LoggingViolation]:
+        """Find logging violations in a single dart file.
+
+        Args:
+            file_path: Path to the file to scan
+
+        Returns:
+            List of violations in the file
+        """
+        return self.scan_file_result(file_path).violations
+
+    def scan_file_result(self, file_path: Path, with_digest: bool = False) -> FileScanResult:
+        """Scan a single dart file and record the file state the result belongs to.
+
+        Args:
+            file_path: Path to the file to scan
+            with_digest: Whether to compute the content digest
+
+        Returns:
+            The scan result
+        """
+        if self.collect_timings:
+            started = time.perf_counter()
+            cpu_started = time.process_time()
+
+        mtime_ns, data = self.read_source(file_path)
+        read = time.perf_counter() if self.collect_timings else 0.0
+        try:
+            result = self.scan_bytes(file_path, data, mtime_ns, with_digest)
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+        if self.collect_timings:
+            result.timings = (read - started, time.perf_counter() - read, time.process_time() - cpu_started)
+        return result
+
+    def scan_bytes(self, file_path: Path, data, mtime_ns: int = 0, with_digest: bool = False) -> FileScanResult:
+        """Scan the raw contents of a dart file.
+
+        The contents are only decoded if the byte-level prefilter finds a candidate.
+
+        Args:
+            file_path: Path reported for the violations
+            data: The raw contents, as bytes or any other buffer such as an mmap
+            mtime_ns: Modification time the contents were read at
+            with_digest: Whether to compute the content digest
+
+        Returns:
+            The scan result
+        """
+        violations = []
+        decoded = self.matcher.may_match_bytes(data) and not _is_generated_source(data)
+        imports = None
+        if decoded and self.import_rules:
+            # A file none of whose rules can reach their symbol is skipped after parsing its imports
+            imports = ImportTable.from_bytes(data)
+            rules = [rule for rule in self.rules
+                     if not rule.scoped or rule.applies_to(str(file_path), self.package_root)]
+            decoded = any(not rule.libraries or imports.reaches(rule) for rule in rules)
+        if decoded:
+            if len(data) >= self.stream_min_size:
+                violations = self.scan_stream(str(file_path), data, imports)
+            else:
+                violations = self.scan_text(str(file_path), _decode_source(data), imports)
+        digest = hashlib.sha256(data).hexdigest() if with_digest else None
+        result = FileScanResult(str(file_path), violations, len(data), mtime_ns, digest)
+        result.decoded = decoded
+        return result
+
+    def scan_text(self, file_path: str, text: str, imports: Optional[ImportTable] = None) -> List[LoggingViolation]:
+        """Find logging violations in the contents of a dart file.
+
+        Args:
+            file_path: Path reported for the violations
+            text: The file contents
+            imports: Its import table, if already parsed
+
+        Returns:
+            List of violations in the text
+        """
+        violations = []
+        applies: Dict[str, bool] = {}
+        accepts = self.import_filters(text, imports)
+        for line_num, line_start, line_end, hits in self.matcher.scan_hits(text, CodeMap(text).is_code, accepts):
+            violation_types = self.applicable(file_path, hits, applies)
+            if violation_types:
+                first = min(hits[violation_type] for violation_type in violation_types)
+                line = _excerpt(text, line_start, line_end, first, self.context_width)
+                violations.extend(LoggingViolation(file_path, line_num, line, violation_type)
+                                  for violation_type in violation_types)
+        return violations
+
+    def scan_stream(self, file_path: str, data, imports: Optional[ImportTable] = None) -> List[LoggingViolation]:
+        """Find logging violations in a large dart file, window by window in bounded memory.
+
+        The lexer carries its state from one window to the next, and each
+        window repeats STREAM_OVERLAP characters of context on either side, so
+        the violations are those of scan_text on the whole file as long as
+        every match, the code before a call on its line and every declaration
+        line fit in that context.
+
+        Args:
+            file_path: Path reported for the violations
+            data: The raw contents, as bytes or any other buffer such as an mmap
+            imports: Its import table, if already parsed
+
+        Returns:
+            List of violations in the contents
+        """
+        if self.import_rules and imports is None:
+            imports = ImportTable.from_bytes(data)
+        size, overlap = self.STREAM_WINDOW, max(self.STREAM_OVERLAP, self.context_width)
+        line_local, candidate_lines = self.survey_stream(data, imports)
+
+        order = {violation_type: index for index, (_, violation_type) in enumerate(self.matcher.patterns)}
+        violations: List[LoggingViolation] = []
+        applies: Dict[str, bool] = {}
+        accepts: Dict[str, Callable[[re.Match], bool]] = {}
+        lexer = StreamingLexer(line_local)
+        # Only the last line found can run on into the next window and gain violation types there
+        pending: Optional[Tuple[int, str, List[str]]] = None
+        newlines = 0  # before the new part of the window
+        for text, base, lo, hi, final in _iter_source_windows(data, size, overlap):
+            lexer.window(text, base, hi, final)
+            if imports is not None:
+                accepts = {rule.rule_id: imports.accepts(rule, text) for rule in self.import_rules}
+            first_line = newlines + 1 - text.count('\n', 0, lo)
+            for line_num, line_start, line_end, hits in self.matcher.scan_hits(text, lexer.is_code, accepts, lo, hi,
+                                                                              first_line):
+                violation_types = self.applicable(file_path, hits, applies)
+                if not violation_types:
+                    continue
+                if pending is not None and pending[0] == line_num:
+                    pending[2].extend(violation_type for violation_type in violation_types
+                                      if violation_type not in pending[2])
+                    continue
+                if pending is not None:
+                    violations.extend(LoggingViolation(file_path, pending[0], pending[1], violation_type)
+                                      for violation_type in sorted(pending[2], key=order.get))
+                first = min(hits[violation_type] for violation_type in violation_types)
+                pending = (line_num, _excerpt(text, line_start, line_end, first, self.context_width), violation_types)
+            newlines += text.count('\n', lo, hi)
+            if line_local and newlines + 1 in candidate_lines:
+                lexer.carry(hi, overlap)
+        if pending is not None:
+            violations.extend(LoggingViolation(file_path, pending[0], pending[1], violation_type)
+                              for violation_type in sorted(pending[2], key=order.get))
+        return violations
+
+    def survey_stream(self, data, imports: Optional[ImportTable]) -> Tuple[bool, Set[int]]:
+        """Make a first pass over a file scanned window by window.
+
+        Finds which symbols the file declares, since a call can resolve to a
+        declaration further down, and whether every line starts in code, as
+        _lines_are_independent does for a whole buffer.
+
+        Args:
+            data: The raw contents
+            imports: Its import table, whose declarations are filled in
+
+        Returns:
+            (line_local, candidate_lines) tuple: whether every line starts in
+            code, and if so the numbers of the lines holding a candidate match
+        """
+        symbols = set()
+        if imports is not None:
+            symbols = {rule.symbol for rule in self.import_rules if None in imports.visible_prefixes(rule)}
+        line_local = True
+        candidate_lines: Set[int] = set()
+        newlines = 0
+        for text, base, lo, hi, final in _iter_source_windows(data, self.STREAM_WINDOW,
+                                                              max(self.STREAM_OVERLAP, self.context_width)):
+            if symbols:
+                first_line = text.find('\n') + 1 if base else 0
+                if first_line or not base:
+                    imports.declare(text, symbols, first_line)
+            if line_local:
+                # Tokens across the edges of the new part are whole on one side or the other
+                line_local = not any(text.find(token, max(lo - 2, 0), hi + 2) != -1 for token in ('/*', "'''", '"""'))
+            if line_local:
+                for match in _INTERPOLATION_TO_EOL.finditer(text, lo):
+                    start, end = match.span()
+                    if start >= hi:
+                        break
+                    if (end == len(text) and not final) or text.count('{', start, end) > text.count('}', start, end):
+                        line_local = False
+                        break
+            if line_local and self.matcher.may_match(text):
+                line_number = newlines + 1 - text.count('\n', 0, lo)
+                counted_up_to = 0
+                next_literal = [-1] * len(self.matcher.literals or ())
+                match = self.matcher.search(text, lo, next_literal)
+                while match and match.start() < hi:
+                    line_number += text.count('\n', counted_up_to, match.start())
+                    counted_up_to = match.start()
+                    candidate_lines.add(line_number)
+                    line_end = text.find('\n', match.start())
+                    if line_end == -1:
+                        break
+                    match = self.matcher.search(text, line_end + 1, next_literal)
+            newlines += text.count('\n', lo, hi)
+        return line_local, candidate_lines
+
+    def applicable(self, file_path: str, violation_types: Iterable[str], applies: Dict[str, bool]) -> List[str]:
+        """Keep the violation types whose rules apply to a file.
+
+        Args:
+            file_path: The file
+            violation_types: Violation types found in it
+            applies: Whether each scoped rule applies to the file, filled in as rules are met
+
+        Returns:
+            The violation types to report, in order
+        """
+        kept = []
+        for violation_type in violation_types:
+            rule = self.scoped_rules.get(violation_type)
+            if rule is not None:
+                if violation_type not in applies:
+                    applies[violation_type] = rule.applies_to(file_path, self.package_root)
+                if not applies[violation_type]:
+                    continue
+            kept.append(violation_type)
+        return kept
+
+    def import_filters(self, text: str,
+                       imports: Optional[ImportTable] = None) -> Dict[str, Callable[[re.Match], bool]]:
+        """Get the filters that keep the matches of import-aware rules resolving to their libraries.
+
+        Args:
+            text: The file contents
+            imports: Its import table, if already parsed
+
+        Returns:
+            Filter of the matches in text, by rule id
+        """
+        if not self.import_rules:
+            return {}
+        if imports is None:
+            imports, _ = ImportTable.parse(text)
+        # Only calls without a prefix can resolve to a declaration of the library itself
+        imports.declare(text, {rule.symbol for rule in self.import_rules if None in imports.visible_prefixes(rule)})
+        return {rule.rule_id: imports.accepts(rule, text) for rule in self.import_rules}
+
+    def line_edits(self, line: str, violation_type: str, in_code: Optional[Callable[[int], bool]] = None,
+                   accept: Optional[Callable[[re.Match], bool]] = None) -> Tuple[List[Tuple[int, int, str]], str]:
+        """Compute the edits that apply a rule's fix to a single line.
 
+        Args:
+            line: The line to fix, including its line ending
+            violation_type: Type of the violation on the line
+            in_code: Tells whether an offset of the line lies in code; calls in
+                comments and strings are left alone. None lexes the line on its own.
+            accept: Tells whether a match is a call to fix; calls that resolve
+                elsewhere, such as math.log(, are left alone. None fixes every call.
 
-class LoggingViolation:
-    """Represents a logging violation found in a file."""
-    def __init__(self, file_path: str, line_number: int, line_content: str, violation_type: str):
-        self.file_path = file_path
-        self.line_number = line_number
-        self.line_content = line_content.strip()
-        self.violation_type = violation_type
+        Returns:
+            (edits, fix_type) tuple, where edits are (start, end, replacement)
+            offsets into line
 
-    def __str__(self) -> str:
-        return f"{self.file_path}:{self.line_number}: {self.line_content}"
+        Raises:
+            ValueError: If the line cannot be fixed
+        """
+        rule = self.rules_by_id.get(violation_type)
+        if rule is None:
+            raise ValueError(f"Unknown violation type: {violation_type}")
+        if rule.fix is None:
+            raise ValueError(f"{violation_type} violations can't be fixed automatically")
+        if in_code is None:
+            in_code = CodeMap(line).is_code
 
+        fix_type = f"{violation_type} -> {rule.fix.rstrip('(')}"
+        matches = [match for match in rule.regex.finditer(line)
+                   if in_code(match.start()) and (accept is None or accept(match))]
 
-class LoggingChecker:
-    """Main class for checking prohibited logging methods."""
+        # Calls that pass a dropped argument need their argument list rewritten
+        if not any(f'{argument}:' in line for argument in rule.drop_arguments):
+            # Simple replacement
+            return [(match.start(), match.end(), match.expand(rule.fix)) for match in matches], fix_type
 
-    # Patterns to identify prohibited logging methods
-    PROHIBITED_PATTERNS = [
-        (r'(?<!\w)debugPrint\(', 'debugPrint'),
-        (r'(?<!\w)log\(', 'log')
-    ]
+        # Only the first call in code is rewritten
+        if not matches:
+            return [], fix_type
+        call = matches[0]
+        open_paren = call.end() - 1
 
-    def __init__(self, directories: List[str], mode: Mode = Mode.LOCAL, auto_fix: bool = False):
-        """Initialize the checker.
+        # Count parentheses in code to find the matching closing one,
+        # splitting the arguments on top-level commas along the way
+        close_paren = -1
+        depth = 0
+        arg_start = open_paren + 1
+        arg_parts = []
+        for i in range(open_paren + 1, len(line)):
+            char = line[i]
+            if char not in '()[]{},' or not in_code(i):
+                continue
+            if char in '([{':
+                depth += 1
+            elif char in ')]}':
+                if depth == 0:
+                    if char == ')':
+                        # We found the matching closing parenthesis
+                        close_paren = i
+                        break
+                else:
+                    depth -= 1
+            elif depth == 0:
+                arg_parts.append(line[arg_start:i].strip())
+                arg_start = i + 1
+
+        if close_paren == -1:
+            raise ValueError(f"{violation_type}() call does not end on the same line")
+
+        last_part = line[arg_start:close_paren].strip()
+        if last_part:
+            arg_parts.append(last_part)
+
+        # Remove the dropped named arguments
+        filtered_args = [arg for arg in arg_parts
+                         if not any(re.match(rf'{re.escape(argument)}\s*:', arg) for argument in rule.drop_arguments)]
+
+        # Rebuild the call
+        replacement = call.expand(rule.fix) + ', '.join(filtered_args) + ')'
+        return [(call.start(), close_paren + 1, replacement)], fix_type
+
+    def import_change(self, lines: List[str], packages: Iterable[str]) -> Optional[Tuple[int, int, List[str]]]:
+        """Compute the change that adds missing package imports to a file.
 
         Args:
-            directories: List of directories to scan
-            mode: Operation mode (local or ci)
-            auto_fix: Whether to automatically fix violations
+            lines: Lines of the file, including line endings
+            packages: The imported package URIs
+
+        Returns:
+            A (start, end, new_lines) change, or None if every import is present
         """
-        self.directories = directories
-        self.mode = mode
-        self.auto_fix = auto_fix and mode == Mode.LOCAL  # Only allow auto-fix in local mode
-        self.violations: List[LoggingViolation] = []
+        missing = [package for package in dict.fromkeys(packages) if not any(package in line for line in lines)]
+        if not missing:
+            return None
 
-    def print_success(self, message: str) -> None:
-        """Print a success message."""
-        if self.mode == Mode.LOCAL:
-            print(f"{Colors.GREEN}✓ {message}{Colors.NC}")
-        else:
-            print(message)
+        # Find a good place to insert the import
+        # Look for the last import statement
+        import_index = -1
+        for i, line in enumerate(lines):
+            if line.strip().startswith('import '):
+                import_index = i
 
-    def print_error(self, message: str) -> None:
-        """Print an error message."""
-        if self.mode == Mode.LOCAL:
-            print(f"{Colors.RED}✗ {message}{Colors.NC}")
-        else:
-            print(f"::error::{message}")
+        # Match the file's line endings
+        newline = '\r\n' if lines and lines[0].endswith('\r\n') else '\n'
+        imports = [f"import '{package}';{newline}" for package in missing]
 
-    def print_info(self, message: str) -> None:
-        """Print an info message."""
-        if self.mode == Mode.LOCAL:
-            print(f"{Colors.YELLOW}➤ {message}{Colors.NC}")
-        else:
-            print(message)
+        # Insert after the last import statement, or at the beginning of the file
+        if import_index != -1 and not lines[import_index].endswith(('\n', '\r')):
+            return import_index, import_index + 1, [lines[import_index] + newline] + imports
+        return import_index + 1, import_index + 1, imports
+
+    def add_import(self, lines: List[str], package: str) -> bool:
+        """Add a package import to the lines of a file if it is missing.
 
-    def find_dart_files(self) -> List[Path]:
-        """Find all dart files in the specified directories.
+        Args:
+            lines: Lines of the file, including line endings; modified in place
+            package: The imported package URI
 
         Returns:
-            List of dart file paths
+            True if the import was added, False if it was already present
         """
-        dart_files = []
-        for directory in self.directories:
-            for root, _, files in os.walk(directory):
-                for file in files:
-                    if file.endswith('.dart'):
-                        dart_files.append(Path(os.path.join(root, file)))
-        return dart_files
+        change = self.import_change(lines, [package])
+        if change is None:
+            return False
+        start, end, new_lines = change
+        lines[start:end] = new_lines
+        return True
 
-    def is_line_commented(self, line: str) -> bool:
-        """Check if a line is commented out.
+    def add_app_logger_import(self, lines: List[str], package: str = DEFAULT_PACKAGE) -> bool:
+        """Add the AppLogger import to the lines of a file if it is missing.
 
         Args:
-            line: The line to check
+            lines: Lines of the file, including line endings; modified in place
+            package: Name of the package the file belongs to
 
         Returns:
-            True if the line is commented out, False otherwise
+            True if the import was added, False if it was already present
         """
-        # Check if the line is entirely a comment
-        if line.strip().startswith("//"):
-            return True
-        
-        # For potential inline comments, we need to be more careful
-        # Split the line by '//' and check if the occurrence is within a string
-        parts = line.split('//')
-        
-        # If there's only one part, there's no comment
-        if len(parts) == 1:
-            return False
-        
-        # If we find '//' with an odd number of quotes before it,
-        # it's inside a string and not a real comment
-        full_line = line
-        comment_pos = full_line.find('//')
-        if comment_pos != -1:
-            before_comment = full_line[:comment_pos]
-            # Count unescaped quotes
-            quote_count = before_comment.count('"') - before_comment.count('\\"')
-            # If odd number of quotes, '//' is inside a string
-            return quote_count % 2 == 0
-        
-        return False
+        return self.add_import(lines, APP_LOGGER_PACKAGE_TEMPLATE.replace('{package}', package))
 
-    def find_violations(self) -> List[LoggingViolation]:
-        """Find logging violations in dart files.
+    def package_name(self, file_path: str) -> str:
+        """Get the name of the package whose imports a fixed file gets.
+
+        Args:
+            file_path: Path of the file
 
         Returns:
-            List of violations
+            The checker's package, or else the name in the pubspec.yaml of the
+            package holding the file, DEFAULT_PACKAGE outside any package
         """
-        violations = []
-        dart_files = self.find_dart_files()
-        
-        for file_path in dart_files:
-            with open(file_path, 'r') as file:
-                for line_num, line in enumerate(file, 1):
-                    if self.is_line_commented(line):
-                        continue
-                    
-                    for pattern, violation_type in self.PROHIBITED_PATTERNS:
-                        if re.search(pattern, line):
-                            violation = LoggingViolation(
-                                str(file_path), 
-                                line_num, 
-                                line, 
-                                violation_type
-                            )
-                            violations.append(violation)
-        
-        return violations
+        if self.package is not None:
+            return self.package
+        package = _package_index.package_of(file_path)
+        return package.name if package is not None else DEFAULT_PACKAGE
+
+    def fix_file(self, file_path: str, violations: List[LoggingViolation], write: bool = True) -> FileFixResult:
+        """Fix all violations in a file with a single read and a single write.
+
+        All fixes are computed in memory against the line numbers found by the
+        scan, then the AppLogger import is inserted, and the result is written
+        atomically, so a failure never leaves a half-fixed file behind.
+
+        Args:
+            file_path: Path to the file to fix
+            violations: The violations in the file
+            write: Whether to write the file; a dry run keeps the original lines
+                and their changes in the result instead
+
+        Returns:
+            The outcome of every fix and the number of bytes written
+        """
+        try:
+            # newline='' keeps the file's own line endings, surrogateescape any undecodable bytes
+            with open(file_path, 'r', encoding='utf-8', errors='surrogateescape', newline='') as file:
+                lines = file.readlines()
+        except OSError as e:
+            result = FileFixResult(file_path)
+            result.outcomes = [(violation, False, str(e)) for violation in violations]
+            return result
+
+        result = self.fix_lines(file_path, lines, violations)
+        if write and result.changes:
+            content = ''.join(_apply_line_changes(lines, result.changes))
+            try:
+                result.bytes_written = _write_atomic(file_path, content)
+            except OSError as e:
+                result.outcomes = [(violation, False, str(e)) for violation in violations]
+                result.import_added = False
+        if write:
+            result.lines, result.changes = [], []
+        return result
+
+    def fix_lines(self, file_path: str, lines: List[str], violations: List[LoggingViolation],
+                  package: Optional[str] = None) -> FileFixResult:
+        """Compute the fixes of a file's violations, without touching the file.
+
+        Args:
+            file_path: Path of the file
+            lines: Lines of the file, including line endings
+            violations: The violations in the file
+            package: Name of the package whose imports the fixes add, or None
+                to look it up with package_name()
+
+        Returns:
+            The outcome of every fix, with the lines and their changes
+        """
+        result = FileFixResult(file_path)
+
+        # Edits are computed against the original lines, so several fixes on one line don't interfere
+        text = ''.join(lines)
+        code_map = CodeMap(text)
+        imports = None
+        if self.import_rules:
+            imports, _ = ImportTable.parse(text)
+            imports.declare(text, {rule.symbol for rule in self.import_rules})
+        line_offsets = [0]
+        for line in lines:
+            line_offsets.append(line_offsets[-1] + len(line))
+
+        edits_by_line: Dict[int, List[Tuple[int, int, str]]] = {}
+        for violation in violations:
+            line_index = violation.line_number - 1
+            try:
+                if not 0 <= line_index < len(lines):
+                    raise ValueError(f"line {violation.line_number} is out of range")
+                line_offset = line_offsets[line_index]
+                rule = self.rules_by_id.get(violation.violation_type)
+                accept = imports.accepts(rule, lines[line_index]) if imports and rule and rule.libraries else None
+                edits, fix_type = self.line_edits(lines[line_index], violation.violation_type,
+                                                  lambda offset: code_map.is_code(line_offset + offset), accept)
+            except ValueError as e:
+                result.outcomes.append((violation, False, str(e)))
+                continue
+
+            edits_by_line.setdefault(line_index, []).extend(edits)
+            result.outcomes.append((violation, True, fix_type))
+
+        changes: Dict[int, Tuple[int, int, List[str]]] = {}
+        for line_index, edits in edits_by_line.items():
+            fixed_line = _apply_edits(lines[line_index], edits)
+            if fixed_line != lines[line_index]:
+                changes[line_index] = (line_index, line_index + 1, [fixed_line])
+        sorted_changes = list(changes.values())
+
+        # Import what the successful fixes need, in rule order
+        fixed_types = {violation.violation_type for violation, success, _ in result.outcomes if success}
+        fixing_rules = [rule for rule in self.rules if rule.rule_id in fixed_types and rule.fix_import]
+        if fixing_rules:
+            if package is None:
+                package = self.package_name(file_path)
+            packages = [rule.import_uri(package) for rule in fixing_rules]
+            import_change = self.import_change(lines, packages)
+            if import_change is not None:
+                start, end, new_lines = import_change
+                if start in changes and end > start:
+                    # The last import line is extended; keep any fix made to it
+                    new_lines[0] = changes.pop(start)[2][0] + new_lines[0][len(lines[start]):]
+                    sorted_changes = list(changes.values())
+                sorted_changes.append(import_change)
+                result.import_added = True
+
+        # Insertions sort before a change to the line they precede
+        sorted_changes.sort(key=lambda change: (change[0], change[1]))
+        result.lines = lines
+        result.changes = sorted_changes
+        return result
+
+    def fix_files(self, violations: List[LoggingViolation], write: bool = True) -> List[FileFixResult]:
+        """Fix violations file by file, several files at a time.
+
+        Args:
+            violations: The violations to fix
+            write: Whether to write the files, see fix_file
+
+        Returns:
+            Fix results per file, in order of first appearance in violations
+        """
+        by_file: Dict[str, List[LoggingViolation]] = {}
+        for violation in violations:
+            by_file.setdefault(violation.file_path, []).append(violation)
+
+        # Fixing is dominated by file I/O, so threads overlap it well enough
+        with self.stats.phase('fix') if self.stats is not None else nullcontext():
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                results = list(pool.map(self.fix_file, by_file.keys(), by_file.values(),
+                                        itertools.repeat(write)))
+
+        if self.stats is not None:
+            self.stats.counters['files_fixed'] += sum(1 for result in results if result.bytes_written)
+            self.stats.counters['bytes_written'] += sum(result.bytes_written for result in results)
+        return results
 
     def fix_violation(self, violation: LoggingViolation) -> Tuple[bool, str]:
         """Fix a logging violation.
@@ -168,91 +4147,11 @@ class LoggingChecker:
         Returns:
             (success, message) tuple
         """
-        try:
-            # Read the file
-            with open(violation.file_path, 'r') as file:
-                content = file.readlines()
-            
-            # Replace the line
-            line_index = violation.line_number - 1
-            original_line = content[line_index]
-            
-            if violation.violation_type == 'debugPrint':
-                # Simple replacement
-                content[line_index] = re.sub(r'(?<!\w)debugPrint\(', 'AppLogger.d(', original_line)
-                fix_type = "debugPrint -> AppLogger.d"
-            elif violation.violation_type == 'log':
-                # For log() calls, we need to handle the 'name' parameter if present
-                if ', name:' in original_line:
-                    # Remove the 'name' parameter
-                    # Find the opening parenthesis
-                    open_paren = original_line.find('log(')
-                    if open_paren == -1:
-                        open_paren = original_line.find('log (')
-                    
-                    # Find the corresponding closing parenthesis
-                    if open_paren != -1:
-                        open_paren = original_line.find('(', open_paren)
-                        if open_paren != -1:
-                            # Count parentheses to find the matching closing one
-                            paren_count = 1
-                            for i in range(open_paren + 1, len(original_line)):
-                                if original_line[i] == '(':
-                                    paren_count += 1
-                                elif original_line[i] == ')':
-                                    paren_count -= 1
-                                
-                                if paren_count == 0:
-                                    # We found the matching closing parenthesis
-                                    close_paren = i
-                                    break
-                            
-                            # Get the content between parentheses
-                            args = original_line[open_paren + 1:close_paren]
-                            
-                            # Split by commas not inside quotes
-                            # This is a simplified approach that may not handle all cases
-                            in_quotes = False
-                            arg_parts = []
-                            current_part = ""
-                            for char in args:
-                                if char == '"' and (len(current_part) == 0 or current_part[-1] != '\\'):
-                                    in_quotes = not in_quotes
-                                    current_part += char
-                                elif char == ',' and not in_quotes:
-                                    # We found a separator
-                                    arg_parts.append(current_part.strip())
-                                    current_part = ""
-                                else:
-                                    current_part += char
-                            
-                            if current_part:
-                                arg_parts.append(current_part.strip())
-                            
-                            # Remove any args with 'name:'
-                            filtered_args = [arg for arg in arg_parts if not arg.startswith('name:')]
-                            
-                            # Reconstruct the line
-                            args_str = ', '.join(filtered_args)
-                            content[line_index] = original_line[:open_paren].replace('log', 'AppLogger.d') + '(' + args_str + ')' + original_line[close_paren+1:]
-                else:
-                    # Simple replacement for log() without name parameter
-                    content[line_index] = re.sub(r'(?<!\w)log\(', 'AppLogger.d(', original_line)
-                
-                fix_type = "log -> AppLogger.d"
-            else:
-                return False, f"Unknown violation type: {violation.violation_type}"
-            
-            # Write back to the file
-            with open(violation.file_path, 'w') as file:
-                file.writelines(content)
-            
-            # Check if AppLogger import is needed
-            self.ensure_app_logger_import(violation.file_path)
-            
-            return True, fix_type
-        except Exception as e:
-            return False, str(e)
+        result = self.fix_file(violation.file_path, [violation])
+        if result.import_added:
+            self.print_info(f"Added AppLogger import to {violation.file_path}")
+        _, success, message = result.outcomes[0]
+        return success, message
 
     def ensure_app_logger_import(self, file_path: str) -> None:
         """Ensure the AppLogger import is present in the file.
@@ -260,96 +4159,827 @@ class LoggingChecker:
         Args:
             file_path: Path to the file to check
         """
-        import_line = "import 'package:memverse/src/utils/app_logger.dart';"
-        
-        with open(file_path, 'r') as file:
-            content = file.read()
-        
-        if "package:memverse/src/utils/app_logger.dart" not in content:
-            with open(file_path, 'r') as file:
-                lines = file.readlines()
-            
-            # Find a good place to insert the import
-            # Look for the last import statement
-            import_index = -1
-            for i, line in enumerate(lines):
-                if line.strip().startswith('import '):
-                    import_index = i
-            
-            if import_index != -1:
-                # Insert after the last import statement
-                lines.insert(import_index + 1, f"{import_line}\n")
-            else:
-                # Insert at the beginning of the file
-                lines.insert(0, f"{import_line}\n")
-            
-            with open(file_path, 'w') as file:
-                file.writelines(lines)
-            
+        with open(file_path, 'r', encoding='utf-8', errors='surrogateescape', newline='') as file:
+            lines = file.readlines()
+
+        if self.add_app_logger_import(lines, self.package_name(file_path)):
+            _write_atomic(file_path, ''.join(lines))
             self.print_info(f"Added AppLogger import to {file_path}")
 
+    def watch(self, use_inotify: bool = True) -> None:
+        """Check continuously, rescanning only the files that change.
+
+        Prints the current violations once, then the violations introduced and
+        resolved by every burst of changes. Runs until interrupted.
+
+        Args:
+            use_inotify: Whether to use inotify; polling is the fallback
+        """
+        index = ViolationIndex()
+        for file_path, violations in self.find_violations_by_file():
+            index.update(file_path, violations)
+        for violations in index.files.values():
+            for violation in violations:
+                print(f"  {violation}")
+
+        watcher = None
+        if use_inotify:
+            try:
+                watcher = InotifyWatcher(self.finder, self.directories)
+            except OSError as e:
+                self.print_info(f"inotify unavailable ({e}), polling for changes")
+        if watcher is None:
+            watcher = PollingWatcher(self.finder)
+
+        self.print_info(f"Watching {len(index.files)} files with {index.violation_count()} violations. "
+                        "Press Ctrl+C to stop.")
+        try:
+            while True:
+                changed = self.wait_for_changes(watcher)
+                started = time.monotonic()
+                introduced, resolved = self.process_changes(index, changed)
+                self.print_watch_changes(index, introduced, resolved, time.monotonic() - started)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
+
+    def wait_for_changes(self, watcher) -> Optional[Set[str]]:
+        """Wait for a burst of changes and collect it.
+
+        Editors and formatters write files in several steps, so a burst ends
+        only after WATCH_DEBOUNCE seconds without events.
+
+        Args:
+            watcher: The InotifyWatcher or PollingWatcher to poll
+
+        Returns:
+            The changed paths, or None if everything has to be rescanned
+        """
+        changed: Set[str] = set()
+        rescan = False
+        first_event = None
+        while True:
+            waiting = first_event is None
+            batch = watcher.poll(self.WATCH_POLL_INTERVAL if waiting else self.WATCH_DEBOUNCE)
+            if batch is None:
+                rescan = True
+            elif batch:
+                changed.update(batch)
+            elif not waiting:
+                break
+            if waiting and (rescan or changed):
+                first_event = time.monotonic()
+            if first_event is not None and time.monotonic() - first_event >= self.WATCH_MAX_DELAY:
+                break
+        return None if rescan else changed
+
+    def process_changes(self, index: ViolationIndex,
+                        changed: Optional[Set[str]]) -> Tuple[List[LoggingViolation], List[LoggingViolation]]:
+        """Rescan changed files and update the index.
+
+        Args:
+            index: The index to update
+            changed: Paths of created, modified or deleted files and removed
+                directories, or None to rescan everything
+
+        Returns:
+            (introduced, resolved) violations
+        """
+        if changed is None:
+            current = {index.key(str(file_path)): str(file_path) for file_path in self.find_dart_files()}
+            removed = [key for key in index.files if key not in current]
+            rescan = list(current.values())
+        else:
+            removed = []
+            rescan = []
+            for path in sorted(changed):
+                if os.path.isfile(path):
+                    if self.finder.accepts(path):
+                        rescan.append(path)
+                    elif index.key(path) in index.files:
+                        removed.append(path)  # E.g. now excluded by a changed .gitignore
+                elif index.key(path) in index.files:
+                    removed.append(path)
+                else:
+                    removed.extend(index.paths_under(path))
+
+        introduced: List[LoggingViolation] = []
+        resolved: List[LoggingViolation] = []
+        for path in removed:
+            _, gone = index.update(path, None)
+            resolved.extend(gone)
+        for result in self.scan_files(Path(path) for path in rescan):
+            new, gone = index.update(result.file_path, result.violations)
+            introduced.extend(new)
+            resolved.extend(gone)
+        return introduced, resolved
+
+    def print_watch_changes(self, index: ViolationIndex, introduced: List[LoggingViolation],
+                            resolved: List[LoggingViolation], elapsed: float) -> None:
+        """Print what a burst of changes did to the violations."""
+        for violation in introduced:
+            self.print_error(f"New: {violation}")
+        for violation in resolved:
+            self.print_success(f"Resolved: {violation}")
+        self.print_info(f"{index.violation_count()} violations in {len(index.files)} files "
+                        f"(rescanned in {elapsed * 1000:.0f} ms)")
+
+    def report_stats(self, stats_file: Optional[str] = None, stats_format: str = 'json') -> None:
+        """Report the collected statistics.
+
+        Local mode prints a summary; CI mode writes a file instead, to the
+        default location if stats_file is not given.
+
+        Args:
+            stats_file: File to write the statistics to
+            stats_format: 'json' or 'openmetrics'
+        """
+        if self.stats is None:
+            return
+        self.stats.finish()
+        if self.mode == Mode.LOCAL:
+            lines = self.stats.summary()
+            self.print_info(lines[0])
+            for line in lines[1:]:
+                print(line, file=self.message_stream)
+        elif stats_file is None:
+            stats_file = DEFAULT_STATS_FILES[stats_format]
+
+        if stats_file is not None:
+            try:
+                self.stats.write(stats_file, stats_format)
+                self.print_info(f"Wrote statistics to {stats_file}")
+            except OSError as e:
+                self.print_error(f"Could not write statistics to {stats_file}: {e}")
+
+    def write_patch(self, results: List[FileFixResult], stream) -> None:
+        """Write the changes of dry-run fix results as a patch.
+
+        Args:
+            results: Results of fix_files without writing
+            stream: Output stream
+        """
+        def patch_path(file_path: str) -> str:
+            return os.path.relpath(file_path).replace(os.sep, '/')
+
+        if self.patch_format == 'diff':
+            for result in results:
+                stream.writelines(_unified_diff(patch_path(result.file_path), result.lines, result.changes))
+            return
+
+        files = [{
+            'file': patch_path(result.file_path),
+            'edits': [edit.to_dict() for edit in result.edits()],
+        } for result in results if result.changes]
+        failed = [{**violation.to_dict(), 'error': message}
+                  for result in results for violation, success, message in result.outcomes if not success]
+        json.dump({'files': files, 'failed': failed}, stream, indent=2)
+        stream.write('\n')
+
+    def emit_fix_patch(self) -> None:
+        """Compute the fixes of the found violations and write them as a patch, leaving the files alone."""
+        results = self.fix_files(self.violations, write=False)
+        if self.emit_patch == '-':
+            self.write_patch(results, sys.stdout)
+            sys.stdout.flush()
+        else:
+            # newline='' keeps the files' own line endings in the patch
+            with open(self.emit_patch, 'w', newline='') as file:
+                self.write_patch(results, file)
+
+        fixed_count = sum(success for result in results for _, success, _ in result.outcomes)
+        files = sum(1 for result in results if result.changes)
+        destination = 'stdout' if self.emit_patch == '-' else self.emit_patch
+        self.print_info(f"Wrote a patch fixing {fixed_count}/{len(self.violations)} violations "
+                        f"in {files} files to {destination}")
+
+    def report_violations(self, violations: Iterable[LoggingViolation], keep: bool = False) -> ViolationSummary:
+        """Report violations in the output format as they come in.
+
+        Args:
+            violations: The violations to report
+            keep: Whether to also collect them in self.violations
+
+        Returns:
+            Counts of the violations, including those past max_violations
+        """
+        reporter = REPORTERS[self.output_format](self, sys.stderr if self.emit_patch == '-' else None)
+        summary = ViolationSummary()
+        reporter.start()
+        for violation in violations:
+            reported = self.max_violations is None or summary.reported < self.max_violations
+            rule = self.violation_rule(violation)
+            summary.add(violation, reported, rule is None or rule.severity == 'error')
+            if reported:
+                reporter.violation(violation, summary.reported == 1)
+            if keep:
+                self.violations.append(violation)
+        summary.progress = self.progress
+        reporter.finish(summary)
+        return summary
+
+    def merge_results(self, result_files: List[str]) -> bool:
+        """Report the combined violations of the --format json results of all shards.
+
+        The violations are sorted by file and line, so the report is the same
+        whatever the number of shards.
+
+        Args:
+            result_files: One result file per shard
+
+        Returns:
+            True if no error violations were found, False otherwise
+
+        Raises:
+            OSError: If a result file can't be read
+            ValueError: If a result file is invalid, or shards are missing or repeated
+        """
+        violations = []
+        shards: Dict[int, str] = {}
+        count = None
+        for result_file in result_files:
+            with open(result_file, 'r', encoding='utf-8') as file:
+                try:
+                    data = json.load(file)
+                    shard = data.get('shard', {'index': 1, 'count': 1})
+                    index, shard_count = int(shard['index']), int(shard['count'])
+                    if data['summary']['reported'] < data['summary']['total']:
+                        raise ValueError("results were truncated by --max-violations")
+                    if not data['summary'].get('complete', True):
+                        raise ValueError("results are partial, from --fail-fast or --time-budget")
+                    violations.extend(LoggingViolation.from_dict(violation) for violation in data['violations'])
+                except (KeyError, TypeError, AttributeError) as e:
+                    raise ValueError(f"{result_file}: not a --format json result ({e!r})")
+                except ValueError as e:
+                    raise ValueError(f"{result_file}: {e}")
+            if count is not None and shard_count != count:
+                raise ValueError(f"{result_file}: shard of {shard_count}, expected {count} shards")
+            count = shard_count
+            if index in shards:
+                raise ValueError(f"{result_file}: shard {index}/{count} was already read from {shards[index]}")
+            shards[index] = result_file
+
+        missing = sorted(set(range(1, (count or 0) + 1)) - set(shards))
+        if missing:
+            raise ValueError(f"missing results of shards {', '.join(f'{index}/{count}' for index in missing)}")
+
+        violations.sort(key=lambda violation: (violation.file_path, violation.line_number))
+        summary = self.report_violations(violations)
+        if not summary.total:
+            self.print_success("No prohibited logging methods found")
+        return not summary.errors
+
+    def print_progress(self) -> None:
+        """Tell whether a scan that may stop early checked every file."""
+        progress = self.progress
+        if progress.stopped == 'fail-fast':
+            self.print_info(f"Stopped at the first error after checking {progress.files_checked} of "
+                            f"{progress.files_total} files: the result is partial")
+        elif progress.stopped == 'time-budget':
+            self.print_info(f"Time budget of {self.time_budget * 1000:g} ms used up after checking "
+                            f"{progress.files_checked} of {progress.files_total} files: the result is partial")
+        else:
+            self.print_info(f"Checked all {progress.files_total} files: the result is complete")
+
     def check_and_fix(self) -> bool:
         """Run the check and optionally fix violations.
 
+        Warnings are reported, but only errors fail the check.
+
         Returns:
-            True if no violations were found or all were fixed, False otherwise
+            True if no error violations were found or all were fixed, False otherwise
         """
-        self.violations = self.find_violations()
-        
-        if not self.violations:
+        # Only fixing needs the violations once they are reported
+        self.violations = []
+        summary = self.report_violations(self.iter_violations(), keep=self.auto_fix or bool(self.emit_patch))
+
+        if self.stats is not None:
+            self.stats.counters['violations'] += summary.total
+        if self.cache is not None:
+            self.print_info(self.cache.summary())
+        if self.store is not None:
+            self.print_info(self.store.summary())
+        if self.emit_patch:
+            self.emit_fix_patch()
+        if self.progress is not None:
+            self.print_progress()
+
+        if not summary.total:
             self.print_success("No prohibited logging methods found")
             return True
-        
+        if not summary.errors and not self.auto_fix:
+            self.print_info(f"Found {summary.total} warnings, no errors")
+            return True
+
         if self.mode == Mode.CI:
-            self.print_error("Found prohibited logging methods. Please use AppLogger.d() or AppLogger.e() instead:")
-            for violation in self.violations:
-                print(violation)
             return False
         else:
-            self.print_error("Found prohibited logging methods.")
-            print("Offending lines:")
-            for violation in self.violations:
-                print(f"  {violation}")
-            
             if self.auto_fix:
                 self.print_info("Attempting automatic fixes...")
                 fixed_count = 0
-                
-                for violation in self.violations:
-                    success, fix_message = self.fix_violation(violation)
-                    if success:
-                        self.print_info(f"Fixed {fix_message} in {violation.file_path}:{violation.line_number}")
-                        fixed_count += 1
-                    else:
-                        self.print_error(f"Failed to fix {violation.file_path}:{violation.line_number} - {fix_message}")
-                
+                unfixed_errors = 0
+                bytes_written = 0
+                files_written = 0
+
+                for result in self.fix_files(self.violations):
+                    for violation, success, fix_message in result.outcomes:
+                        if success:
+                            self.print_info(f"Fixed {fix_message} in {violation.file_path}:{violation.line_number}")
+                            fixed_count += 1
+                        else:
+                            self.print_error(f"Failed to fix {violation.file_path}:{violation.line_number} - {fix_message}")
+                            rule = self.violation_rule(violation)
+                            unfixed_errors += rule is None or rule.severity == 'error'
+                    if result.import_added:
+                        self.print_info(f"Added AppLogger import to {result.file_path}")
+                    if result.bytes_written:
+                        bytes_written += result.bytes_written
+                        files_written += 1
+
+                self.print_info(f"Rewrote {bytes_written} bytes in {files_written} files.")
                 if fixed_count == len(self.violations):
                     self.print_info(f"Successfully fixed {fixed_count} violations.")
                     return True
                 else:
                     self.print_error(f"Fixed {fixed_count}/{len(self.violations)} violations.")
-                    return False
+                    # Warnings that can't be fixed don't fail the check
+                    return not unfixed_errors
             else:
                 return False
 
 
+class PackageResult:
+    """The outcome of checking one package of a monorepo."""
+
+    __slots__ = ('package', 'checker', 'files', 'violations', 'errors', 'seconds')
+
+    def __init__(self, package: DartPackage, checker: LoggingChecker, files: int,
+                 violations: List[LoggingViolation], errors: int, seconds: float):
+        self.package = package
+        self.checker = checker
+        self.files = files
+        self.violations = violations
+        self.errors = errors
+        self.seconds = seconds
+
+    def to_dict(self) -> Dict:
+        """Convert the counts and timing to a dictionary for machine-readable output."""
+        return {'package': self.package.name, 'root': self.package.root.replace(os.sep, '/'), 'files': self.files,
+                'violations': len(self.violations), 'errors': self.errors, 'seconds': round(self.seconds, 6)}
+
+
+class MonorepoChecker(LoggingChecker):
+    """Checks every Dart package of a repository, each with its own rules and imports.
+
+    Every package gets a LoggingChecker of its own for the package's
+    directories: a logging_rules.json in the package root replaces the shared
+    rules, scoped rule globs are relative to the package root, and fixes
+    import the package's own AppLogger. The packages are scanned concurrently
+    and reported as one, package by package.
+    """
+
+    def __init__(self, packages: List[DartPackage], directories: List[str], rules: Optional[List[Rule]] = None,
+                 jobs: int = 1, cache_file: Optional[str] = None, excludes: Optional[List[str]] = None,
+                 use_git: bool = True, **options):
+        """Initialize the checker.
+
+        Args:
+            packages: The packages to check
+            directories: Directories to scan, relative to each package root
+            rules: The shared rules, or None for the default rules
+            jobs: Number of worker processes, split between the packages scanned at once
+            cache_file: Scan cache location; relative paths are relative to each
+                package root. None disables the cache.
+            excludes: Globs of files and directories to skip
+            use_git: Whether file discovery may use `git ls-files`
+            **options: Further LoggingChecker arguments, used for every package
+
+        Raises:
+            OSError: If the rule configuration of a package can't be read
+            ValueError: If it is invalid
+        """
+        shared_rules = rules if rules is not None else self.default_rules()
+        self.packages = packages
+        self.workers = max(1, min(jobs, len(packages)))
+        self.package_checkers: List[LoggingChecker] = []
+        for package in packages:
+            # Nested packages are checked on their own
+            nested = [other.root for other in packages if other is not package and package.root != other.root
+                      and not os.path.relpath(other.root, package.root).startswith('..')]
+            package_cache = None
+            if cache_file:
+                package_cache = (f"{cache_file}.{package.name}" if os.path.isabs(cache_file)
+                                 else os.path.join(package.root, cache_file))
+            self.package_checkers.append(LoggingChecker(
+                [os.path.normpath(os.path.join(package.root, directory)) for directory in directories],
+                jobs=max(1, jobs // self.workers), cache_file=package_cache,
+                excludes=list(excludes or []) + nested, use_git=use_git, rules=package.rules(shared_rules),
+                package=package.name, package_root=package.root, **options))
+
+        # Violations are reported with the rules of their package; these only describe the rule ids
+        reported_rules: Dict[str, Rule] = {}
+        for rule in itertools.chain(shared_rules, *(checker.rules for checker in self.package_checkers)):
+            reported_rules.setdefault(rule.rule_id, rule)
+        super().__init__([os.path.join(package.root, directory) for package in packages for directory in directories],
+                         jobs=jobs, excludes=excludes, use_git=use_git, rules=list(reported_rules.values()), **options)
+        self.package_results: List[PackageResult] = []
+        self.file_checkers: Dict[str, LoggingChecker] = {}
+
+    def check_package(self, package: DartPackage, checker: LoggingChecker) -> PackageResult:
+        """Find the violations of a single package.
+
+        Args:
+            package: The package
+            checker: The package's checker
+
+        Returns:
+            Its violations, with the counts and timing of the scan
+        """
+        started = time.perf_counter()
+        by_file = checker.find_violations_by_file()
+        violations = [violation for _, file_violations in by_file for violation in file_violations]
+        errors = sum(1 for violation in violations
+                     if checker.rules_by_id[violation.violation_type].severity == 'error')
+        return PackageResult(package, checker, len(by_file), violations, errors, time.perf_counter() - started)
+
+    def iter_violations(self) -> Iterator[LoggingViolation]:
+        """Find logging violations in every package, scanning up to `jobs` packages at once.
+
+        Yields:
+            Violations, package by package in root order
+        """
+        self.package_results = []
+        self.file_checkers = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for result in pool.map(self.check_package, self.packages, self.package_checkers):
+                self.package_results.append(result)
+                for violation in result.violations:
+                    self.file_checkers[violation.file_path] = result.checker
+                yield from result.violations
+        self.print_package_summary()
+
+    def print_package_summary(self) -> None:
+        """Print the counts and timing of every package."""
+        count = len(self.package_results)
+        self.print_info(f"Checked {count} package{'' if count == 1 else 's'}")
+        width = max(len(result.package.name) for result in self.package_results)
+        for result in self.package_results:
+            print(f"  {result.package.name:<{width}}  {result.files:6d} files  {len(result.violations):6d} violations  "
+                  f"{result.seconds * 1000:8.1f} ms  {result.package.root}", file=self.message_stream)
+
+    def package_summaries(self) -> Optional[List[Dict]]:
+        return [result.to_dict() for result in self.package_results]
+
+    def violation_rule(self, violation: LoggingViolation) -> Optional[Rule]:
+        checker = self.file_checkers.get(violation.file_path, self)
+        return checker.rules_by_id.get(violation.violation_type)
+
+    def fix_files(self, violations: List[LoggingViolation], write: bool = True) -> List[FileFixResult]:
+        """Fix violations with the checker of the package holding each file.
+
+        Args:
+            violations: The violations to fix, found by iter_violations
+            write: Whether to write the files, see LoggingChecker.fix_file
+
+        Returns:
+            Fix results per file, package by package
+        """
+        by_checker: Dict[int, Tuple[LoggingChecker, List[LoggingViolation]]] = {}
+        for violation in violations:
+            checker = self.file_checkers[violation.file_path]
+            by_checker.setdefault(id(checker), (checker, []))[1].append(violation)
+        results = []
+        for checker, package_violations in by_checker.values():
+            results.extend(checker.fix_files(package_violations, write))
+        return results
+
+
+# Checker used by scan worker processes, set up once per process
+_worker_checker: Optional[LoggingChecker] = None
+
+
+def _init_scan_worker(checker: LoggingChecker) -> None:
+    """Set up a scan worker process.
+
+    Args:
+        checker: The checker whose rules the worker applies
+    """
+    global _worker_checker
+    _worker_checker = checker
+
+
+def _scan_file_in_worker(file_path: Path, with_digest: bool = False) -> FileScanResult:
+    """Scan a single file in a worker process.
+
+    Args:
+        file_path: Path to the file to scan
+        with_digest: Whether to compute the content digest
+
+    Returns:
+        The scan result
+    """
+    return _worker_checker.scan_file_result(file_path, with_digest)
+
+
+# Library API: checks buffers held in memory, without touching the filesystem.
+# A checker only reads its compiled rules while scanning, so one checker can
+# serve any number of threads.
+
+_default_checker: Optional[LoggingChecker] = None
+_default_checker_lock = threading.Lock()
+
+
+def default_checker() -> LoggingChecker:
+    """Get the checker shared by the library API when none is given.
+
+    It has the rules of logging_rules.json next to this script, or the
+    built-in rules if that file is missing, compiled once per process.
+
+    Raises:
+        ValueError: If the rule configuration is invalid
+    """
+    global _default_checker
+    with _default_checker_lock:
+        if _default_checker is None:
+            _default_checker = LoggingChecker([], use_git=False, rules=configured_rules(None))
+        return _default_checker
+
+
+def check_source(source, path: str = '<memory>',
+                 checker: Optional[LoggingChecker] = None) -> List[LoggingViolation]:
+    """Find logging violations in a Dart source held in memory.
+
+    Args:
+        source: The source, as str or as raw UTF-8 bytes
+        path: Path reported for the violations, and matched by scoped rules
+        checker: Checker whose rules are applied, the default_checker() if None
+
+    Returns:
+        The violations, in line order
+    """
+    checker = checker or default_checker()
+    if isinstance(source, str):
+        header = source[:GENERATED_HEADER_SIZE].encode('utf-8', 'surrogateescape')
+        if not checker.matcher.may_match(source) or _is_generated_source(header):
+            return []
+        if '\r' in source:
+            source = source.replace('\r\n', '\n').replace('\r', '\n')
+        return checker.scan_text(path, source)
+    return checker.scan_bytes(Path(path), source).violations
+
+
+def check_many(sources: Iterable[Tuple[str, Any]],
+               checker: Optional[LoggingChecker] = None) -> Iterator[Tuple[str, List[LoggingViolation]]]:
+    """Find logging violations in many Dart sources held in memory.
+
+    Args:
+        sources: (path, source) pairs, see check_source
+        checker: Checker whose rules are applied, the default_checker() if None
+
+    Yields:
+        (path, violations) for every source, in order, as soon as it is checked
+    """
+    checker = checker or default_checker()
+    for path, source in sources:
+        yield path, check_source(source, path, checker)
+
+
+def fix_source(source: str, path: str = '<memory>', checker: Optional[LoggingChecker] = None,
+               package: Optional[str] = None) -> Tuple[str, List[LineEdit]]:
+    """Fix the logging violations of a Dart source held in memory, as --auto-fix would.
+
+    Violations that can't be fixed are left in place; check the new source to
+    find them.
+
+    Args:
+        source: The source
+        path: Path of the source, matched by scoped rules
+        checker: Checker whose rules are applied, the default_checker() if None
+        package: Name of the package whose AppLogger the fixes import; the
+            checker's package or DEFAULT_PACKAGE if None, never looked up on disk
+
+    Returns:
+        (new source, edits) tuple, where the edits are numbered by the lines of
+        the original source
+    """
+    checker = checker or default_checker()
+    violations = check_source(source, path, checker)
+    if not violations:
+        return source, []
+    lines = _split_lines(source)
+    result = checker.fix_lines(path, lines, violations, package or checker.package or DEFAULT_PACKAGE)
+    return ''.join(_apply_line_changes(lines, result.changes)), result.edits()
+
+
+def _split_lines(text: str) -> List[str]:
+    """Split text into lines like a file read with newline='', keeping the line endings."""
+    return io.StringIO(text, newline='').readlines()
+
+
+def positive_int(value: str) -> int:
+    """Parse a strictly positive integer command line argument."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def shard_spec(value: str) -> Tuple[int, int]:
+    """Parse a K/N shard command line argument."""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, got {value}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"K must be between 1 and N, got {value}")
+    return index, count
+
+
 def main():
     """Main entry point for the script."""
-    parser = argparse.ArgumentParser(description='Check for prohibited logging methods in Dart files.')
+    parser = argparse.ArgumentParser(description='Check for prohibited logging methods in Dart files.',
+                                     epilog='Query the violations recorded with --store with store_logging_standards.py.')
     parser.add_argument('--mode', choices=['local', 'ci'], default='local',
                         help='Operating mode: local or CI (default: local)')
     parser.add_argument('--auto-fix', action='store_true',
                         help='Automatically fix violations (only in local mode)')
     parser.add_argument('--directories', nargs='+', default=['lib', 'test'],
                         help='Directories to scan (default: lib test)')
+    parser.add_argument('--packages', nargs='*', metavar='DIR',
+                        help='Monorepo mode: check every Dart package with a pubspec.yaml under the DIRs (default: .), '
+                             'with --directories relative to each package root, the rules of a logging_rules.json '
+                             "in the package root if it has one, and fixes importing the package's own AppLogger")
+    parser.add_argument('--rules', metavar='PATH',
+                        help='Rule configuration file (default: logging_rules.json next to this script, '
+                             'or the built-in debugPrint and log rules if it is missing)')
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help='Skip files and directories matching a glob; can be given several times')
+    parser.add_argument('--jobs', type=positive_int, default=os.cpu_count() or 1,
+                        help='Number of parallel scan processes (default: CPU count)')
+    parser.add_argument('--readers', type=positive_int, metavar='N',
+                        help='Pipelined mode for slow or network filesystems: read files on N threads ahead '
+                             'of a single matching stage, instead of using --jobs worker processes')
+    parser.add_argument('--cache-file', default=DEFAULT_CACHE_FILE,
+                        help=f'Location of the persistent scan cache (default: {DEFAULT_CACHE_FILE})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Scan every file instead of reusing cached results')
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_FILE, metavar='PATH',
+                        help='Record the violations of every file in an SQLite store at PATH (default: '
+                             f'{DEFAULT_STORE_FILE}), updated incrementally, for store_logging_standards.py')
+    changes = parser.add_mutually_exclusive_group()
+    changes.add_argument('--staged', action='store_true',
+                         help='Only check lines staged for commit, as stored in the git index')
+    changes.add_argument('--changed-since', metavar='REF',
+                         help='Only check lines changed in the working tree since a git ref')
+    parser.add_argument('--emit-patch', nargs='?', const='-', metavar='PATH',
+                        help='Write the fixes as a patch to PATH, or stdout if omitted, without changing any '
+                             'file; apply it with git apply')
+    parser.add_argument('--patch-format', choices=['diff', 'json'], default='diff',
+                        help='Format of --emit-patch: a unified diff or a JSON list of line edits (default: diff)')
+    parser.add_argument('--format', choices=list(REPORTERS), default='text',
+                        help='Output format of the violations (default: text); sarif is suitable for code '
+                             'scanning upload, github annotates pull requests from GitHub Actions')
+    parser.add_argument('--shard', type=shard_spec, metavar='K/N',
+                        help='Only check the K-th of N shards of the files, assigned by a stable hash of '
+                             'their repository-relative path; combine the --format json results with --merge')
+    parser.add_argument('--merge', nargs='+', metavar='RESULT',
+                        help='Report the combined --format json results of all shards instead of checking files')
+    parser.add_argument('--max-violations', type=positive_int, metavar='N',
+                        help='Report at most N violations and summarize the rest per file and rule')
+    parser.add_argument('--fail-fast', action='store_true',
+                        help='Stop at the first file with an error, scanning files changed in git, then files '
+                             'with cached violations, newest first')
+    parser.add_argument('--time-budget', type=positive_int, metavar='MS',
+                        help='Stop after MS milliseconds, in the order of --fail-fast, and report whether every '
+                             'file was checked')
+    parser.add_argument('--context-width', type=positive_int, default=DEFAULT_CONTEXT_WIDTH, metavar='N',
+                        help='Report lines longer than N characters as N characters around the call, with '
+                             f'... marking the cut ends (default: {DEFAULT_CONTEXT_WIDTH})')
+    parser.add_argument('--stream-threshold', type=positive_int, default=STREAM_MIN_SIZE, metavar='BYTES',
+                        help='Scan files of at least BYTES window by window, in memory that does not grow with '
+                             f'the file, such as large generated sources (default: {STREAM_MIN_SIZE})')
+    parser.add_argument('--stats', action='store_true',
+                        help='Collect phase timings, counters and the slowest files; printed in local mode, '
+                             'written to a file in CI mode')
+    parser.add_argument('--stats-file', metavar='PATH',
+                        help='Write the statistics to PATH (default in CI mode: '
+                             f"{DEFAULT_STATS_FILES['json']} or {DEFAULT_STATS_FILES['openmetrics']})")
+    parser.add_argument('--stats-format', choices=sorted(DEFAULT_STATS_FILES), default='json',
+                        help='Format of the statistics file (default: json)')
+    parser.add_argument('--stats-top', type=positive_int, default=10, metavar='N',
+                        help='Number of slowest files to report (default: 10)')
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_PROFILE_FILE, metavar='PATH',
+                        help=f'Run under cProfile and write the stats to PATH (default: {DEFAULT_PROFILE_FILE}); '
+                             'scan worker processes are not profiled, use --jobs 1 to include them')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and report violations introduced and resolved as files change')
+    parser.add_argument('--poll', action='store_true',
+                        help='With --watch, poll for changes instead of using inotify')
+    parser.add_argument('--all-lines', action='store_true',
+                        help='With --staged or --changed-since, report unchanged lines of changed files too')
     args = parser.parse_args()
+    if args.watch and (args.auto_fix or args.staged or args.changed_since):
+        parser.error('--watch cannot be combined with --auto-fix, --staged or --changed-since')
+    if args.emit_patch and (args.auto_fix or args.staged or args.watch):
+        parser.error('--emit-patch cannot be combined with --auto-fix, --staged or --watch')
+    if args.merge and (args.shard or args.auto_fix or args.emit_patch or args.watch or args.staged
+                       or args.changed_since):
+        parser.error('--merge cannot be combined with --shard, --auto-fix, --emit-patch, --watch, '
+                     '--staged or --changed-since')
+    if args.shard and args.watch:
+        parser.error('--shard cannot be combined with --watch')
+    if (args.fail_fast or args.time_budget) and (args.auto_fix or args.emit_patch or args.watch or args.merge
+                                                 or args.packages is not None):
+        parser.error('--fail-fast and --time-budget cannot be combined with --auto-fix, --emit-patch, --watch, '
+                     '--merge or --packages')
+    if args.store and (args.watch or args.staged or args.changed_since or args.merge or args.packages is not None):
+        parser.error('--store cannot be combined with --watch, --staged, --changed-since, --merge or --packages')
+    if args.packages is not None and (args.watch or args.staged or args.changed_since or args.shard or args.merge
+                                      or args.stats or args.stats_file or args.profile):
+        parser.error('--packages cannot be combined with --watch, --staged, --changed-since, --shard, --merge, '
+                     '--stats, --stats-file or --profile')
 
     mode = Mode.LOCAL if args.mode == 'local' else Mode.CI
-    checker = LoggingChecker(args.directories, mode=mode, auto_fix=args.auto_fix)
-    
-    success = checker.check_and_fix()
+    try:
+        rules = configured_rules(args.rules)
+    except (OSError, ValueError) as e:
+        LoggingChecker([], mode=mode, output_format=args.format).print_error(f"Invalid rule configuration: {e}")
+        sys.exit(1)
+
+    git_changes = None
+    if args.staged or args.changed_since:
+        git_changes = GitChanges(staged=args.staged, since=args.changed_since)
+
+    # Fixes are applied to the working tree, which differs from the index being checked
+    auto_fix = args.auto_fix and not args.staged
+    if args.packages is not None:
+        message_checker = LoggingChecker([], mode=mode, output_format=args.format, emit_patch=args.emit_patch)
+        roots = args.packages or [os.curdir]
+        packages = _package_index.discover(roots, args.exclude)
+        if not packages:
+            message_checker.print_error(f"No {PUBSPEC_FILE} found under {', '.join(roots)}")
+            sys.exit(1)
+        try:
+            checker = MonorepoChecker(packages, args.directories, rules=rules, jobs=args.jobs,
+                                      cache_file=None if args.no_cache else args.cache_file, excludes=args.exclude,
+                                      mode=mode, auto_fix=auto_fix, output_format=args.format,
+                                      max_violations=args.max_violations, emit_patch=args.emit_patch,
+                                      patch_format=args.patch_format, readers=args.readers or 0,
+                                      context_width=args.context_width, stream_min_size=args.stream_threshold)
+        except (OSError, ValueError) as e:
+            message_checker.print_error(f"Invalid rule configuration: {e}")
+            sys.exit(1)
+        sys.exit(0 if checker.check_and_fix() else 1)
+
+    store = None
+    if args.store:
+        # The store's module imports this one, see the end of this file
+        from store_logging_standards import ViolationStore
+        store = ViolationStore(args.store)
+    checker = LoggingChecker(args.directories, mode=mode, auto_fix=auto_fix, jobs=args.jobs,
+                             cache_file=None if args.no_cache or git_changes or args.merge else args.cache_file,
+                             git_changes=git_changes, all_lines=args.all_lines, excludes=args.exclude,
+                             stats=ScanStats(args.stats_top) if args.stats or args.stats_file else None,
+                             output_format=args.format, max_violations=args.max_violations, rules=rules,
+                             emit_patch=args.emit_patch, patch_format=args.patch_format, shard=args.shard,
+                             readers=args.readers or 0, fail_fast=args.fail_fast,
+                             time_budget=args.time_budget / 1000 if args.time_budget else None,
+                             store=store, context_width=args.context_width,
+                             stream_min_size=args.stream_threshold)
+    if args.auto_fix and args.staged:
+        checker.print_info("--auto-fix is not available with --staged, only reporting violations")
+    if git_changes is not None:
+        checker.print_info(f"Checking {git_changes.describe()}")
+    if args.watch:
+        checker.watch(use_inotify=not args.poll)
+        sys.exit(0)
+    if args.merge:
+        try:
+            success = checker.merge_results(args.merge)
+        except (OSError, ValueError) as e:
+            checker.print_error(f"Cannot merge shard results: {e}")
+            sys.exit(1)
+        sys.exit(0 if success else 1)
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        success = checker.check_and_fix()
+    except subprocess.CalledProcessError as e:
+        checker.print_error(f"git failed: {e.stderr.decode('utf-8', 'replace').strip()}")
+        sys.exit(1)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            checker.print_info(f"Wrote profile to {args.profile} (view with: python3 -m pstats {args.profile})")
+    checker.report_stats(args.stats_file, args.stats_format)
     sys.exit(0 if success else 1)
 
 
 if __name__ == '__main__':
+    # The scripts built on the checker import it by name, and must get this module rather than a second copy
+    sys.modules.setdefault('check_logging_standards', sys.modules[__name__])
     main()
\ No newline at end of file
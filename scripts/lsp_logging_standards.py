@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Language server for check_logging_standards.py.
+
+Publishes the prohibited logging calls of the Dart documents open in an
+editor as diagnostics, and offers their fixes as code actions. Speaks LSP
+over stdin and stdout.
+"""
+
+import argparse
+import json
+import os
+import sys
+import urllib.parse
+import urllib.request
+from bisect import bisect_right
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from check_logging_standards import (
+    CHECKER_VERSION, DEFAULT_CONTEXT_WIDTH, GENERATED_HEADER_SIZE, DartLexer, ImportTable, LoggingChecker,
+    LoggingViolation, Mode, _excerpt, _is_generated_source, _package_index, _split_lines, configured_rules, positive_int
+)
+
+
+def _utf16_column(line: str, column: int) -> int:
+    """Convert a code point column of a line to the UTF-16 column used by LSP."""
+    if line.isascii():
+        return column
+    return len(line[:column].encode('utf-16-le')) // 2
+
+
+def _code_point_column(line: str, column: int) -> int:
+    """Convert a UTF-16 column of a line, as used by LSP, to a code point column."""
+    if line.isascii():
+        return min(column, len(line))
+    units = 0
+    for index, char in enumerate(line):
+        if units >= column:
+            return index
+        units += 2 if ord(char) > 0xFFFF else 1
+    return len(line)
+
+
+class LspDocument:
+    """An open document of the language server, with its violations per line.
+
+    Besides the lines, the document keeps whether the lexer is in plain code at
+    the start of each line. An edit is re-lexed from the last such line before
+    it, only until the lexer is in plain code again at a line start where it
+    was before the edit; from there on the old results still hold.
+    """
+
+    # Lines lexed past the edit at first, doubled until the lexer state agrees again
+    RELEX_WINDOW = 16
+
+    def __init__(self, checker: LoggingChecker, path: str, text: str):
+        """Initialize the document.
+
+        Args:
+            checker: The checker whose rules are applied
+            path: Path of the document, matched by scoped rules
+            text: The document contents
+        """
+        self.checker = checker
+        self.path = path
+        self.rules = [rule for rule in checker.rules if not rule.scoped or rule.applies_to(path, checker.package_root)]
+        if _is_generated_source(text[:GENERATED_HEADER_SIZE].encode('utf-8', 'surrogateescape')):
+            self.rules = []
+        self.lines: List[str] = []
+        self.clean: List[bool] = []  # Whether each line starts in plain code
+        self.hits: List[List[Tuple[str, int, int]]] = []  # (rule id, start, end) columns per line
+        self.relexed_lines = 0  # Lines lexed by the last update, for tuning and tests
+        self.imports: Optional[ImportTable] = None  # Parsed when needed, as any edit may change it
+        self.set_text(text)
+
+    @property
+    def text(self) -> str:
+        """The document contents."""
+        return ''.join(self.lines)
+
+    def set_text(self, text: str) -> None:
+        """Replace the whole document."""
+        self.lines = _split_lines(text)
+        self.clean = [True] + [False] * (len(self.lines) - 1) if self.lines else []
+        self.hits = [[] for _ in self.lines]
+        self.imports = None
+        self.relex(0, len(self.lines))
+
+    def apply_change(self, start: Tuple[int, int], end: Tuple[int, int], new_text: str) -> None:
+        """Replace a range of the document.
+
+        Args:
+            start: (line, UTF-16 column) where the range starts
+            end: (line, UTF-16 column) where the range ends
+            new_text: The replacement
+        """
+        def offset(line: int, column: int) -> Tuple[int, int]:
+            if line >= len(self.lines):
+                # Past the end: after the last line's ending, or at the end of an unterminated last line
+                if self.lines and not self.lines[-1].endswith(('\n', '\r')):
+                    return len(self.lines) - 1, len(self.lines[-1])
+                return len(self.lines), 0
+            return line, _code_point_column(self.lines[line].rstrip('\r\n'), column)
+
+        (start_line, start_column), (end_line, end_column) = offset(*start), offset(*end)
+        prefix = self.lines[start_line][:start_column] if start_line < len(self.lines) else ''
+        suffix = self.lines[end_line][end_column:] if end_line < len(self.lines) else ''
+        old_end = min(end_line + 1, len(self.lines))
+        replaced = _split_lines(prefix + new_text + suffix)
+
+        # The edit leaves the lexer state at the start of its first line alone
+        first_clean = self.clean[start_line] if start_line < len(self.clean) else not self.lines
+        self.lines[start_line:old_end] = replaced
+        self.clean[start_line:old_end] = [first_clean] + [False] * (len(replaced) - 1) if replaced else []
+        self.hits[start_line:old_end] = [[] for _ in replaced]
+        self.imports = None
+        self.relex(start_line, start_line + len(replaced))
+
+    def relex(self, first: int, changed_end: int) -> None:
+        """Update the lexer states and violations of the lines after an edit.
+
+        Args:
+            first: First changed line
+            changed_end: Line after the last changed one; the states of later
+                lines are those from before the edit
+        """
+        if self.lines:
+            self.clean[0] = True
+        anchor = min(first, len(self.lines) - 1)
+        while anchor > 0 and not self.clean[anchor]:
+            anchor -= 1
+        anchor = max(anchor, 0)
+
+        window = max(self.RELEX_WINDOW, 2 * (changed_end - anchor))
+        while True:
+            stop = min(len(self.lines), changed_end + window)
+            clean, code_starts, code_ends, offsets, text = self.lex(anchor, stop)
+            converged = stop
+            for line in range(max(changed_end, anchor + 1), stop):
+                if clean[line - anchor] and self.clean[line]:
+                    converged = line
+                    break
+            if converged < stop or stop == len(self.lines):
+                break
+            window *= 4
+
+        self.relexed_lines = stop - anchor
+        allowed = self.checker.matcher.combined
+        for line in range(anchor, converged):
+            self.clean[line] = clean[line - anchor]
+            line_text = self.lines[line]
+            hits = []
+            if allowed.search(line_text):
+                line_offset = offsets[line - anchor]
+                for rule in self.rules:
+                    for match in rule.regex.finditer(line_text):
+                        position = line_offset + match.start()
+                        index = bisect_right(code_starts, position) - 1
+                        if index >= 0 and position < code_ends[index]:
+                            hits.append((rule.rule_id, match.start(), match.end()))
+            self.hits[line] = hits
+
+    def lex(self, first: int, stop: int) -> Tuple[List[bool], List[int], List[int], List[int], str]:
+        """Lex a run of lines, starting in plain code.
+
+        Args:
+            first: First line, which starts in plain code
+            stop: Line after the last one
+
+        Returns:
+            (clean, code_starts, code_ends, offsets, text) tuple: whether each
+            line starts in plain code, the code regions, the offset of each line
+            and the lexed text
+        """
+        text = ''.join(self.lines[first:stop])
+        offsets = [0]
+        for line in self.lines[first:stop - 1]:
+            offsets.append(offsets[-1] + len(line))
+
+        code_starts, code_ends = [], []
+        # (position, depth change, inside) events, taking effect after their position. Interpolations
+        # end a string region with ${, and resume the string with a region starting at }.
+        events = []
+        for start, end, kind in DartLexer.iter_regions(text):
+            if kind == DartLexer.CODE:
+                code_starts.append(start)
+                code_ends.append(end)
+                continue
+            resumed = kind == DartLexer.STRING and text[start] == '}'
+            events.append((start, -1 if resumed else 0, True))
+            opened = kind == DartLexer.STRING and text.endswith('${', start, end)
+            events.append((end - 1, 1 if opened else 0, False))
+
+        # A line starts in plain code if no interpolation is open and no comment or string spans it
+        clean = []
+        depth = 0
+        inside = False
+        events_iter = iter(events)
+        event = next(events_iter, None)
+        for offset in offsets:
+            while event is not None and event[0] < offset:
+                depth += event[1]
+                inside = event[2]
+                event = next(events_iter, None)
+            clean.append(depth == 0 and not inside)
+        return clean, code_starts, code_ends, offsets, text
+
+    def violations(self, first: int = 0, stop: Optional[int] = None) -> List[LoggingViolation]:
+        """Get the violations of a range of lines, one per line and rule like a scan."""
+        violations = []
+        for line in range(first, len(self.lines) if stop is None else min(stop, len(self.lines))):
+            hits = self.resolved_hits(line)
+            if hits:
+                text = self.lines[line]
+                content = _excerpt(text, 0, len(text), min(start for _, start, _ in hits), self.checker.context_width)
+                violations.extend(LoggingViolation(self.path, line + 1, content, rule_id)
+                                  for rule_id in dict.fromkeys(rule_id for rule_id, _, _ in hits))
+        return violations
+
+    def resolved_hits(self, line: int) -> List[Tuple[str, int, int]]:
+        """Get the hits of a line, without the calls that don't resolve to their rule's libraries."""
+        hits = self.hits[line]
+        if not hits or not self.checker.import_rules:
+            return hits
+        if self.imports is None:
+            text = self.text
+            self.imports, _ = ImportTable.parse(text)
+            self.imports.declare(text, {rule.symbol for rule in self.checker.import_rules})
+        rules = self.checker.rules_by_id
+        return [(rule_id, start, end) for rule_id, start, end in hits
+                if not rules[rule_id].libraries
+                or self.imports.resolves_span(rules[rule_id], self.lines[line], start, end)]
+
+    def position(self, line: int, column: int) -> Dict:
+        """Get the LSP position of a code point column of a line."""
+        if line >= len(self.lines):
+            return {'line': line, 'character': 0}
+        return {'line': line, 'character': _utf16_column(self.lines[line], column)}
+
+    def diagnostics(self) -> List[Dict]:
+        """Get the LSP diagnostics of the document."""
+        rules = self.checker.rules_by_id
+        return [{
+            'range': {'start': self.position(line, start), 'end': self.position(line, end)},
+            'severity': 1 if rules[rule_id].severity == 'error' else 2,
+            'code': rule_id,
+            'source': 'logging-standards',
+            'message': rules[rule_id].message,
+        } for line in range(len(self.lines)) for rule_id, start, end in self.resolved_hits(line)]
+
+    def text_edits(self, violations: List[LoggingViolation]) -> Tuple[List[Dict], List[str]]:
+        """Compute the LSP text edits that fix violations, including imports.
+
+        Args:
+            violations: Violations of the document
+
+        Returns:
+            (edits, fix types) tuple, with the fix type of every fixed violation
+        """
+        result = self.checker.fix_lines(self.path, self.lines, violations)
+        edits = []
+        for start, end, new_lines in result.changes:
+            if end < len(self.lines) or self.lines[-1].endswith(('\n', '\r')):
+                end_position = {'line': end, 'character': 0}
+            else:
+                end_position = self.position(end - 1, len(self.lines[end - 1]))
+            edits.append({'range': {'start': {'line': start, 'character': 0}, 'end': end_position},
+                          'newText': ''.join(new_lines)})
+        return edits, [message for _, success, message in result.outcomes if success]
+
+
+class LspServer:
+    """Language server publishing logging violations of open Dart documents.
+
+    Speaks JSON-RPC over a pair of byte streams, with LSP's Content-Length
+    framing. Documents are synced incrementally, and fixes are offered as
+    code actions.
+    """
+
+    def __init__(self, checker: LoggingChecker, reader=None, writer=None):
+        """Initialize the server.
+
+        Args:
+            checker: The checker whose rules are applied
+            reader: Binary input stream, stdin by default
+            writer: Binary output stream, stdout by default
+        """
+        self.checker = checker
+        self.reader = reader or sys.stdin.buffer
+        self.writer = writer or sys.stdout.buffer
+        self.documents: Dict[str, LspDocument] = {}
+        self.package_checkers: Dict[str, LoggingChecker] = {}  # By package root
+        self.root: Optional[str] = None
+        self.shutdown_requested = False
+        self.handlers: Dict[str, Callable[[Dict], Any]] = {
+            'initialize': self.initialize,
+            'shutdown': self.shutdown,
+            'textDocument/didOpen': self.did_open,
+            'textDocument/didChange': self.did_change,
+            'textDocument/didClose': self.did_close,
+            'textDocument/codeAction': self.code_action,
+        }
+
+    def read_message(self) -> Optional[Dict]:
+        """Read a message, or return None at the end of the input."""
+        length = None
+        while True:
+            header = self.reader.readline()
+            if not header:
+                return None
+            header = header.strip()
+            if not header:
+                break
+            name, _, value = header.decode('ascii').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        if length is None:
+            raise ValueError("message without Content-Length")
+        return json.loads(self.reader.read(length).decode('utf-8'))
+
+    def send(self, message: Dict) -> None:
+        """Write a message."""
+        body = json.dumps({'jsonrpc': '2.0', **message}).encode('utf-8')
+        self.writer.write(b'Content-Length: %d\r\n\r\n' % len(body) + body)
+        self.writer.flush()
+
+    def serve(self) -> int:
+        """Handle messages until the client exits.
+
+        Returns:
+            The exit code: 0 after a shutdown request, 1 otherwise
+        """
+        while True:
+            message = self.read_message()
+            if message is None or message.get('method') == 'exit':
+                return 0 if self.shutdown_requested else 1
+            handler = self.handlers.get(message.get('method'))
+            is_request = 'id' in message
+            try:
+                if handler is None:
+                    if is_request:
+                        self.send({'id': message['id'], 'error': {'code': -32601, 'message': 'Method not found'}})
+                    continue
+                result = handler(message.get('params') or {})
+            except Exception as e:
+                if is_request:
+                    self.send({'id': message['id'], 'error': {'code': -32603, 'message': str(e)}})
+                continue
+            if is_request:
+                self.send({'id': message['id'], 'result': result})
+
+    def initialize(self, params: Dict) -> Dict:
+        """Answer the capabilities of the server."""
+        root = params.get('rootUri') or next((folder['uri'] for folder in params.get('workspaceFolders') or []), None)
+        self.root = self.uri_path(root) if root else params.get('rootPath')
+        return {
+            'capabilities': {
+                'textDocumentSync': {'openClose': True, 'change': 2},  # Incremental
+                'codeActionProvider': {'codeActionKinds': ['quickfix', 'source.fixAll']},
+            },
+            'serverInfo': {'name': 'check_logging_standards', 'version': CHECKER_VERSION},
+        }
+
+    def shutdown(self, params: Dict) -> None:
+        """Prepare for the exit notification."""
+        self.shutdown_requested = True
+
+    @staticmethod
+    def uri_path(uri: str) -> str:
+        """Get the file system path of a file URI."""
+        parsed = urllib.parse.urlparse(uri)
+        return urllib.request.url2pathname(urllib.parse.unquote(parsed.path)) if parsed.scheme == 'file' else uri
+
+    def document_path(self, uri: str) -> str:
+        """Get the path of a document, relative to the workspace root if it is inside it."""
+        path = self.uri_path(uri)
+        if self.root and os.path.isabs(path):
+            relative = os.path.relpath(path, self.root)
+            if not relative.startswith('..'):
+                return relative
+        return path
+
+    def package_checker(self, path: str) -> Optional[LoggingChecker]:
+        """Get the checker of the package holding a file, with the package's rules and AppLogger import.
+
+        Args:
+            path: Absolute path of the file
+
+        Returns:
+            The checker, or None if the file is in no package
+        """
+        package = _package_index.package_of(path)
+        if package is None:
+            return None
+        if package.root not in self.package_checkers:
+            try:
+                rules = package.rules(self.checker.rules)
+            except (OSError, ValueError):
+                rules = self.checker.rules
+            self.package_checkers[package.root] = LoggingChecker([], mode=self.checker.mode, use_git=False,
+                                                                 rules=rules, package=package.name,
+                                                                 package_root=package.root,
+                                                                 context_width=self.checker.context_width)
+        return self.package_checkers[package.root]
+
+    def publish(self, uri: str) -> None:
+        """Send the diagnostics of a document."""
+        document = self.documents.get(uri)
+        self.send({'method': 'textDocument/publishDiagnostics',
+                   'params': {'uri': uri, 'diagnostics': document.diagnostics() if document else []}})
+
+    def did_open(self, params: Dict) -> None:
+        """Start tracking a document."""
+        item = params['textDocument']
+        if not item['uri'].endswith('.dart'):
+            return
+        path = self.uri_path(item['uri'])
+        checker = self.package_checker(path) if os.path.isabs(path) else None
+        if checker is not None:
+            self.documents[item['uri']] = LspDocument(checker, path, item['text'])
+        else:
+            self.documents[item['uri']] = LspDocument(self.checker, self.document_path(item['uri']), item['text'])
+        self.publish(item['uri'])
+
+    def did_change(self, params: Dict) -> None:
+        """Apply edits to a document and publish its new diagnostics."""
+        uri = params['textDocument']['uri']
+        document = self.documents.get(uri)
+        if document is None:
+            return
+        for change in params['contentChanges']:
+            if 'range' in change:
+                start, end = change['range']['start'], change['range']['end']
+                document.apply_change((start['line'], start['character']), (end['line'], end['character']),
+                                      change['text'])
+            else:
+                document.set_text(change['text'])
+        self.publish(uri)
+
+    def did_close(self, params: Dict) -> None:
+        """Stop tracking a document and clear its diagnostics."""
+        uri = params['textDocument']['uri']
+        if self.documents.pop(uri, None) is not None:
+            self.publish(uri)
+
+    def code_action(self, params: Dict) -> List[Dict]:
+        """Offer fixes for the violations in a range, and for the whole document."""
+        uri = params['textDocument']['uri']
+        document = self.documents.get(uri)
+        if document is None:
+            return []
+        fixable = [violation for violation in document.violations()
+                   if document.checker.rules_by_id[violation.violation_type].fix is not None]
+        first, stop = params['range']['start']['line'], params['range']['end']['line'] + 1
+
+        actions = []
+        for violation in fixable:
+            if first <= violation.line_number - 1 < stop:
+                edits, fix_types = document.text_edits([violation])
+                if edits:
+                    actions.append({'title': f"Fix {fix_types[0]}", 'kind': 'quickfix',
+                                    'edit': {'changes': {uri: edits}}})
+        if len(fixable) > 1:
+            edits, fix_types = document.text_edits(fixable)
+            actions.append({'title': f"Fix all {len(fix_types)} prohibited logging calls", 'kind': 'source.fixAll',
+                            'edit': {'changes': {uri: edits}}})
+        return actions
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description='Run a language server on stdin and stdout, publishing the '
+                                                 'prohibited logging calls of the open Dart documents as '
+                                                 'diagnostics and offering fixes as code actions.')
+    parser.add_argument('--mode', choices=['local', 'ci'], default='local',
+                        help='Operating mode: local or CI (default: local)')
+    parser.add_argument('--rules', metavar='PATH',
+                        help='Rule configuration file (default: logging_rules.json next to the checker, '
+                             'or the built-in debugPrint and log rules if it is missing)')
+    parser.add_argument('--context-width', type=positive_int, default=DEFAULT_CONTEXT_WIDTH, metavar='N',
+                        help='Report lines longer than N characters as N characters around the call, with '
+                             f'... marking the cut ends (default: {DEFAULT_CONTEXT_WIDTH})')
+    args = parser.parse_args()
+
+    mode = Mode.LOCAL if args.mode == 'local' else Mode.CI
+    try:
+        rules = configured_rules(args.rules)
+    except (OSError, ValueError) as e:
+        LoggingChecker([], mode=mode).print_error(f"Invalid rule configuration: {e}")
+        sys.exit(1)
+    sys.exit(LspServer(LoggingChecker([], mode=mode, use_git=False, rules=rules,
+                                      context_width=args.context_width)).serve())
+
+
+if __name__ == '__main__':
+    main()
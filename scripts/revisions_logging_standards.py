@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Revision history checks for check_logging_standards.py.
+
+Checks the Dart files of any git revision, or reports the violations every
+commit of a range introduced and removed, reading blobs through one
+long-lived git cat-file process instead of checking anything out.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from check_logging_standards import (
+    DEFAULT_CONTEXT_WIDTH, PUBSPEC_FILE, REPORTERS, STREAM_MIN_SIZE, LoggingChecker, LoggingViolation, Mode,
+    _match_violations, configured_rules, positive_int
+)
+
+
+class GitObjectStore:
+    """Reads git objects through one long-lived `git cat-file --batch` process.
+
+    Parsed trees and the trees of commits are remembered by object id, since
+    neighbouring commits share most of them.
+    """
+
+    # Modes of regular files and directories in tree objects; links and submodules are skipped
+    FILE_MODES = (b'100644', b'100755')
+    TREE_MODE = b'40000'
+
+    def __init__(self):
+        """Start the git cat-file process.
+
+        Raises:
+            OSError: If git can't be started
+        """
+        self.process = subprocess.Popen(['git', 'cat-file', '--batch'], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.trees: Dict[str, List[Tuple[bool, str, str]]] = {}
+        self.commit_trees: Dict[str, str] = {}
+        self.objects_read = 0
+
+    def read(self, name: str) -> Tuple[str, str, bytes]:
+        """Read an object.
+
+        Args:
+            name: Object id, or any object name git accepts, such as HEAD^{tree}
+
+        Returns:
+            (object id, type, contents) tuple
+
+        Raises:
+            KeyError: If there is no such object
+            OSError: If git cat-file exited, e.g. outside a git work tree
+        """
+        self.process.stdin.write(name.encode('utf-8', 'surrogateescape') + b'\n')
+        self.process.stdin.flush()
+        header = self.process.stdout.readline()
+        if not header:
+            raise OSError("git cat-file exited")
+        fields = header.split()
+        if len(fields) != 3:
+            raise KeyError(name)  # "<name> missing" or "<name> ambiguous"
+        size = int(fields[2])
+        data = self.process.stdout.read(size + 1)[:size]
+        self.objects_read += 1
+        return fields[0].decode('ascii'), fields[1].decode('ascii'), data
+
+    def tree(self, tree_id: str) -> List[Tuple[bool, str, str]]:
+        """Get the entries of a tree.
+
+        Args:
+            tree_id: Object id of the tree
+
+        Returns:
+            (is tree, name, object id) for every file and subtree, in git's order
+        """
+        entries = self.trees.get(tree_id)
+        if entries is None:
+            _, _, data = self.read(tree_id)
+            entries = []
+            offset = 0
+            while offset < len(data):
+                space = data.index(b' ', offset)
+                nul = data.index(b'\0', space)
+                mode = data[offset:space]
+                if mode == self.TREE_MODE or mode in self.FILE_MODES:
+                    entries.append((mode == self.TREE_MODE, data[space + 1:nul].decode('utf-8', 'surrogateescape'),
+                                    data[nul + 1:nul + 21].hex()))
+                offset = nul + 21
+            self.trees[tree_id] = entries
+        return entries
+
+    def commit(self, name: str) -> Tuple[str, str, List[str], str]:
+        """Read a commit.
+
+        Args:
+            name: Any name of the commit
+
+        Returns:
+            (commit id, tree id, parent ids, subject) tuple
+
+        Raises:
+            KeyError: If there is no such commit
+        """
+        commit_id, _, data = self.read(f"{name}^{{commit}}")
+        headers, _, message = data.decode('utf-8', 'replace').partition('\n\n')
+        tree_id = ''
+        parents = []
+        for header in headers.splitlines():
+            key, _, value = header.partition(' ')
+            if key == 'tree':
+                tree_id = value
+            elif key == 'parent':
+                parents.append(value)
+        self.commit_trees[commit_id] = tree_id
+        return commit_id, tree_id, parents, message.split('\n', 1)[0]
+
+    def commit_tree(self, commit_id: str) -> str:
+        """Get the tree id of a commit."""
+        if commit_id not in self.commit_trees:
+            self.commit(commit_id)
+        return self.commit_trees[commit_id]
+
+    def close(self) -> None:
+        """Stop the git cat-file process."""
+        self.process.stdin.close()
+        self.process.wait()
+        self.process.stdout.close()
+
+
+class CommitChanges:
+    """Violations a commit introduced and removed, compared to its first parent."""
+
+    __slots__ = ('commit', 'subject', 'introduced', 'removed')
+
+    def __init__(self, commit: str, subject: str, introduced: List[LoggingViolation],
+                 removed: List[LoggingViolation]):
+        self.commit = commit
+        self.subject = subject
+        self.introduced = introduced
+        self.removed = removed
+
+    def to_dict(self) -> Dict:
+        """Get the changes as a JSON-serializable dict."""
+        return {'commit': self.commit, 'subject': self.subject,
+                'introduced': [violation.to_dict() for violation in self.introduced],
+                'removed': [violation.to_dict() for violation in self.removed]}
+
+
+class RevisionScanner:
+    """Finds violations in git revisions straight from the object store, without a checkout.
+
+    The violations of a blob are remembered by blob id, so a file is scanned
+    once however many commits share it, and commits are compared to their
+    parent tree by tree, skipping every subtree whose id didn't change.
+    Violations are matched between the two sides by rule and line content, so
+    moving a call, or the lines around it, neither introduces nor removes it.
+    """
+
+    def __init__(self, checker: LoggingChecker, store: Optional[GitObjectStore] = None):
+        """Initialize the scanner.
+
+        Args:
+            checker: The checker whose directories, excludes and rules are applied
+            store: Object store to read from, a new one by default
+
+        Raises:
+            subprocess.CalledProcessError: If git fails, e.g. outside a work tree
+        """
+        self.checker = checker
+        # Paths in trees are relative to the repository root, paths reported relative to the working directory
+        prefix = subprocess.run(['git', 'rev-parse', '--show-prefix'], stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, check=True).stdout
+        self.prefix = prefix.decode('utf-8', 'surrogateescape').strip()
+        self.directories = []
+        for directory in checker.directories:
+            directory = os.path.normpath(os.path.join(self.prefix, directory)).replace(os.sep, '/')
+            self.directories.append('' if directory == '.' else directory)
+        self.store = store or GitObjectStore()
+        self.blob_violations: Dict[Tuple[str, Tuple[bool, ...]], List[Tuple[int, str, str]]] = {}
+        self.blobs_scanned = 0
+        self.blobs_reused = 0
+
+    def close(self) -> None:
+        """Stop reading from the object store."""
+        self.store.close()
+
+    def local_path(self, path: str) -> str:
+        """Get the path relative to the working directory of a path relative to the repository root."""
+        return os.path.relpath(path, self.prefix) if self.prefix else path
+
+    def wanted(self, path: str, name: str, is_tree: bool, package_root: bool) -> bool:
+        """Check whether a tree entry holds files to check.
+
+        Args:
+            path: Path of the entry relative to the repository root
+            name: Its name
+            is_tree: Whether it is a tree
+            package_root: Whether its tree holds a pubspec.yaml
+
+        Returns:
+            True for checked files, and trees that are or lead to checked directories
+        """
+        for directory in self.directories:
+            if not directory or path == directory or path.startswith(directory + '/'):
+                return not self.checker.finder.is_excluded(self.local_path(path), name, is_tree, package_root)
+        return is_tree and any(directory.startswith(path + '/') for directory in self.directories)
+
+    def diff(self, old_tree: Optional[str], new_tree: Optional[str],
+             path: str = '') -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """Find the checked files that differ between two trees.
+
+        Args:
+            old_tree: Object id of the old tree, None for an empty tree
+            new_tree: Object id of the new tree, None for an empty tree
+            path: Path of the trees relative to the repository root
+
+        Yields:
+            (path, old blob id, new blob id) for every changed file, in path
+            order; the blob id is None on the side that doesn't have the file
+        """
+        if old_tree == new_tree:
+            return
+        old = {name: (is_tree, object_id) for is_tree, name, object_id in self.store.tree(old_tree)} if old_tree else {}
+        new = {name: (is_tree, object_id) for is_tree, name, object_id in self.store.tree(new_tree)} if new_tree else {}
+        package_root = PUBSPEC_FILE in new or PUBSPEC_FILE in old
+        for name in sorted(old.keys() | new.keys()):
+            old_entry, new_entry = old.get(name), new.get(name)
+            if old_entry == new_entry:
+                continue  # Unchanged file or subtree
+            child = f"{path}/{name}" if path else name
+            old_subtree = old_entry[1] if old_entry and old_entry[0] else None
+            new_subtree = new_entry[1] if new_entry and new_entry[0] else None
+            if (old_subtree or new_subtree) and self.wanted(child, name, True, package_root):
+                yield from self.diff(old_subtree, new_subtree, child)
+            old_blob = old_entry[1] if old_entry and not old_entry[0] else None
+            new_blob = new_entry[1] if new_entry and not new_entry[0] else None
+            if (old_blob or new_blob) and self.wanted(child, name, False, package_root):
+                yield child, old_blob, new_blob
+
+    def violations(self, path: str, blob_id: str) -> List[LoggingViolation]:
+        """Get the violations of a file, scanning its blob only if it wasn't scanned before.
+
+        Args:
+            path: Path of the file relative to the repository root
+            blob_id: Object id of its contents
+
+        Returns:
+            The violations, with paths relative to the working directory
+        """
+        local_path = self.local_path(path)
+        # The same blob can fall under different scoped rules at another path
+        scope = tuple(rule.applies_to(local_path, self.checker.package_root)
+                      for rule in self.checker.scoped_rules.values())
+        found = self.blob_violations.get((blob_id, scope))
+        if found is None:
+            _, _, data = self.store.read(blob_id)
+            found = [(violation.line_number, violation.line_content, violation.violation_type)
+                     for violation in self.checker.scan_bytes(Path(local_path), data).violations]
+            self.blob_violations[(blob_id, scope)] = found
+            self.blobs_scanned += 1
+        else:
+            self.blobs_reused += 1
+        return [LoggingViolation(local_path, line_number, line, violation_type)
+                for line_number, line, violation_type in found]
+
+    def revision_violations(self, revision: str) -> Iterator[LoggingViolation]:
+        """Find the violations of every checked file of a revision.
+
+        Args:
+            revision: Any tree-ish, such as a commit, branch or tag
+
+        Yields:
+            Violations, file by file in path order
+
+        Raises:
+            ValueError: If the revision doesn't name a tree
+        """
+        try:
+            tree_id, _, _ = self.store.read(f"{revision}^{{tree}}")
+        except KeyError:
+            raise ValueError(f"{revision} is not a commit or tree")
+        for path, _, blob_id in self.diff(None, tree_id):
+            yield from self.violations(path, blob_id)
+
+    def range_changes(self, revision_range: str) -> Iterator[CommitChanges]:
+        """Find the violations every commit of a range introduced and removed.
+
+        Merge commits are skipped; the commits of merged branches are compared
+        to their own parents instead.
+
+        Args:
+            revision_range: Commit range for git rev-list, such as main..HEAD
+
+        Yields:
+            The changes of every commit, oldest first
+
+        Raises:
+            subprocess.CalledProcessError: If git rev-list rejects the range
+        """
+        commits = subprocess.run(['git', 'rev-list', '--reverse', '--no-merges', revision_range, '--'],
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True).stdout.decode().split()
+        for commit_id in commits:
+            _, tree_id, parents, subject = self.store.commit(commit_id)
+            parent_tree = self.store.commit_tree(parents[0]) if parents else None
+            old: List[LoggingViolation] = []
+            new: List[LoggingViolation] = []
+            for path, old_blob, new_blob in self.diff(parent_tree, tree_id):
+                if old_blob:
+                    old.extend(self.violations(path, old_blob))
+                if new_blob:
+                    new.extend(self.violations(path, new_blob))
+            _, introduced, resolved = _match_violations(new, ((v.violation_type, v.line_content, v) for v in old))
+            yield CommitChanges(commit_id, subject, introduced, resolved)
+
+
+def check_revision(checker: LoggingChecker, revision: str) -> bool:
+    """Check the files of a git revision, read from the object store instead of the working tree.
+
+    Args:
+        checker: The checker whose directories, rules and output format are applied
+        revision: Any tree-ish, such as a commit, branch or tag
+
+    Returns:
+        True if no error violations were found, False otherwise
+
+    Raises:
+        ValueError: If the revision doesn't name a tree
+        subprocess.CalledProcessError: If git fails
+    """
+    scanner = RevisionScanner(checker)
+    try:
+        summary = checker.report_violations(scanner.revision_violations(revision))
+    finally:
+        scanner.close()
+    if not summary.total:
+        checker.print_success(f"No prohibited logging methods found in {revision}")
+    return not summary.errors
+
+
+def check_range(checker: LoggingChecker, revision_range: str) -> bool:
+    """Report the violations every commit of a range introduced and removed.
+
+    Args:
+        checker: The checker whose directories, rules and output format are applied
+        revision_range: Commit range for git rev-list, such as main..HEAD
+
+    Returns:
+        True if no commit introduced an error violation, False otherwise
+
+    Raises:
+        subprocess.CalledProcessError: If git fails
+    """
+    scanner = RevisionScanner(checker)
+    commits = []
+    introduced_errors = 0
+    try:
+        for changes in scanner.range_changes(revision_range):
+            commits.append(changes)
+            for violation in changes.introduced:
+                rule = checker.violation_rule(violation)
+                introduced_errors += rule is None or rule.severity == 'error'
+            if not changes.introduced and not changes.removed:
+                continue
+            if checker.output_format == 'jsonl':
+                print(json.dumps(changes.to_dict()))
+            elif checker.output_format == 'text':
+                print(f"{changes.commit[:12]} {changes.subject}")
+                for violation in changes.introduced:
+                    print(f"  + {violation}")
+                for violation in changes.removed:
+                    print(f"  - {violation}")
+    finally:
+        scanner.close()
+
+    summary = {'commits': len(commits), 'introduced': sum(len(changes.introduced) for changes in commits),
+               'removed': sum(len(changes.removed) for changes in commits)}
+    if checker.output_format == 'json':
+        json.dump({'commits': [changes.to_dict() for changes in commits if changes.introduced or changes.removed],
+                   'summary': summary}, sys.stdout, indent=2)
+        print()
+    elif checker.output_format == 'jsonl':
+        print(json.dumps({'summary': summary}))
+    checker.print_info(f"{summary['introduced']} violations introduced and {summary['removed']} removed "
+                       f"in {summary['commits']} commits of {revision_range} "
+                       f"({scanner.blobs_scanned} files scanned, {scanner.blobs_reused} reused)")
+    return not introduced_errors
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description='Check git revisions for prohibited logging methods, reading '
+                                                 'Dart files from the object store without a checkout.')
+    revisions = parser.add_mutually_exclusive_group(required=True)
+    revisions.add_argument('--rev', metavar='TREE-ISH',
+                           help='Check the files of a git revision')
+    revisions.add_argument('--range', metavar='A..B',
+                           help='Report the violations every commit of a git range introduced and removed')
+    parser.add_argument('--mode', choices=['local', 'ci'], default='local',
+                        help='Operating mode: local or CI (default: local)')
+    parser.add_argument('--directories', nargs='+', default=['lib', 'test'],
+                        help='Directories to scan (default: lib test)')
+    parser.add_argument('--rules', metavar='PATH',
+                        help='Rule configuration file (default: logging_rules.json next to the checker, '
+                             'or the built-in debugPrint and log rules if it is missing)')
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help='Skip files and directories matching a glob; can be given several times')
+    parser.add_argument('--format', choices=list(REPORTERS), default='text',
+                        help='Output format of the violations (default: text); --range supports text, json and '
+                             'jsonl')
+    parser.add_argument('--max-violations', type=positive_int, metavar='N',
+                        help='With --rev, report at most N violations and summarize the rest per file and rule')
+    parser.add_argument('--context-width', type=positive_int, default=DEFAULT_CONTEXT_WIDTH, metavar='N',
+                        help='Report lines longer than N characters as N characters around the call, with '
+                             f'... marking the cut ends (default: {DEFAULT_CONTEXT_WIDTH})')
+    parser.add_argument('--stream-threshold', type=positive_int, default=STREAM_MIN_SIZE, metavar='BYTES',
+                        help='Scan files of at least BYTES window by window, in memory that does not grow with '
+                             f'the file (default: {STREAM_MIN_SIZE})')
+    args = parser.parse_args()
+    if args.range and args.format not in ('text', 'json', 'jsonl'):
+        parser.error('--range only supports --format text, json or jsonl')
+
+    mode = Mode.LOCAL if args.mode == 'local' else Mode.CI
+    try:
+        rules = configured_rules(args.rules)
+    except (OSError, ValueError) as e:
+        LoggingChecker([], mode=mode, output_format=args.format).print_error(f"Invalid rule configuration: {e}")
+        sys.exit(1)
+    checker = LoggingChecker(args.directories, mode=mode, excludes=args.exclude, output_format=args.format,
+                             max_violations=args.max_violations, rules=rules, context_width=args.context_width,
+                             stream_min_size=args.stream_threshold)
+    try:
+        success = check_revision(checker, args.rev) if args.rev else check_range(checker, args.range)
+    except (OSError, ValueError) as e:
+        checker.print_error(f"Cannot read {args.rev or args.range}: {e}")
+        sys.exit(1)
+    except subprocess.CalledProcessError as e:
+        checker.print_error(f"git failed: {e.stderr.decode('utf-8', 'replace').strip()}")
+        sys.exit(1)
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()
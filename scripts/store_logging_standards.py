@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Violation store for check_logging_standards.py.
+
+Checks run with --store record the violations of every file in an SQLite
+database, updated incrementally. The commands of this script answer
+questions about them without reading any source file.
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from check_logging_standards import (
+    DEFAULT_STORE_FILE, LoggingChecker, LoggingViolation, Rule, _match_violations, positive_int
+)
+
+
+class ViolationStore:
+    """SQLite index of the violations of every file, updated incrementally by each scan.
+
+    Files are keyed by path and content hash, so a run only writes the files
+    whose hash changed. The violations of a changed file are matched to its
+    previous ones by rule and line content: every violation keeps the run that
+    introduced it and, once it is gone, the run that resolved it. A run is
+    written in a single transaction, in batches of BATCH_SIZE files.
+    """
+
+    # Bump when the schema changes; a store with another version is rebuilt
+    SCHEMA_VERSION = 1
+
+    SCHEMA = """
+        CREATE TABLE runs (
+            id INTEGER PRIMARY KEY,
+            started_at REAL NOT NULL,
+            finished_at REAL,
+            fingerprint TEXT NOT NULL,
+            directories TEXT NOT NULL,
+            files INTEGER NOT NULL DEFAULT 0,
+            files_changed INTEGER NOT NULL DEFAULT 0,
+            complete INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE rules (
+            id TEXT PRIMARY KEY,
+            pattern TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            message TEXT NOT NULL
+        );
+        CREATE TABLE files (
+            path TEXT PRIMARY KEY,
+            sha256 TEXT,
+            size INTEGER NOT NULL,
+            run INTEGER NOT NULL REFERENCES runs (id)
+        );
+        CREATE TABLE violations (
+            id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL,
+            line INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            rule TEXT NOT NULL,
+            introduced INTEGER NOT NULL REFERENCES runs (id),
+            resolved INTEGER REFERENCES runs (id)
+        );
+        CREATE INDEX violations_open ON violations (resolved, rule, path);
+        CREATE INDEX violations_path ON violations (path, resolved);
+        CREATE INDEX violations_introduced ON violations (introduced);
+        CREATE INDEX violations_resolved ON violations (resolved) WHERE resolved IS NOT NULL;
+        CREATE INDEX runs_started ON runs (started_at);
+    """
+
+    # Files whose violations are written at once
+    BATCH_SIZE = 512
+
+    # The top-level directory of a path, '.' for files in the working directory
+    DIRECTORY = "CASE WHEN instr(path, '/') THEN substr(path, 1, instr(path, '/') - 1) ELSE '.' END"
+
+    def __init__(self, path: str):
+        """Open the store, creating it if it doesn't exist.
+
+        Args:
+            path: Location of the database file
+
+        Raises:
+            sqlite3.Error: If the file can't be opened, or is not a database
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Transactions are started explicitly
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode = WAL')  # Queries don't wait for a scan
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+        if version != self.SCHEMA_VERSION:
+            drop = ''.join(f'DROP TABLE IF EXISTS {table};' for table in ('violations', 'files', 'rules', 'runs'))
+            self.connection.executescript(f'BEGIN IMMEDIATE;{drop}{self.SCHEMA}'
+                                          f'PRAGMA user_version = {self.SCHEMA_VERSION};COMMIT;')
+        self.run_id: Optional[int] = None
+        self.hashes: Dict[str, Optional[str]] = {}
+        self.pending: List[Tuple[str, str, int, List[LoggingViolation]]] = []
+        self.seen: Set[str] = set()
+        self.files_changed = 0
+
+    def close(self) -> None:
+        """Close the database, rolling back a run that was not finished."""
+        if self.connection.in_transaction:
+            self.connection.execute('ROLLBACK')
+        self.connection.close()
+
+    def begin_run(self, fingerprint: str, rules: List[Rule], directories: List[str]) -> int:
+        """Start recording a scan.
+
+        Args:
+            fingerprint: Fingerprint of the rules and checker; when it differs
+                from that of the last run, every file is recorded again
+            rules: The rules checked
+            directories: The directories scanned
+
+        Returns:
+            Id of the run
+        """
+        execute = self.connection.execute
+        execute('BEGIN IMMEDIATE')
+        last = execute('SELECT fingerprint FROM runs ORDER BY id DESC LIMIT 1').fetchone()
+        if last is not None and last[0] != fingerprint:
+            execute('UPDATE files SET sha256 = NULL')
+        self.run_id = execute('INSERT INTO runs (started_at, fingerprint, directories) VALUES (?, ?, ?)',
+                              (time.time(), fingerprint, json.dumps(directories))).lastrowid
+        self.connection.executemany('INSERT OR REPLACE INTO rules (id, pattern, severity, message) VALUES (?, ?, ?, ?)',
+                                    [(rule.rule_id, rule.pattern, rule.severity, rule.message) for rule in rules])
+        self.hashes = dict(execute('SELECT path, sha256 FROM files'))
+        self.pending = []
+        self.seen = set()
+        self.files_changed = 0
+        return self.run_id
+
+    def record(self, file_path: str, digest: str, size: int, violations: List[LoggingViolation]) -> None:
+        """Record the scan result of a file, written once its hash changed.
+
+        Args:
+            file_path: Path of the file
+            digest: SHA-256 of its content
+            size: Its size in bytes
+            violations: Its violations
+        """
+        self.seen.add(file_path)
+        if self.hashes.get(file_path) == digest:
+            return
+        self.pending.append((file_path, digest, size, violations))
+        if len(self.pending) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the pending files, matching their violations to those already stored."""
+        if not self.pending:
+            return
+        paths = [file_path for file_path, _, _, _ in self.pending]
+        stored: Dict[str, List[Tuple[str, str, int]]] = {}
+        for violation_id, file_path, rule, content in self.connection.execute(
+                f'SELECT id, path, rule, content FROM violations WHERE resolved IS NULL '
+                f'AND path IN ({", ".join("?" * len(paths))}) ORDER BY id', paths):
+            stored.setdefault(file_path, []).append((rule, content, violation_id))
+
+        resolved = []
+        moved = []
+        added = []
+        for file_path, _, _, violations in self.pending:
+            matched, new, gone = _match_violations(violations, stored.get(file_path, []))
+            moved.extend((violation.line_number, violation_id) for violation, violation_id in matched)
+            added.extend((file_path, violation.line_number, violation.line_content, violation.violation_type,
+                          self.run_id) for violation in new)
+            resolved.extend((self.run_id, violation_id) for violation_id in gone)
+
+        executemany = self.connection.executemany
+        executemany('UPDATE violations SET resolved = ? WHERE id = ?', resolved)
+        executemany('UPDATE violations SET line = ? WHERE id = ?', moved)
+        executemany('INSERT INTO violations (path, line, content, rule, introduced) VALUES (?, ?, ?, ?, ?)', added)
+        executemany('INSERT OR REPLACE INTO files (path, sha256, size, run) VALUES (?, ?, ?, ?)',
+                    [(file_path, digest, size, self.run_id) for file_path, digest, size, _ in self.pending])
+        self.files_changed += len(self.pending)
+        self.pending = []
+
+    def finish(self, complete: bool) -> None:
+        """Write the rest of the run and commit it.
+
+        After a complete run, files that no longer exist are removed, and
+        their violations resolved.
+
+        Args:
+            complete: Whether every file was scanned
+        """
+        self.flush()
+        execute = self.connection.execute
+        if complete:
+            deleted = [file_path for file_path in self.hashes
+                       if file_path not in self.seen and not os.path.exists(file_path)]
+            self.connection.executemany('UPDATE violations SET resolved = ? WHERE path = ? AND resolved IS NULL',
+                                        [(self.run_id, file_path) for file_path in deleted])
+            self.connection.executemany('DELETE FROM files WHERE path = ?', [(file_path,) for file_path in deleted])
+        execute('UPDATE runs SET finished_at = ?, files = ?, files_changed = ?, complete = ? WHERE id = ?',
+                (time.time(), len(self.seen), self.files_changed, complete, self.run_id))
+        execute('COMMIT')
+        self.hashes = {}
+
+    def summary(self) -> str:
+        """Describe what the last run wrote."""
+        return f"Violation store: {self.files_changed}/{len(self.seen)} files changed, written to {self.path}"
+
+    @staticmethod
+    def filters(rule: Optional[str], path: Optional[str]) -> Tuple[str, List[Any]]:
+        """Build the conditions selecting violations by rule and path.
+
+        Args:
+            rule: Only violations of this rule, or None for all
+            path: Only violations in this file or under this directory, or None for all
+
+        Returns:
+            (SQL condition, parameters) tuple
+        """
+        conditions = ['1']
+        parameters: List[Any] = []
+        if rule is not None:
+            conditions.append('rule = ?')
+            parameters.append(rule)
+        if path is not None:
+            path = os.path.normpath(path).replace(os.sep, '/')
+            conditions.append('(path = ? OR substr(path, 1, ?) = ?)')
+            parameters.extend([path, len(path) + 1, path + '/'])
+        return ' AND '.join(conditions), parameters
+
+    def open_violations(self, rule: Optional[str] = None, path: Optional[str] = None) -> List[LoggingViolation]:
+        """Get the violations found by the last scan of each file, by file and line."""
+        condition, parameters = self.filters(rule, path)
+        return [LoggingViolation(*row) for row in self.connection.execute(
+            f'SELECT path, line, content, rule FROM violations WHERE resolved IS NULL AND {condition} '
+            'ORDER BY path, line', parameters)]
+
+    def counts(self, by: str = 'rule', rule: Optional[str] = None, path: Optional[str] = None) -> List[Tuple[str, int]]:
+        """Count the open violations.
+
+        Args:
+            by: 'rule', 'file' or 'directory' (the top-level one) to group by
+            rule: Only count violations of this rule
+            path: Only count violations in this file or under this directory
+
+        Returns:
+            (group, count) pairs, most violations first
+        """
+        group = {'rule': 'rule', 'file': 'path', 'directory': self.DIRECTORY}[by]
+        condition, parameters = self.filters(rule, path)
+        return list(self.connection.execute(
+            f'SELECT {group} AS grouped, COUNT(*) AS count FROM violations WHERE resolved IS NULL AND {condition} '
+            'GROUP BY grouped ORDER BY count DESC, grouped', parameters))
+
+    def changes(self, since: float, rule: Optional[str] = None,
+                path: Optional[str] = None) -> List[Tuple[str, float, LoggingViolation]]:
+        """Get the violations introduced and resolved by the runs started since a time.
+
+        Args:
+            since: Seconds since the epoch
+            rule: Only violations of this rule
+            path: Only violations in this file or under this directory
+
+        Returns:
+            ('introduced' or 'resolved', start time of the run, violation) for
+            every change, oldest first
+        """
+        condition, parameters = self.filters(rule, path)
+        changes = []
+        for change in ('introduced', 'resolved'):
+            for started_at, *row in self.connection.execute(
+                    f'SELECT runs.started_at, path, line, content, rule FROM violations '
+                    f'JOIN runs ON runs.id = violations.{change} WHERE runs.started_at >= ? AND {condition}',
+                    [since, *parameters]):
+                changes.append((change, started_at, LoggingViolation(*row)))
+        changes.sort(key=lambda change: (change[1], change[2].file_path, change[2].line_number))
+        return changes
+
+    def runs(self, limit: int = 20) -> List[Dict]:
+        """Get the most recent scan runs, newest first."""
+        columns = ('id', 'started_at', 'finished_at', 'directories', 'files', 'files_changed', 'complete')
+        return [dict(zip(columns, row)) for row in self.connection.execute(
+            f'SELECT {", ".join(columns)} FROM runs ORDER BY id DESC LIMIT ?', (limit,))]
+
+
+def since_spec(value: str) -> float:
+    """Parse a point in time command line argument: an ISO date or time, today, yesterday, or a duration ago."""
+    midnight = time.mktime(time.localtime()[:3] + (0, 0, 0, 0, 0, -1))
+    if value in ('today', 'yesterday'):
+        return midnight - (86400 if value == 'yesterday' else 0)
+    match = re.fullmatch(r'(\d+)([smhd])', value)
+    if match:
+        return time.time() - int(match.group(1)) * {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[match.group(2)]
+    for time_format in ('%Y-%m-%d', '%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S'):
+        try:
+            return time.mktime(time.strptime(value, time_format))
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"expected a date, today, yesterday or a duration like 12h or 7d, got {value}")
+
+
+def query_main(argv: List[str]) -> int:
+    """Answer questions from the violation store written by --store, without reading any source file.
+
+    Args:
+        argv: Command line arguments
+
+    Returns:
+        Exit status
+    """
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--store', default=DEFAULT_STORE_FILE, metavar='PATH',
+                        help=f'Location of the violation store (default: {DEFAULT_STORE_FILE})')
+    common.add_argument('--format', choices=['text', 'json'], default='text', help='Output format (default: text)')
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument('--rule', help='Only violations of this rule')
+    filters.add_argument('--path', help='Only violations in this file or under this directory')
+
+    parser = argparse.ArgumentParser(description='Query the violations recorded by checks run with --store.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('violations', parents=[common, filters], help='List the open violations')
+    commands.add_parser('files', parents=[common, filters], help='List the files with open violations')
+    count = commands.add_parser('count', parents=[common, filters], help='Count the open violations')
+    count.add_argument('--by', choices=['rule', 'file', 'directory'], default='rule',
+                       help='Group by rule, file or top-level directory (default: rule)')
+    changes = commands.add_parser('changes', parents=[common, filters],
+                                  help='List the violations introduced and resolved by recent checks')
+    changes.add_argument('--since', type=since_spec, required=True, metavar='WHEN',
+                         help='Checks started since a date (2024-05-01), time (2024-05-01T14:00), today, '
+                              'yesterday, or a duration ago (12h, 7d)')
+    runs = commands.add_parser('runs', parents=[common], help='List the recorded checks, newest first')
+    runs.add_argument('--limit', type=positive_int, default=20, help='Number of checks to list (default: 20)')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.store):
+        LoggingChecker([], output_format=args.format).print_error(
+            f"No violation store at {args.store}; run a check with --store first")
+        return 1
+    store = ViolationStore(args.store)
+    try:
+        if args.command == 'runs':
+            rows = store.runs(args.limit)
+            lines = [f"{row['id']:6d}  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(row['started_at']))}  "
+                     f"{row['files']:6d} files  {row['files_changed']:6d} changed  "
+                     f"{'complete' if row['complete'] else 'partial '}  {' '.join(json.loads(row['directories']))}"
+                     for row in rows]
+        elif args.command == 'changes':
+            changed = store.changes(args.since, args.rule, args.path)
+            rows = [{'change': change, 'started_at': started_at, **violation.to_dict()}
+                    for change, started_at, violation in changed]
+            lines = [f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(started_at))}  "
+                     f"{'+' if change == 'introduced' else '-'} {violation}"
+                     for change, started_at, violation in changed]
+        elif args.command == 'violations':
+            violations = store.open_violations(args.rule, args.path)
+            rows = [violation.to_dict() for violation in violations]
+            lines = [f"{violation} [{violation.violation_type}]" for violation in violations]
+        else:
+            by = 'file' if args.command == 'files' else args.by
+            counts = store.counts(by, args.rule, args.path)
+            rows = [{by: group, 'count': count} for group, count in counts]
+            lines = [f"{count:6d}  {group}" for group, count in counts]
+            if args.command == 'count':
+                lines.append(f"{sum(count for _, count in counts):6d}  total")
+    finally:
+        store.close()
+
+    if args.format == 'json':
+        print(json.dumps(rows, indent=2))
+    else:
+        for line in lines:
+            print(line)
+    return 0
+
+
+def main():
+    """Main entry point for the script."""
+    sys.exit(query_main(sys.argv[1:]))
+
+
+if __name__ == '__main__':
+    main()
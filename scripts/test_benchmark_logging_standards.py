@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test suite for benchmark_logging_standards.py
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from benchmark_logging_standards import CorpusGenerator, compare, run_phase
+from check_logging_standards import LoggingChecker
+
+
+class TestCorpusGenerator(unittest.TestCase):
+    """Test cases for the synthetic corpus generator."""
+
+    def setUp(self):
+        """Set up a temporary directory for corpora."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+
+    def corpus_files(self, directory: Path) -> dict:
+        """Read every file of a corpus, keyed by relative path."""
+        return {path.relative_to(directory).as_posix(): path.read_bytes()
+                for path in directory.rglob('*.dart')}
+
+    def test_generation_is_deterministic(self):
+        """Test that the same parameters give identical corpora."""
+        generator = CorpusGenerator(files=30, density=0.05, lines_per_file=(10, 60), seed=7)
+        first = generator.generate(str(self.root / 'a'))
+        second = generator.generate(str(self.root / 'b'))
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.corpus_files(self.root / 'a'), self.corpus_files(self.root / 'b'))
+        self.assertEqual(len(self.corpus_files(self.root / 'a')), 30)
+
+    def test_checker_finds_generated_violations(self):
+        """Test that the checker reports exactly the violations the generator placed."""
+        manifest = CorpusGenerator(files=25, density=0.1, lines_per_file=(10, 80), seed=3).generate(str(self.root))
+        self.assertGreater(manifest['violations'], 0)
+
+        checker = LoggingChecker([str(self.root / 'lib')], use_git=False)
+        self.assertEqual(len(checker.find_violations()), manifest['violations'])
+
+        result = run_phase('autofix', str(self.root), jobs=1)
+        self.assertEqual(result['fixed'], manifest['violations'])
+
+    def test_ensure_reuses_matching_corpus(self):
+        """Test that an existing corpus is only regenerated when the parameters change."""
+        CorpusGenerator(files=5, seed=1).ensure(str(self.root))
+        marker = self.root / 'lib' / 'feature_0' / 'file_0.dart'
+        os.utime(marker, ns=(0, 0))
+
+        CorpusGenerator(files=5, seed=1).ensure(str(self.root))
+        self.assertEqual(marker.stat().st_mtime_ns, 0)
+        CorpusGenerator(files=5, seed=2).ensure(str(self.root))
+        self.assertNotEqual(marker.stat().st_mtime_ns, 0)
+
+
+class TestCompare(unittest.TestCase):
+    """Test cases for comparing results against a baseline."""
+
+    def results(self, files_per_s: float, peak_rss_kb: int, seed: int = 0) -> dict:
+        """Build results for a single scan phase."""
+        return {'corpus': {'seed': seed},
+                'phases': {'scan': {'files_per_s': files_per_s, 'peak_rss_kb': peak_rss_kb}}}
+
+    def test_within_tolerance(self):
+        """Test that small differences are not regressions."""
+        self.assertEqual(compare(self.results(95, 105), self.results(100, 100), 0.1), [])
+
+    def test_regressions(self):
+        """Test that slowdowns, memory growth and different corpora are reported."""
+        self.assertEqual(len(compare(self.results(80, 150), self.results(100, 100), 0.1)), 2)
+        self.assertEqual(len(compare(self.results(100, 100, seed=1), self.results(100, 100), 0.1)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,12 +5,28 @@ Test suite for check_logging_standards.py
 This file serves as both test coverage and documentation for how the logging standards checker works.
 """
 
+import io
+import json
 import os
+import shutil
+import subprocess
+import sys
 import tempfile
+import threading
+import time
+import tracemalloc
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from unittest import mock
 from typing import List, Dict, Any
 from pathlib import Path
-from check_logging_standards import LoggingChecker, Mode, LoggingViolation
+from check_logging_standards import (
+    DEFAULT_RULES_FILE, DartFileFinder, DartLexer, GitChanges, ImportTable, InotifyWatcher, MonorepoChecker,
+    PackageIndex, PollingWatcher, ReadAheadPipeline, Rule, ScanStats, ViolationIndex, LoggingChecker, Mode,
+    LoggingViolation, PatternMatcher, _required_literal, check_many, check_source, default_checker, fix_source,
+    load_rules
+)
 
 
 class TestLoggingChecker(unittest.TestCase):
@@ -99,7 +115,7 @@ void main() {
     def test_find_dart_files(self):
         """Test finding Dart files in directories."""
         checker = LoggingChecker([str(self.test_dir)])
-        files = checker.find_dart_files()
+        files = list(checker.find_dart_files())
         
         # Should find our 4 test files
         self.assertEqual(len(files), 4)
@@ -137,6 +153,36 @@ void main() {
         self.assertEqual(debug_print_count, 3)  # 1 in debug_print.dart, 2 in mixed.dart
         self.assertEqual(log_count, 3)  # 1 in log.dart, 2 in mixed.dart
 
+    def test_find_violations_parallel(self):
+        """Test that a parallel scan reports the same violations in the same order."""
+        serial = LoggingChecker([str(self.test_dir)]).find_violations()
+
+        parallel_checker = LoggingChecker([str(self.test_dir)], jobs=2)
+        parallel_checker.PARALLEL_MIN_FILES = 0
+        parallel = parallel_checker.find_violations()
+
+        self.assertEqual([str(v) for v in parallel], [str(v) for v in serial])
+        self.assertEqual([v.violation_type for v in parallel], [v.violation_type for v in serial])
+
+        # A file that fails to read in a worker fails the scan instead of falling back to a serial one
+        files = sorted(self.test_dir.glob('*.dart'))
+        with mock.patch.object(parallel_checker, 'print_info') as print_info:
+            with self.assertRaises(FileNotFoundError):
+                list(parallel_checker.scan_files_parallel([files[0], self.test_dir / 'removed.dart', *files[1:]]))
+        print_info.assert_not_called()
+
+    def test_find_violations_pipelined(self):
+        """Test that a pipelined scan reports the same violations in the same order."""
+        serial = LoggingChecker([str(self.test_dir)]).find_violations()
+
+        stats = ScanStats()
+        pipelined = LoggingChecker([str(self.test_dir)], readers=3, stats=stats).find_violations()
+
+        self.assertEqual([v.to_dict() for v in pipelined], [v.to_dict() for v in serial])
+        self.assertEqual(stats.counters['files_scanned'], 4)
+        self.assertEqual(stats.pipeline['readers'], 3)
+        self.assertIn('match_wait_s', stats.to_dict()['pipeline'])
+
     def test_fix_violation(self):
         """Test fixing violations."""
         checker = LoggingChecker([str(self.test_dir)], auto_fix=True)
@@ -156,6 +202,192 @@ void main() {
             self.assertIn("AppLogger.d('This will be detected')", content)
             self.assertIn("import 'package:memverse/src/utils/app_logger.dart'", content)
 
+    def test_fix_file_applies_all_fixes_at_once(self):
+        """Test that all fixes and the import land on the right lines in one write."""
+        checker = LoggingChecker([str(self.test_dir)], auto_fix=True)
+        mixed_file = str(self.test_dir / "mixed.dart")
+        violations = [v for v in checker.find_violations() if v.file_path == mixed_file]
+
+        result = checker.fix_file(mixed_file, violations)
+
+        self.assertTrue(all(success for _, success, _ in result.outcomes))
+        self.assertTrue(result.import_added)
+        with open(mixed_file, 'rb') as f:
+            data = f.read()
+        self.assertEqual(result.bytes_written, len(data))
+
+        content = data.decode()
+        self.assertIn("import 'package:flutter/foundation.dart';\n"
+                      "import 'package:memverse/src/utils/app_logger.dart';\n", content)
+        self.assertIn("    AppLogger.d('Indented violation');\n"
+                      "    AppLogger.d('Another indented violation');\n", content)
+        self.assertEqual(LoggingChecker([str(self.test_dir)]).scan_file(Path(mixed_file)), [])
+
+    def test_fix_file_keeps_line_endings(self):
+        """Test that fixing a CRLF file keeps its line endings."""
+        crlf_file = self.test_dir / "crlf.dart"
+        crlf_file.write_bytes(b"import 'dart:developer';\r\n\r\nvoid f() {\r\n  log('x');\r\n}\r\n")
+        checker = LoggingChecker([str(self.test_dir)], auto_fix=True)
+
+        checker.fix_file(str(crlf_file), checker.scan_file(crlf_file))
+
+        self.assertEqual(crlf_file.read_bytes(),
+                         b"import 'dart:developer';\r\n"
+                         b"import 'package:memverse/src/utils/app_logger.dart';\r\n"
+                         b"\r\nvoid f() {\r\n  AppLogger.d('x');\r\n}\r\n")
+
+    def test_emit_patch(self):
+        """Test that --emit-patch writes the auto-fix as a patch without touching any file."""
+        originals = {path: path.read_bytes() for path in self.test_dir.iterdir()}
+        patches = {}
+        cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        try:
+            for patch_format in ('diff', 'json'):
+                checker = LoggingChecker(['.'], mode=Mode.CI, emit_patch=f'fixes.{patch_format}',
+                                         patch_format=patch_format)
+                self.assertFalse(checker.check_and_fix())
+                patches[patch_format] = Path(f'fixes.{patch_format}').read_text()
+        finally:
+            os.chdir(cwd)
+        self.assertEqual({path: path.read_bytes() for path in originals}, originals)
+
+        # Applying the edits bottom up gives the same files as the diff
+        expected = {}
+        for entry in json.loads(patches['json'])['files']:
+            lines = (self.test_dir / entry['file']).read_text().splitlines(keepends=True)
+            for edit in reversed(entry['edits']):
+                start = edit['line'] - 1
+                lines[start:start + len(edit['remove'])] = edit['add']
+            expected[entry['file']] = ''.join(lines)
+        self.assertEqual(set(expected), {'debug_print.dart', 'log.dart', 'mixed.dart'})
+
+        subprocess.run(['git', 'apply', 'fixes.diff'], cwd=self.test_dir, check=True)
+        for file_name, content in expected.items():
+            self.assertEqual((self.test_dir / file_name).read_text(), content)
+        self.assertEqual(LoggingChecker([str(self.test_dir)]).find_violations(), [])
+
+    def test_scan_file_bytes_prefilter(self):
+        """Test scanning raw bytes, mapped or read, keeps the text-mode line numbers."""
+        source_file = self.test_dir / "bytes.dart"
+        source_file.write_bytes(b"import 'package:flutter/foundation.dart'; // \xff not utf-8\r\nvoid f() {\r  debugPrint('\xc3\xa9');\r\n}\n")
+        checker = LoggingChecker([str(self.test_dir)])
+
+        for mmap_min_size in (1 << 20, 1):
+            with mock.patch('check_logging_standards.MMAP_MIN_SIZE', mmap_min_size):
+                result = checker.scan_file_result(source_file, with_digest=True)
+            self.assertEqual([(v.line_number, v.line_content) for v in result.violations],
+                             [(3, "debugPrint('\u00e9');")])
+            self.assertEqual(result.size, len(source_file.read_bytes()))
+
+        # Contents without a candidate are never decoded
+        with mock.patch('check_logging_standards._decode_source') as decode:
+            self.assertEqual(checker.scan_bytes(source_file, b"void f() {}\n").violations, [])
+        decode.assert_not_called()
+
+    def test_stats(self):
+        """Test collecting phase timings, counters and the slowest files."""
+        stats = ScanStats(top=2)
+        checker = LoggingChecker([str(self.test_dir)], mode=Mode.CI, auto_fix=True, stats=stats)
+        checker.check_and_fix()
+        stats_file = self.test_dir / "stats.json"
+        checker.report_stats(str(stats_file))
+
+        data = json.loads(stats_file.read_text())
+        self.assertEqual(data['counters']['files_discovered'], 4)
+        self.assertEqual(data['counters']['files_scanned'], 4)
+        self.assertEqual(data['counters']['files_decoded'], 3)  # valid.dart has no candidate
+        self.assertEqual(data['counters']['violations'], 6)
+        self.assertEqual(len(data['slowest_files']), 2)
+        self.assertGreater(data['phases']['scan']['wall_s'], 0)
+
+        metrics = stats.to_openmetrics()
+        self.assertIn('logging_check_phase_wall_seconds{phase="discovery"}', metrics)
+        self.assertIn('logging_check_files_scanned 4', metrics)
+        self.assertTrue(metrics.endswith('# EOF\n'))
+
+        # In local mode the summary is printed, but kept off stdout when it carries a JSON report
+        checker = LoggingChecker([str(self.test_dir)], output_format='json', stats=ScanStats())
+        output = io.StringIO()
+        with redirect_stdout(output), mock.patch('sys.stderr', io.StringIO()) as messages:
+            checker.check_and_fix()
+            checker.report_stats()
+        self.assertEqual(len(json.loads(output.getvalue())['violations']), 6)
+        self.assertIn('discovery', messages.getvalue())
+
+    def run_with_format(self, output_format: str, max_violations=None) -> str:
+        """Run the check in CI mode and return what it wrote to stdout."""
+        checker = LoggingChecker([str(self.test_dir)], mode=Mode.CI, output_format=output_format,
+                                 max_violations=max_violations)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertFalse(checker.check_and_fix())
+        return output.getvalue()
+
+    def test_machine_readable_formats(self):
+        """Test the json, jsonl, sarif and github output formats."""
+        data = json.loads(self.run_with_format('json'))
+        self.assertEqual(len(data['violations']), 6)
+        self.assertEqual(set(data['violations'][0]), {'file', 'line', 'rule', 'content'})
+        self.assertEqual(data['summary']['by_rule'], {'debugPrint': 3, 'log': 3})
+
+        records = [json.loads(line) for line in self.run_with_format('jsonl').splitlines()]
+        self.assertEqual(len(records), 7)
+        self.assertEqual(records[-1]['summary']['total'], 6)
+
+        run = json.loads(self.run_with_format('sarif'))['runs'][0]
+        self.assertEqual([rule['id'] for rule in run['tool']['driver']['rules']], ['debugPrint', 'log'])
+        self.assertEqual(len(run['results']), 6)
+        region = run['results'][0]['locations'][0]['physicalLocation']['region']
+        self.assertIsInstance(region['startLine'], int)
+
+        annotations = self.run_with_format('github').splitlines()
+        self.assertEqual(len(annotations), 6)
+        self.assertRegex(annotations[0], r'^::error file=.*\.dart,line=\d+,title=Prohibited \w+\(\)::')
+
+    def test_max_violations(self):
+        """Test that violations past the cap are only counted."""
+        data = json.loads(self.run_with_format('json', max_violations=2))
+        self.assertEqual(len(data['violations']), 2)
+        self.assertEqual((data['summary']['total'], data['summary']['reported']), (6, 2))
+        self.assertEqual(sum(data['summary']['by_file'].values()), 6)
+
+        output = self.run_with_format('text', max_violations=2)
+        self.assertIn("4 more violations not shown (6 in total)", output)
+        self.assertIn("Violations per rule: ", output)
+
+    def test_shards_merge_to_the_same_report(self):
+        """Test that merged shard results don't depend on the number of shards."""
+        reports = []
+        for count in (1, 3):
+            result_files = []
+            for index in range(1, count + 1):
+                checker = LoggingChecker([str(self.test_dir)], mode=Mode.CI, output_format='json',
+                                         shard=(index, count))
+                result_file = self.test_dir / f"shard_{index}_of_{count}.json"
+                with open(result_file, 'w') as output, redirect_stdout(output):
+                    checker.check_and_fix()
+                result_files.append(str(result_file))
+
+            output = io.StringIO()
+            with redirect_stdout(output):
+                self.assertFalse(LoggingChecker([], mode=Mode.CI, output_format='json').merge_results(result_files))
+            reports.append(output.getvalue())
+
+        self.assertEqual(reports[0], reports[1])
+        self.assertEqual(json.loads(reports[1])['summary']['total'], 6)
+        with self.assertRaises(ValueError):
+            LoggingChecker([]).merge_results(result_files[:2])
+
+    def test_shard_assignment_is_stable(self):
+        """Test that a file is assigned to one shard, however its path is spelled."""
+        finders = [DartFileFinder([], shard=(index, 4)) for index in range(1, 5)]
+        path = str(self.test_dir / "mixed.dart")
+        relative = os.path.relpath(path)
+        self.assertEqual([finder.in_shard(path) for finder in finders].count(True), 1)
+        self.assertEqual([finder.in_shard(path) for finder in finders],
+                         [finder.in_shard(relative) for finder in finders])
+
     def test_check_and_fix_local_mode(self):
         """Test check_and_fix in local mode with auto_fix."""
         checker = LoggingChecker([str(self.test_dir)], mode=Mode.LOCAL, auto_fix=True)
@@ -190,6 +422,896 @@ void main() {
             self.assertNotIn("AppLogger.d", content)
 
 
+class TestPatternMatcher(unittest.TestCase):
+    """Test cases for the single-pass PatternMatcher."""
+
+    def test_required_literal(self):
+        """Test extraction of the literal prefix used by the prefilter."""
+        self.assertEqual(_required_literal(r'(?<!\w)debugPrint\('), 'debugPrint(')
+        self.assertEqual(_required_literal(r'(?<!\w)log\('), 'log(')
+        self.assertEqual(_required_literal(r'print\s*\('), 'print')
+        self.assertEqual(_required_literal(r'logs?\('), 'log')
+        self.assertIsNone(_required_literal(r'\w+\('))
+        # Every branch of a top-level alternation may match on its own
+        self.assertIsNone(_required_literal(r'foo\(|bar\('))
+        self.assertIsNone(_required_literal(r'(?<!\w)(?:foo|bar)\('))
+        self.assertEqual(_required_literal(r'log[|]x'), 'log')
+
+    def test_skips_buffers_without_candidates(self):
+        """Test that buffers without any literal are rejected up front."""
+        matcher = PatternMatcher(LoggingChecker.PROHIBITED_PATTERNS)
+        self.assertFalse(matcher.may_match("void main() {\n  AppLogger.d('x');\n}\n"))
+        self.assertTrue(matcher.may_match("void main() {\n  log('x');\n}\n"))
+
+    def test_matches_line_by_line_search(self):
+        """Test that the combined pass reports the same lines as per-line searching."""
+        text = (
+            "import 'dart:developer';\n"
+            "void main() {\n"
+            "  debugPrint('a'); log('b');\n"
+            "  debugPrint('c'); debugPrint('d');\n"
+            "  analogLog('not a violation');\n"
+            "  log('last line without newline');"
+        )
+        matcher = PatternMatcher(LoggingChecker.PROHIBITED_PATTERNS)
+        found = [(line_num, violation_types) for line_num, _, violation_types in matcher.scan(text)]
+        self.assertEqual(found, [
+            (3, ['debugPrint', 'log']),
+            (4, ['debugPrint']),
+            (6, ['log']),
+        ])
+
+    def test_scan_text_reports_violations(self):
+        """Test scanning an in-memory buffer with the checker."""
+        checker = LoggingChecker([])
+        violations = checker.scan_text("example.dart", "import 'dart:developer';\nvoid f() {\n  // log('x');\n  log('y');\n}\n")
+        self.assertEqual([(v.line_number, v.violation_type) for v in violations], [(4, 'log')])
+        self.assertEqual(str(violations[0]), "example.dart:4: log('y');")
+
+
+class TestReadAheadPipeline(unittest.TestCase):
+    """Test cases for the pipelined read stage."""
+
+    def test_in_flight_files_are_capped(self):
+        """Test that readers never get further ahead of matching than the depth."""
+        in_flight = 0
+        most = 0
+        lock = threading.Lock()
+
+        def load(path):
+            nonlocal in_flight, most
+            with lock:
+                in_flight += 1
+                most = max(most, in_flight)
+            return path * 2
+
+        pipeline = ReadAheadPipeline(load, readers=4, depth=6)
+        results = []
+        for path, contents in pipeline.run(range(200)):
+            time.sleep(0.0005)  # Matching is the slow stage
+            with lock:
+                in_flight -= 1
+            results.append((path, contents))
+
+        self.assertEqual(results, [(path, path * 2) for path in range(200)])
+        self.assertLessEqual(most, 6)
+        self.assertGreater(pipeline.metrics['discovery_stall_s'], 0)
+
+    def test_errors_are_raised_in_order(self):
+        """Test that a failed read surfaces after the files before it, and stops the threads."""
+        def load(path):
+            if path == 5:
+                raise OSError("unreadable")
+            return path
+
+        loaded = []
+        with self.assertRaises(OSError):
+            for path, _ in ReadAheadPipeline(load, readers=3, depth=4).run(range(100)):
+                loaded.append(path)
+        self.assertEqual(loaded, [0, 1, 2, 3, 4])
+        self.assertEqual([thread.name for thread in threading.enumerate() if thread.name.startswith('reader-')], [])
+
+
+class TestLibraryApi(unittest.TestCase):
+    """Test cases for checking and fixing buffers in memory."""
+
+    SOURCE = ("import 'dart:developer';\r\nimport 'package:flutter/foundation.dart';\r\nvoid f() {\r\n  debugPrint('a'); // log('b')\r\n"
+              "  log('c', name: 'N');\r\n  print('d');\r\n}\r\n")
+
+    def test_check_source(self):
+        """Test that str and bytes sources give the violations a file would."""
+        violations = check_source(self.SOURCE, 'lib/a.dart')
+        self.assertEqual([(v.line_number, v.violation_type) for v in violations],
+                         [(4, 'debugPrint'), (5, 'log'), (6, 'print')])
+        self.assertEqual([v.to_dict() for v in check_source(self.SOURCE.encode(), 'lib/a.dart')],
+                         [v.to_dict() for v in violations])
+        # print() is only prohibited under lib/
+        self.assertEqual(len(check_source(self.SOURCE, 'test/a_test.dart')), 2)
+
+    def test_fix_source(self):
+        """Test fixing a buffer, keeping its line endings."""
+        fixed, edits = fix_source(self.SOURCE, 'lib/a.dart')
+        self.assertEqual(fixed, "import 'dart:developer';\r\nimport 'package:flutter/foundation.dart';\r\n"
+                                "import 'package:memverse/src/utils/app_logger.dart';\r\nvoid f() {\r\n  AppLogger.d('a'); // log('b')\r\n"
+                                "  AppLogger.d('c');\r\n  print('d');\r\n}\r\n")
+        self.assertEqual([edit.line_number for edit in edits], [3, 4, 5])
+        self.assertEqual(edits[1].to_dict(), {'line': 4, 'remove': ["  debugPrint('a'); // log('b')\r\n"],
+                                              'add': ["  AppLogger.d('a'); // log('b')\r\n"]})
+        self.assertEqual(fix_source(fixed, 'test/a_test.dart'), (fixed, []))
+
+    def test_no_filesystem_access_and_thread_safety(self):
+        """Test that buffers are checked from many threads without touching any file."""
+        default_checker()
+        sources = [(f'lib/file_{i}.dart', self.SOURCE * (i % 5 + 1)) for i in range(200)]
+        expected = [(path, [v.to_dict() for v in violations]) for path, violations in check_many(sources)]
+
+        # A fresh package index, so nothing looked up by earlier tests hides a lookup on disk
+        with mock.patch('check_logging_standards._package_index', PackageIndex()), \
+                mock.patch('builtins.open', side_effect=AssertionError("file opened")), \
+                mock.patch('os.stat', side_effect=AssertionError("file accessed")), \
+                mock.patch('os.path.isfile', side_effect=AssertionError("file accessed")):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(pool.map(lambda item: (item[0], [v.to_dict() for v in check_source(item[1], item[0])]),
+                                        sources))
+                fixes = list(pool.map(lambda item: fix_source(item[1], item[0])[0], sources))
+        self.assertEqual(results, expected)
+        self.assertEqual(len(set(fixes)), 5)
+        self.assertIn("import 'package:memverse/src/utils/app_logger.dart';", fixes[0])
+        self.assertIn("import 'package:other/src/utils/app_logger.dart';",
+                      fix_source(self.SOURCE, 'lib/a.dart', package='other')[0])
+
+
+class TestDartLexer(unittest.TestCase):
+    """Test cases for the Dart tokenizer that separates code from comments and strings."""
+
+    def kinds(self, text: str) -> List[tuple]:
+        """Lex a buffer into (text, kind) pairs."""
+        return [(text[start:end], kind) for start, end, kind in DartLexer.regions(text)]
+
+    def test_comments_and_strings(self):
+        """Test line comments, nested block comments and quotes of both kinds."""
+        self.assertEqual(self.kinds("a(); // c\n/* x /* y */ z */ b('s', \"d\");"), [
+            ("a(); ", 'code'),
+            ("// c", 'comment'),
+            ("\n", 'code'),
+            ("/* x /* y */ z */", 'comment'),
+            (" b(", 'code'),
+            ("'s'", 'string'),
+            (", ", 'code'),
+            ('"d"', 'string'),
+            (");", 'code'),
+        ])
+
+    def test_multiline_raw_and_escaped_strings(self):
+        """Test triple-quoted, raw and escaped strings."""
+        self.assertEqual(self.kinds("x = '''a\n// log('''; y = r'\\'; z = 'it\\'s';"), [
+            ("x = ", 'code'),
+            ("'''a\n// log('''", 'string'),
+            ("; y = ", 'code'),
+            ("r'\\'", 'string'),
+            ("; z = ", 'code'),
+            ("'it\\'s'", 'string'),
+            (";", 'code'),
+        ])
+
+    def test_carriage_returns_end_lines(self):
+        """Test that a lone CR ends line comments and single-line strings, as in Dart."""
+        self.assertEqual(self.kinds("a // c\rb 'x\rc"), [
+            ("a ", 'code'),
+            ("// c", 'comment'),
+            ("\rb ", 'code'),
+            ("'x", 'string'),
+            ("\rc", 'code'),
+        ])
+
+    def test_interpolation_is_code(self):
+        """Test that ${...} interpolation, including nested strings, is code."""
+        self.assertEqual(self.kinds("'a ${f({'k': 1})} b'"), [
+            ("'a ${", 'string'),
+            ("f({", 'code'),
+            ("'k'", 'string'),
+            (": 1})", 'code'),
+            ("} b'", 'string'),
+        ])
+
+    def test_calls_in_comments_and_strings_are_ignored(self):
+        """Test that scanning only reports calls in code."""
+        text = (
+            "import 'dart:developer';\n"
+            "import 'package:flutter/foundation.dart';\n"
+            "/*\n"
+            "  log('inside a block comment');\n"
+            "*/\n"
+            "const help = '''\n"
+            "  debugPrint('inside a multi-line string');\n"
+            "''';\n"
+            "void f() {\n"
+            "  print('debugPrint(x) // log(y)');\n"
+            "  log('trailing comment'); // see log()\n"
+            "  print('${debugPrint('interpolated')}');\n"
+            "}\n"
+        )
+        violations = LoggingChecker([]).scan_text("lexed.dart", text)
+        self.assertEqual([(v.line_number, v.violation_type) for v in violations],
+                         [(11, 'log'), (12, 'debugPrint')])
+
+    def test_fix_leaves_strings_alone(self):
+        """Test that auto-fix only rewrites calls in code."""
+        checker = LoggingChecker([])
+        line = "  log('log(x)', name: 'a, b'); // log(y)\n"
+        edits, _ = checker.line_edits(line, 'log')
+        self.assertEqual(edits, [(2, 29, "AppLogger.d('log(x)')")])
+
+
+class TestScanCache(unittest.TestCase):
+    """Test cases for the persistent scan cache."""
+
+    def setUp(self):
+        """Set up a source tree and a cache location."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source_dir = Path(self.temp_dir.name) / "lib"
+        self.source_dir.mkdir()
+        self.cache_file = str(Path(self.temp_dir.name) / ".dart_tool" / "logging_check_cache")
+
+        self.log_file = self.source_dir / "log.dart"
+        self.log_file.write_text("import 'dart:developer';\n\nvoid main() {\n  log('cached');\n}\n")
+        (self.source_dir / "valid.dart").write_text("void main() {\n  AppLogger.d('ok');\n}\n")
+
+        # Old mtimes, so entries are trusted without a content check
+        for file_path in self.source_dir.iterdir():
+            os.utime(file_path, ns=(10**18, 10**18))
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+
+    def run_checker(self) -> LoggingChecker:
+        """Run a cached scan and return the checker."""
+        checker = LoggingChecker([str(self.source_dir)], cache_file=self.cache_file)
+        checker.violations = checker.find_violations()
+        return checker
+
+    def test_unchanged_files_are_served_from_cache(self):
+        """Test that a second run reuses the results of the first."""
+        first = self.run_checker()
+        self.assertEqual(first.cache.misses, 2)
+
+        second = self.run_checker()
+        self.assertEqual((second.cache.hits, second.cache.misses), (2, 0))
+        self.assertEqual([str(v) for v in second.violations], [str(v) for v in first.violations])
+
+    def test_modified_file_is_rescanned(self):
+        """Test that a changed file is scanned again."""
+        self.run_checker()
+        self.log_file.write_text("import 'package:flutter/material.dart';\n\nvoid main() {\n  debugPrint('changed');\n}\n")
+
+        checker = self.run_checker()
+        self.assertEqual(checker.cache.misses, 1)
+        self.assertEqual([v.violation_type for v in checker.violations], ['debugPrint'])
+
+    def test_restored_cache_is_verified_by_content(self):
+        """Test that a touched but unchanged file is answered by its content hash."""
+        self.run_checker()
+        os.utime(self.log_file, ns=(2 * 10**18, 2 * 10**18))
+
+        checker = self.run_checker()
+        self.assertEqual((checker.cache.content_hits, checker.cache.misses), (1, 0))
+        self.assertEqual(len(checker.violations), 1)
+
+    def test_rule_change_invalidates_cache(self):
+        """Test that entries made with other rules are discarded."""
+        self.run_checker()
+
+        class OtherRulesChecker(LoggingChecker):
+            PROHIBITED_PATTERNS = [(r'(?<!\w)print\(', 'print')]
+
+        checker = OtherRulesChecker([str(self.source_dir)], cache_file=self.cache_file)
+        checker.find_violations()
+        self.assertEqual((checker.cache.hits, checker.cache.misses), (0, 2))
+
+
+class TestRules(unittest.TestCase):
+    """Test cases for configurable rules."""
+
+    def setUp(self):
+        """Set up a temporary directory for configurations and sources."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+
+    def write_rules(self, rules: List[Dict[str, Any]]) -> str:
+        """Write a rule configuration and return its path."""
+        path = self.root / 'rules.json'
+        path.write_text(json.dumps({'rules': rules}))
+        return str(path)
+
+    def test_shipped_rules_match_defaults(self):
+        """Test that the shipped configuration extends the built-in rules."""
+        rules = {rule.rule_id: rule for rule in load_rules(DEFAULT_RULES_FILE)}
+        for rule in LoggingChecker.default_rules():
+            self.assertEqual((rules[rule.rule_id].pattern, rules[rule.rule_id].fix), (rule.pattern, rule.fix))
+        self.assertIn('print', rules)
+
+    def test_invalid_rules_are_rejected(self):
+        """Test that configuration mistakes are reported with the rule they are in."""
+        for rules in ([{'id': 'a', 'pattern': '('}],
+                      [{'id': 'a', 'pattern': 'a', 'severity': 'fatal'}],
+                      [{'id': 'a', 'pattern': 'a', 'fixes': 'b'}],
+                      [{'id': 'a', 'pattern': 'a', 'drop_arguments': ['name']}],
+                      [{'id': 'a', 'pattern': 'a', 'libraries': ['dart:core']}],
+                      [{'id': 'a', 'pattern': 'a'}, {'id': 'a', 'pattern': 'b'}]):
+            with self.assertRaises(ValueError):
+                load_rules(self.write_rules(rules))
+
+    def test_scoped_rule(self):
+        """Test that print() is only prohibited in lib, and only in code."""
+        checker = LoggingChecker([], rules=load_rules(DEFAULT_RULES_FILE))
+        text = ("import 'package:flutter/widgets.dart';\n"
+                "void f() {\n  print('a');\n  debugPrint('b'); // print('c')\n  blueprint('d');\n}\n")
+
+        violations = checker.scan_text('lib/a.dart', text)
+        self.assertEqual([(v.line_number, v.violation_type) for v in violations], [(3, 'print'), (4, 'debugPrint')])
+        self.assertEqual([v.violation_type for v in checker.scan_text('test/a_test.dart', text)], ['debugPrint'])
+
+    def test_alternation_rule(self):
+        """Test that every branch of a configured rule with a top-level alternation is reported."""
+        checker = LoggingChecker([], rules=load_rules(self.write_rules([{'id': 'call', 'pattern': 'foo\\(|bar\\('}])))
+        for source in (b"foo(1);\n", b"bar(1);\n"):
+            self.assertEqual([v.violation_type for v in check_source(source, 'lib/a.dart', checker)], ['call'], source)
+
+    def test_warnings_do_not_fail(self):
+        """Test that warning rules are reported without failing the check."""
+        (self.root / 'a.dart').write_text("void f() {\n  trace('x');\n}\n")
+        rules = [Rule('trace', r'(?<!\w)trace\(', severity='warning', message='trace() is deprecated')]
+        checker = LoggingChecker([str(self.root)], mode=Mode.CI, output_format='github', rules=rules)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertTrue(checker.check_and_fix())
+        self.assertRegex(output.getvalue(), r'^::warning file=.*a\.dart,line=2,.*::trace\(\) is deprecated: ')
+
+    def test_configured_fix(self):
+        """Test fixing with a configured replacement, dropped argument and import."""
+        source = self.root / 'a.dart'
+        source.write_text("void f() {\n  logError('x', tag: 'T', error: e);\n}\n")
+        rules = [Rule('logError', r'(?<!\w)logError\(', fix='AppLogger.e(', drop_arguments=['tag'],
+                      fix_import='package:memverse/src/utils/app_logger.dart')]
+        checker = LoggingChecker([str(self.root)], rules=rules)
+
+        result = checker.fix_file(str(source), checker.find_violations())
+        self.assertEqual(result.outcomes[0][1:], (True, 'logError -> AppLogger.e'))
+        self.assertEqual(source.read_text(), "import 'package:memverse/src/utils/app_logger.dart';\n"
+                                              "void f() {\n  AppLogger.e('x', error: e);\n}\n")
+
+        unfixable = LoggingChecker([], rules=[Rule('print', r'(?<!\w)print\(')])
+        with self.assertRaises(ValueError):
+            unfixable.line_edits("print('x');\n", 'print')
+
+
+class TestImportTable(unittest.TestCase):
+    """Test cases for reporting only calls that resolve to the prohibited libraries."""
+
+    def setUp(self):
+        """Set up a checker with the shipped rules."""
+        self.checker = LoggingChecker([], rules=load_rules(DEFAULT_RULES_FILE))
+
+    def scan(self, text: str) -> List:
+        """Get the (line, rule) pairs reported for a library."""
+        return [(v.line_number, v.violation_type) for v in self.checker.scan_text('lib/a.dart', text)]
+
+    def test_calls_resolve_through_imports(self):
+        """Test that prefixes, combinators and local declarations decide what a call resolves to."""
+        cases = [
+            ("import 'dart:math';\nvoid f() {\n  log(2);\n}\n", []),
+            ("import 'dart:math' as math;\nimport 'dart:developer' as dev;\n\nvoid f() {\n"
+             "  math.log(2);\n  dev.log('x');\n  log('y');\n}\n", [(6, 'log')]),
+            ("import 'dart:developer' hide log;\nvoid f() {\n  log('x');\n}\n", []),
+            ("import 'dart:developer' show log;\nvoid f() {\n  someObject.log('x');\n  a?.log('y');\n  log('z');\n}\n",
+             [(5, 'log')]),
+            ("import 'dart:developer';\n\ndouble log(double x) => x;\n\nvoid f() {\n  log(1);\n}\n", []),
+            ("// Comments and annotations precede directives\n@TestOn('vm')\nlibrary;\n\n"
+             "import 'stub.dart' if (dart.library.ui) 'package:flutter/foundation.dart';\n\n"
+             "void f() {\n  debugPrint('x');\n}\n", [(8, 'debugPrint')]),
+            # A part file has the imports of its library
+            ("part of 'app.dart';\n\nvoid f() {\n  log('x');\n  print('y');\n}\n", [(4, 'log'), (5, 'print')]),
+            # dart:core is imported implicitly, unless it is imported explicitly
+            ("import 'dart:core' hide print;\nvoid f() {\n  print('x');\n}\n", []),
+        ]
+        for text, expected in cases:
+            self.assertEqual(self.scan(text), expected, text)
+
+    def test_unreachable_files_are_skipped(self):
+        """Test that files that can't reach a prohibited symbol are not decoded past their imports."""
+        source = b"import 'dart:math';\n\nvoid f() {\n  log(2);\n}\n"
+        with mock.patch('check_logging_standards._decode_source') as decode:
+            result = self.checker.scan_bytes(Path('test/a_test.dart'), source)
+        decode.assert_not_called()
+        self.assertFalse(result.decoded)
+        # print() is only prohibited in lib, where dart:core reaches it
+        self.assertTrue(self.checker.scan_bytes(Path('lib/a.dart'), source).decoded)
+
+        # Imports past the first chunk of the header are still seen
+        imports = ''.join(f"import 'package:app/src/module_{i:03}.dart';\n" for i in range(200))
+        source = f"{imports}import 'dart:developer';\n\nvoid f() {{\n  log('x');\n}}\n".encode()
+        self.assertEqual([v.line_number for v in self.checker.scan_bytes(Path('test/a_test.dart'), source).violations],
+                         [204])
+
+    def test_auto_fix_leaves_other_calls(self):
+        """Test that fixing a file only rewrites the calls that resolve to the prohibited libraries."""
+        source = "import 'dart:developer';\nimport 'dart:math' as math;\n\nvoid f() {\n  log('x'); math.log(2);\n}\n"
+        fixed, _ = fix_source(source, 'lib/a.dart', self.checker)
+        self.assertIn("  AppLogger.d('x'); math.log(2);\n", fixed)
+        self.assertEqual(fix_source("import 'dart:math';\nvoid f() {\n  log(2);\n}\n", 'lib/a.dart', self.checker)[1],
+                         [])
+
+
+class TestMonorepo(unittest.TestCase):
+    """Test cases for checking several packages at once."""
+
+    def setUp(self):
+        """Set up a repository with an app, a package and the package's example."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        source = "import 'package:flutter/foundation.dart';\n\nvoid f() {\n  debugPrint('a');\n  print('x');\n}\n"
+        for root, name in (('', 'app'), ('packages/core', "'core' # Shared code"), ('packages/core/example', 'example')):
+            (self.root / root / 'lib').mkdir(parents=True)
+            (self.root / root / 'pubspec.yaml').write_text(f"name: {name}\nversion: 1.0.0\n")
+            (self.root / root / 'lib' / 'a.dart').write_text(source)
+        # Platform folders hold copies of plugin packages
+        (self.root / 'ios' / 'plugin').mkdir(parents=True)
+        (self.root / 'ios' / 'plugin' / 'pubspec.yaml').write_text("name: plugin\n")
+        # The package relaxes print() to a warning
+        rules = json.loads(Path(DEFAULT_RULES_FILE).read_text())
+        rules['rules'][2]['severity'] = 'warning'
+        (self.root / 'packages' / 'core' / 'logging_rules.json').write_text(json.dumps(rules))
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+
+    def test_discover_packages(self):
+        """Test that every package is found with its name, and files map to the innermost package."""
+        index = PackageIndex()
+        packages = index.discover([str(self.root)])
+        self.assertEqual([(os.path.relpath(package.root, self.root), package.name) for package in packages],
+                         [('.', 'app'), ('packages/core', 'core'), ('packages/core/example', 'example')])
+
+        # Names are read once
+        (self.root / 'packages' / 'core' / 'pubspec.yaml').write_text("name: renamed\n")
+        package = index.package_of(str(self.root / 'packages' / 'core' / 'lib' / 'src' / 'b.dart'))
+        self.assertEqual((package.root, package.name), (str(self.root / 'packages' / 'core'), 'core'))
+        self.assertIsNone(index.package_of(os.path.join(tempfile.gettempdir(), 'a.dart')))
+
+    def test_check_and_fix_packages(self):
+        """Test that every package is checked with its own rules and fixed with its own import."""
+        packages = PackageIndex().discover([str(self.root)])
+        checker = MonorepoChecker(packages, ['lib', 'test'], rules=load_rules(DEFAULT_RULES_FILE), jobs=2,
+                                  output_format='json', auto_fix=True)
+        output = io.StringIO()
+        with redirect_stdout(output), mock.patch('sys.stderr', io.StringIO()):
+            self.assertFalse(checker.check_and_fix())  # print() can't be fixed
+
+        report = json.loads(output.getvalue())
+        self.assertEqual([(package['package'], package['files'], package['violations'], package['errors'])
+                          for package in report['packages']],
+                         [('app', 1, 2, 2), ('core', 1, 2, 1), ('example', 1, 2, 2)])
+        self.assertEqual(report['summary']['errors'], 5)
+
+        for root, package in (('', 'app'), ('packages/core', 'core'), ('packages/core/example', 'example')):
+            content = (self.root / root / 'lib' / 'a.dart').read_text()
+            self.assertTrue(content.startswith("import 'package:flutter/foundation.dart';\n"
+                                               f"import 'package:{package}/src/utils/app_logger.dart';\n"), content)
+            self.assertIn("AppLogger.d('a');", content)
+
+
+class TestDartFileFinder(unittest.TestCase):
+    """Test cases for discovering the dart files to check."""
+
+    def setUp(self):
+        """Set up a directory tree with files that are and aren't checked."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        (self.root / '.git').mkdir()  # Marks the work tree root for .gitignore lookups
+        (self.root / '.gitignore').write_text("ignored/\n*.skip.dart\n!keep.skip.dart\n")
+        for name in ['lib/a.dart', 'lib/a.g.dart', 'lib/a.freezed.dart', 'lib/notes.txt',
+                     'lib/web/b.dart', 'lib/ignored/c.dart', 'lib/d.skip.dart', 'lib/keep.skip.dart',
+                     'lib/generated/e.dart', 'build/f.dart', '.dart_tool/g.dart', 'android/h.dart',
+                     'pubspec.yaml']:
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("void f() {}\n")
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+
+    def found(self, **kwargs) -> List[str]:
+        """Find the dart files under the test root, relative to it."""
+        finder = DartFileFinder([self.temp_dir.name], use_git=False, **kwargs)
+        return [path.relative_to(self.root).as_posix() for path in finder.find()]
+
+    def test_walk_prunes_and_honors_gitignore(self):
+        """Test that generated, ignored and tool directories are skipped."""
+        self.assertEqual(self.found(), ['lib/a.dart', 'lib/keep.skip.dart', 'lib/generated/e.dart',
+                                        'lib/web/b.dart'])
+
+    def test_excludes(self):
+        """Test excluding files and directories by glob."""
+        self.assertEqual(self.found(excludes=['generated', '*/lib/web/*']), ['lib/a.dart', 'lib/keep.skip.dart'])
+        self.assertEqual(len(self.found(use_gitignore=False)), 6)
+
+    def test_find_is_lazy(self):
+        """Test that files are yielded before the walk finishes."""
+        files = DartFileFinder([self.temp_dir.name], use_git=False).find()
+        self.assertEqual(next(files).name, 'a.dart')
+
+    def test_generated_header_is_not_reported(self):
+        """Test that files marked as generated code are not scanned."""
+        checker = LoggingChecker([])
+        header = (b"// coverage:ignore-file\n// GENERATED CODE - DO NOT MODIFY BY HAND\n\n"
+                  b"import 'dart:developer';\nvoid f() { log('x'); }\n")
+        self.assertEqual(checker.scan_bytes(Path('gen.dart'), header).violations, [])
+        self.assertEqual(len(checker.scan_bytes(Path('gen.dart'), header[24:].replace(b'GENERATED', b'')).violations), 1)
+
+
+class TestWatch(unittest.TestCase):
+    """Test cases for watch mode."""
+
+    def setUp(self):
+        """Set up a directory with one file and its index."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.lib = os.path.join(self.temp_dir.name, 'lib')
+        os.mkdir(self.lib)
+        self.write('a.dart', "import 'package:flutter/foundation.dart';\nvoid a() {\n  debugPrint('a');\n}\n")
+        self.checker = LoggingChecker([self.lib], use_git=False)
+        self.index = ViolationIndex()
+        for file_path, violations in self.checker.find_violations_by_file():
+            self.index.update(file_path, violations)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+
+    def write(self, name: str, content: str) -> str:
+        """Write a file in the watched directory and return its path."""
+        path = os.path.join(self.lib, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def diff(self, changed) -> List[List[str]]:
+        """Process changes and return the introduced and resolved violations as strings."""
+        introduced, resolved = self.checker.process_changes(self.index, changed)
+        return [[f"{os.path.basename(v.file_path)}:{v.line_number}" for v in violations]
+                for violations in (introduced, resolved)]
+
+    def test_index_ignores_moved_lines(self):
+        """Test that violations that only moved are neither introduced nor resolved."""
+        path = self.write('a.dart', "import 'dart:developer';\nimport 'package:flutter/foundation.dart';\n\n"
+                                    "void a() {\n  debugPrint('a');\n  log('b');\n}\n")
+        self.assertEqual(self.diff({path}), [['a.dart:6'], []])
+        self.assertEqual(self.index.violation_count(), 2)
+
+    def test_polling_watcher_reports_changes(self):
+        """Test rescanning created, modified and deleted files found by polling."""
+        watcher = PollingWatcher(self.checker.finder)
+        os.remove(os.path.join(self.lib, 'a.dart'))
+        self.write('sub/b.dart', "import 'dart:developer';\nvoid b() {\n  log('b');\n}\n")
+
+        self.assertEqual(self.diff(watcher.poll(0)), [['b.dart:3'], ['a.dart:3']])
+        self.assertEqual(watcher.poll(0), set())
+
+    def test_removed_directory_resolves_its_files(self):
+        """Test that removing a directory resolves the violations of all files in it."""
+        self.diff({self.write('sub/b.dart', "import 'dart:developer';\nvoid b() {\n  log('b');\n}\n")})
+        shutil.rmtree(os.path.join(self.lib, 'sub'))
+        self.assertEqual(self.diff({os.path.join(self.lib, 'sub')}), [[], ['b.dart:3']])
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "inotify is Linux only")
+    def test_inotify_watcher_reports_changes(self):
+        """Test that inotify reports modified files and files in new directories."""
+        watcher = InotifyWatcher(self.checker.finder, [self.lib])
+        try:
+            path = self.write('a.dart', "void a() {}\n")
+            new_path = self.write('sub/b.dart', "void b() {}\n")
+            changed = set()
+            while new_path not in changed:
+                batch = watcher.poll(1.0)
+                self.assertTrue(batch, "no inotify events")
+                changed.update(batch)
+            self.assertIn(path, changed)
+        finally:
+            watcher.close()
+
+    def test_wait_for_changes_debounces(self):
+        """Test that a burst of events is collected until the watcher goes quiet."""
+        watcher = mock.Mock()
+        watcher.poll.side_effect = [set(), {'a'}, {'b'}, set()]
+        self.assertEqual(self.checker.wait_for_changes(watcher), {'a', 'b'})
+        self.assertEqual([call.args[0] for call in watcher.poll.call_args_list],
+                         [LoggingChecker.WATCH_POLL_INTERVAL, LoggingChecker.WATCH_POLL_INTERVAL,
+                          LoggingChecker.WATCH_DEBOUNCE, LoggingChecker.WATCH_DEBOUNCE])
+
+
+@unittest.skipUnless(shutil.which('git'), "git is not installed")
+class TestGitChanges(unittest.TestCase):
+    """Test cases for checking only the lines changed in git."""
+
+    # Imports that make the prohibited calls resolve
+    HEADER = "import 'dart:developer';\nimport 'package:flutter/foundation.dart';\n"
+
+    def setUp(self):
+        """Set up a git repository with one committed file."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.temp_dir.name)
+
+        self.git('init', '-q')
+        os.mkdir('lib')
+        Path('lib/a.dart').write_text(self.HEADER + "void a() {\n  log('committed');\n}\n")
+        self.git('add', '.')
+        self.git('-c', 'user.name=Test', '-c', 'user.email=test@example.com', 'commit', '-q', '-m', 'init')
+
+    def tearDown(self):
+        """Clean up after tests."""
+        os.chdir(self.original_cwd)
+        self.temp_dir.cleanup()
+
+    def git(self, *args: str) -> None:
+        """Run a git command in the test repository."""
+        subprocess.run(['git', *args], check=True, stdout=subprocess.DEVNULL)
+
+    def changed_violations(self, git_changes: GitChanges, all_lines: bool = False) -> List[str]:
+        """Find the violations in changed files as strings."""
+        checker = LoggingChecker(['lib'], git_changes=git_changes, all_lines=all_lines)
+        return [str(v) for v in checker.find_violations()]
+
+    def test_staged_reads_index_content(self):
+        """Test that only staged lines are reported, even if the working tree differs."""
+        Path('lib/a.dart').write_text(self.HEADER + "void a() {\n  log('committed');\n  debugPrint('staged');\n}\n")
+        self.git('add', 'lib/a.dart')
+        Path('lib/a.dart').write_text(self.HEADER + "void a() {\n  debugPrint('unstaged');\n}\n")
+
+        self.assertEqual(self.changed_violations(GitChanges(staged=True)),
+                         ["lib/a.dart:5: debugPrint('staged');"])
+        self.assertEqual(self.changed_violations(GitChanges(staged=True), all_lines=True),
+                         ["lib/a.dart:4: log('committed');", "lib/a.dart:5: debugPrint('staged');"])
+
+    def test_find_dart_files_uses_git(self):
+        """Test that discovery lists tracked and untracked files but not ignored ones."""
+        Path('.gitignore').write_text("lib/ignored.dart\n")
+        Path('lib/b.dart').write_text("void b() {}\n")
+        Path('lib/ignored.dart').write_text("void c() {}\n")
+        os.remove('lib/a.dart')
+        self.git('add', '.gitignore')
+        Path('lib/d.dart').write_text("void d() {}\n")
+
+        self.assertEqual(DartFileFinder(['lib']).git_files(), ['lib/a.dart', 'lib/b.dart', 'lib/d.dart'])
+        self.assertEqual([str(path) for path in LoggingChecker(['lib']).find_dart_files()],
+                         ['lib/b.dart', 'lib/d.dart'])
+
+    def test_changed_since_includes_untracked_files(self):
+        """Test that working tree changes and new files are checked against a ref."""
+        Path('lib/a.dart').write_text(self.HEADER + "void a() {\n  log('committed');\n  log('edited');\n}\n")
+        Path('lib/b.dart').write_text(self.HEADER + "void b() {\n  debugPrint('new file');\n}\n")
+
+        self.assertEqual(self.changed_violations(GitChanges(since='HEAD')), [
+            "lib/a.dart:5: log('edited');",
+            "lib/b.dart:4: debugPrint('new file');",
+        ])
+
+    def test_unusual_file_names(self):
+        """Test that paths git quotes or marks with a trailing tab are read back as they are."""
+        names = ['lib/a"b.dart', 'lib/a\\b.dart', 'lib/a\tb.dart', 'lib/a b.dart']
+        for name in names:
+            Path(name).write_text(self.HEADER + "void a() {\n  log('x');\n}\n")
+        self.git('add', '.')
+        expected = sorted(f"{name}:4: log('x');" for name in names)
+        self.assertEqual(self.changed_violations(GitChanges(staged=True)), expected)
+        self.git('-c', 'user.name=Test', '-c', 'user.email=test@example.com', 'commit', '-q', '-m', 'add')
+
+        for name in names:
+            Path(name).write_text(self.HEADER + "void a() {\n  log('x');\n  log('y');\n}\n")
+        self.assertEqual(self.changed_violations(GitChanges(since='HEAD')),
+                         sorted(f"{name}:5: log('y');" for name in names))
+
+
+class TestEarlyStop(unittest.TestCase):
+    """Test cases for scans that stop at the first error or when a time budget runs out."""
+
+    HEADER = "import 'dart:developer';\n"
+
+    def setUp(self):
+        """Set up a git repository of clean files, with violations in some."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.temp_dir.name)
+
+        self.git('init', '-q')
+        os.mkdir('lib')
+        for index in range(8):
+            Path(f'lib/f{index}.dart').write_text(self.HEADER + f"void f{index}() {{\n  AppLogger.d('ok');\n}}\n")
+        Path('lib/f3.dart').write_text(self.HEADER + "void f3() {\n  log('old');\n}\n")
+        self.git('add', '.')
+        self.git('-c', 'user.name=Test', '-c', 'user.email=test@example.com', 'commit', '-q', '-m', 'init')
+        # Ascending mtimes: f7 is the newest file
+        for index in range(8):
+            os.utime(f'lib/f{index}.dart', ns=(10**18 + index * 10**9,) * 2)
+        self.cache_file = os.path.join('.dart_tool', 'logging_check_cache')
+
+    def tearDown(self):
+        """Clean up after tests."""
+        os.chdir(self.original_cwd)
+        self.temp_dir.cleanup()
+
+    def git(self, *args: str) -> None:
+        """Run a git command in the test repository."""
+        subprocess.run(['git', *args], check=True, stdout=subprocess.DEVNULL)
+
+    def check(self, checker: LoggingChecker) -> Dict:
+        """Run a check with JSON output and return its summary."""
+        output = io.StringIO()
+        with redirect_stdout(output), mock.patch('sys.stderr', io.StringIO()):
+            checker.check_and_fix()
+        return json.loads(output.getvalue())['summary']
+
+    def test_changed_files_and_previous_hits_first(self):
+        """Test that files changed in git come first, then files with cached violations, newest first."""
+        LoggingChecker(['lib'], cache_file=self.cache_file).find_violations()
+        Path('lib/f1.dart').write_text(self.HEADER + "void f1() {\n  log('new');\n}\n")
+        os.utime('lib/f1.dart', ns=(10**18,) * 2)
+
+        checker = LoggingChecker(['lib'], cache_file=self.cache_file, fail_fast=True)
+        self.assertEqual([path.name for path in checker.prioritized_files()],
+                         ['f1.dart', 'f3.dart', 'f7.dart', 'f6.dart', 'f5.dart', 'f4.dart', 'f2.dart', 'f0.dart'])
+
+        self.assertEqual([str(v) for v in checker.find_violations()], ["lib/f1.dart:3: log('new');"])
+        self.assertEqual((checker.progress.stopped, checker.progress.files_checked, checker.progress.files_total),
+                         ('fail-fast', 1, 8))
+
+    def test_fail_fast_cancels_outstanding_work(self):
+        """Test that stopping early drops the files not yet scanned, on worker processes too."""
+        for index in range(8, 200):
+            Path(f'lib/f{index}.dart').write_text(self.HEADER + f"void f{index}() {{}}\n")
+        self.git('add', '.')
+        self.git('-c', 'user.name=Test', '-c', 'user.email=test@example.com', 'commit', '-q', '-m', 'more')
+        os.utime('lib/f3.dart', ns=(2 * 10**18,) * 2)
+
+        checker = LoggingChecker(['lib'], jobs=2, fail_fast=True, output_format='json')
+        checker.PARALLEL_MIN_FILES = 0
+        summary = self.check(checker)
+        self.assertEqual((summary['errors'], summary['complete'], summary['stopped'], summary['files_checked']),
+                         (1, False, 'fail-fast', 1))
+        with redirect_stdout(io.StringIO()), mock.patch('sys.stderr', io.StringIO()):
+            self.assertFalse(checker.check_and_fix())
+
+    def test_time_budget(self):
+        """Test that a scan out of time reports a partial result, and one within it a complete result."""
+        os.utime('lib/f3.dart', ns=(10**18 - 10**9,) * 2)  # The oldest file, scanned last
+        checker = LoggingChecker(['lib'], time_budget=1e-9, output_format='json')
+        summary = self.check(checker)
+        self.assertEqual((summary['total'], summary['complete'], summary['stopped'], summary['files_checked']),
+                         (0, False, 'time-budget', 1))
+        # No error was found, so a partial result passes
+        with mock.patch('sys.stderr', io.StringIO()) as messages, redirect_stdout(io.StringIO()):
+            self.assertTrue(checker.check_and_fix())
+        self.assertIn("after checking 1 of 8 files: the result is partial", messages.getvalue())
+
+        summary = self.check(LoggingChecker(['lib'], time_budget=60, output_format='json'))
+        self.assertEqual((summary['errors'], summary['complete'], summary['stopped'], summary['files_checked']),
+                         (1, True, None, 8))
+
+    def test_staged_fail_fast(self):
+        """Test that a pre-commit check stops at the first staged file with an error."""
+        for index in (2, 5):
+            Path(f'lib/f{index}.dart').write_text(self.HEADER + f"void f{index}() {{\n  log('staged');\n}}\n")
+        self.git('add', '.')
+
+        checker = LoggingChecker(['lib'], git_changes=GitChanges(staged=True), fail_fast=True)
+        self.assertEqual([str(v) for v in checker.find_violations()], ["lib/f2.dart:3: log('staged');"])
+        self.assertEqual((checker.progress.stopped, checker.progress.files_checked, checker.progress.files_total),
+                         ('fail-fast', 1, 2))
+
+    def test_partial_results_are_not_merged(self):
+        """Test that merging shard results refuses a partial one."""
+        output = io.StringIO()
+        with redirect_stdout(output), mock.patch('sys.stderr', io.StringIO()):
+            LoggingChecker(['lib'], fail_fast=True, time_budget=1e-9, output_format='json').check_and_fix()
+        Path('shard.json').write_text(output.getvalue())
+        with self.assertRaisesRegex(ValueError, 'partial'):
+            LoggingChecker([]).merge_results(['shard.json'])
+
+
+class TestStreamingScan(unittest.TestCase):
+    """Test cases for scanning large files window by window."""
+
+    def setUp(self):
+        """Set up a temporary directory and a checker with the shipped rules."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.rules = load_rules(DEFAULT_RULES_FILE)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+
+    def write(self, name: str, text: str) -> Path:
+        """Write a source into the temporary directory."""
+        path = Path(self.temp_dir.name) / name
+        path.write_text(text)
+        return path
+
+    def test_long_lines_are_cut(self):
+        """Test that only the part of a long line around the call is kept."""
+        checker = LoggingChecker([], rules=self.rules, context_width=40)
+        text = ("import 'dart:developer';\nconst a = ['" + 'x' * 5000 + "']; log('long');  // " + 'y' * 5000 +
+                "\nvoid f() { log('short'); }\n")
+        violations = checker.scan_text('lib/a.dart', text)
+        self.assertEqual([(v.line_number, v.line_content) for v in violations],
+                         [(2, "...xxxxxxxxxxxxxxxx']; log('long');  // yyy..."),
+                          (3, "void f() { log('short'); }")])
+
+    def test_streamed_scan_matches_in_memory_scan(self):
+        """Test that windows cutting through comments, strings and calls give the violations of a whole scan."""
+        entries = ', '.join(f"'key{i}': 'value {i}'" for i in range(300))
+        text = ("import 'dart:developer';\nimport 'package:flutter/foundation.dart';\n"
+                "/* log('in a comment'\n" + 'z' * 3000 + "\n*/\n"
+                "const s = '''\nlog('in a string');\n''';\n" +
+                ''.join(f"const m{i} = {{{entries}}}; void f{i}() {{ log('{i}'); debugPrint('{i}'); }}\n"
+                        for i in range(20)) +
+                "double log(double x) => x;\n")
+        path = self.write('messages.dart', text)
+        expected = LoggingChecker([], rules=self.rules, context_width=60).scan_file(path)
+
+        checker = LoggingChecker([], rules=self.rules, context_width=60, stream_min_size=len(text) // 2)
+        checker.STREAM_WINDOW = 1000
+        checker.STREAM_OVERLAP = 100
+        with mock.patch('check_logging_standards._decode_source') as decode:
+            violations = checker.scan_file(path)
+        decode.assert_not_called()
+        self.assertEqual([str(v) for v in violations], [str(v) for v in expected])
+        # The declaration at the end makes every call above it local
+        self.assertEqual({v.violation_type for v in violations}, {'debugPrint'})
+        self.assertEqual(len(violations), 20)
+
+    def test_memory_stays_bounded(self):
+        """Test that the memory a streamed scan needs doesn't grow with the size of the file."""
+        line = 'const messages = <String, String>{' + ', '.join(f"'key{i}': 'value {i}'" for i in range(5000)) + '};\n'
+        path = self.write('app_localizations.dart',
+                          "import 'dart:developer';\n" + line * 100 + "void f() {\n  log('x');\n}\n")
+        self.assertGreater(path.stat().st_size, 10 << 20)
+        checker = LoggingChecker([], rules=self.rules, stream_min_size=1 << 20)
+        tracemalloc.start()
+        try:
+            violations = checker.scan_file(path)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual([(v.line_number, v.line_content) for v in violations], [(103, "log('x');")])
+        self.assertLess(peak, 8 << 20)
+
+    def test_long_first_declaration_is_not_decoded_for_imports(self):
+        """Test that a long declaration after the imports doesn't make the whole file decoded to parse them."""
+        line = 'const messages = <String, String>{' + ', '.join(f"'key{i}': 'value {i}'" for i in range(500000)) + '};\n'
+        path = self.write('app_localizations.dart', "import 'dart:developer';\n" + line + "void f() {\n  log('x');\n}\n")
+        self.assertGreater(path.stat().st_size, 10 << 20)
+        checker = LoggingChecker([], rules=self.rules, stream_min_size=1 << 20)
+        tracemalloc.start()
+        try:
+            violations = checker.scan_file(path)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual([(v.line_number, v.line_content) for v in violations], [(4, "log('x');")])
+        self.assertLess(peak, 8 << 20)
+
+        # A directive cut off by the end of the header is still read whole
+        imports = ImportTable.from_bytes(b"import 'dart:developer' show " + b'x, ' * 2000 + b'log;\n' + line.encode())
+        self.assertEqual(imports.imports[0][2], [('show', {'x', 'log'})])
+
+
 class TestExamples(unittest.TestCase):
     """
     Example-based tests that demonstrate how the logging checker works.
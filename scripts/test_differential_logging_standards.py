@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Differential tests for check_logging_standards.py
+
+Every fast path of the checker is compared against a deliberately naive
+reference scanner on randomly generated Dart sources: nested comments,
+strings of every kind, interpolation, multi-line calls, CR and CRLF line
+endings, undecodable bytes and import headers. A source on which a path
+disagrees with the reference is shrunk to a minimal reproducer before the
+test fails.
+
+Set LOGGING_DIFF_CASES to the number of sources per test (default 120), and
+LOGGING_DIFF_SEED to reproduce a run with other sources.
+"""
+
+import os
+import random
+import tempfile
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+from unittest import mock
+from check_logging_standards import (
+    DEFAULT_CONTEXT_WIDTH, DEFAULT_RULES_FILE, ImportTable, LoggingChecker, LoggingViolation, Rule,
+    _apply_line_changes, _decode_source, _excerpt, _is_generated_source, _is_identifier_char, _split_lines,
+    check_source, fix_source, load_rules
+)
+from lsp_logging_standards import LspDocument
+
+CASES = int(os.environ.get('LOGGING_DIFF_CASES', '120'))
+SEED = int(os.environ.get('LOGGING_DIFF_SEED', '1'))
+
+# (line number, rule id, stripped line) of every violation of a file
+Found = List[Tuple[int, str, str]]
+# Sources as (path, tokens); a source is the concatenation of its tokens, so shrinking drops whole tokens
+Case = Tuple[str, List[bytes]]
+
+
+class ReferenceScanner:
+    """A slow, obviously correct scanner that the optimized paths must agree with.
+
+    The source is lexed one character at a time into a code mask, and every
+    rule's regex is tried on every line, keeping matches that start in code
+    and, for import-aware rules, resolve to the rule's libraries. None of the
+    prefilters, combined patterns, line-local lexing or caches of the checker
+    are involved.
+    """
+
+    def __init__(self, rules: List[Rule], context_width: int = DEFAULT_CONTEXT_WIDTH):
+        self.rules = rules
+        self.context_width = context_width
+
+    @staticmethod
+    def code_mask(text: str) -> List[bool]:
+        """Tell for every character of a Dart source whether it is code."""
+        length = len(text)
+        code = [False] * length
+        interpolations = []  # (quote, raw, brace depth) of the strings enclosing the ${...} being lexed
+        depth = 0
+        i = 0
+        while i < length:
+            if text.startswith('//', i):
+                while i < length and text[i] != '\n':
+                    i += 1
+                continue
+            if text.startswith('/*', i):
+                level = 0
+                while i < length:
+                    if text.startswith('/*', i):
+                        level += 1
+                        i += 2
+                    elif text.startswith('*/', i):
+                        level -= 1
+                        i += 2
+                        if not level:
+                            break
+                    else:
+                        i += 1
+                continue
+
+            quote = next((quote for quote in ("'''", '"""', "'", '"') if text.startswith(quote, i)), None)
+            if quote is None:
+                if interpolations and text[i] == '}' and not depth:
+                    # The brace ending ${...} belongs to the string it resumes
+                    quote, raw, depth = interpolations.pop()
+                    i += 1
+                else:
+                    if interpolations and text[i] in '{}':
+                        depth += 1 if text[i] == '{' else -1
+                    code[i] = True
+                    i += 1
+                    continue
+            else:
+                raw = i > 0 and text[i - 1] == 'r' and (i < 2 or not _is_identifier_char(text[i - 2]))
+                if raw:
+                    code[i - 1] = False
+                i += len(quote)
+
+            while i < length:
+                if text.startswith(quote, i):
+                    i += len(quote)
+                    break
+                if len(quote) == 1 and text[i] == '\n':
+                    break  # An unterminated string ends with its line
+                if not raw and text[i] == '\\':
+                    # In single-line strings a backslash doesn't escape the line break
+                    i += 1 if len(quote) == 1 and text[i + 1:i + 2] == '\n' else 2
+                    continue
+                if not raw and text.startswith('${', i):
+                    interpolations.append((quote, raw, depth))
+                    depth = 0
+                    i += 2
+                    break
+                i += 1
+        return code
+
+    def violations(self, path: str, data: bytes) -> Found:
+        """Find the violations of a file."""
+        if _is_generated_source(data):
+            return []
+        text = str(data, 'utf-8', 'replace').replace('\r\n', '\n').replace('\r', '\n')
+        code = self.code_mask(text)
+        imports, _ = ImportTable.parse(text)
+        imports.declare(text, [rule.symbol for rule in self.rules if rule.libraries])
+        rules = [rule for rule in self.rules if rule.applies_to(path)]
+
+        found = []
+        line_start = 0
+        for line_number, line in enumerate(text.splitlines(keepends=True), 1):
+            hits = []
+            for rule in rules:
+                for match in rule.regex.finditer(line):
+                    if not code[line_start + match.start()]:
+                        continue
+                    if rule.libraries:
+                        position = line.find(rule.symbol, match.start(), match.end())
+                        if position != -1 and not imports.resolves(rule, line[:position]):
+                            continue
+                    hits.append((rule.rule_id, match.start()))
+                    break
+            if hits:
+                # Long lines are cut around the first call
+                content = _excerpt(line, 0, len(line), min(start for _, start in hits), self.context_width).strip()
+                found.extend((line_number, rule_id, content) for rule_id, _ in hits)
+            line_start += len(line)
+        return found
+
+
+class SourceGenerator:
+    """Generates random Dart sources as lists of tokens."""
+
+    HEADER = [b"import 'dart:developer';", b"import 'dart:developer' as dev;", b"import 'dart:developer' show log;",
+              b"import 'dart:developer' hide log;", b"import 'dart:math';", b"import 'dart:math' as math;",
+              b"import 'package:flutter/foundation.dart';", b"import 'package:flutter/material.dart' hide debugPrint;",
+              b"import 'dart:core' hide print;", b"part of 'app.dart';", b"library;", b"@TestOn('vm')",
+              b"// Header comment", b"/* header */"]
+    CALLS = [b"debugPrint('a');", b"log('b');", b"log('c', name: 'N');", b"print(1);", b"dev.log('d');",
+             b"math.log(2);", b"logger.log('e');", b"a?.log('f');", b"log(\n  'multi',\n  name: 'line',\n);",
+             b"debugPrint(\n'x');", b"log('x', name: f(1, 2), level: 3);", b"log('log(', name: 'n');",
+             b"log (x);", b"print('\xc3\xa9');", b"log('x', name: 'a, b'); log('y');"]
+    DECLARATIONS = [b"double log(double x) => x;", b"void debugPrint(String s) {}", b"void f() {", b"}"]
+    LEXICAL = [b"// log('c');", b"/*", b"*/", b"/* debugPrint('x') /* nested */ log( */", b"'", b'"', b"'''", b'"""',
+               b"r'", b"r'''", b"'${", b'"${', b"${", b"}", b"{", b"$log(", b"'\\'", b"\\", b"x = 1;", b" ",
+               b"\t", b"\xc3\xa9", b"\xf0\x9f\x98\x80"]
+    LINE_ENDINGS = [b"\n", b"\n", b"\n", b"\r\n", b"\r"]
+    UNDECODABLE = [b"\xff", b"\xc3", b"\xe2\x82"]
+
+    def __init__(self, seed: int):
+        self.random = random.Random(seed)
+
+    def tokens(self) -> List[bytes]:
+        """Generate the tokens of one source."""
+        rng = self.random
+        tokens = []
+        for _ in range(rng.randint(0, 4)):
+            tokens += [rng.choice(self.HEADER), b"\n"]
+        if rng.random() < 0.1:
+            # Headers longer than the first chunk the byte-level scan decodes
+            for i in range(rng.randint(100, 200)):
+                tokens += [b"import 'package:app/src/module_%03d.dart';" % i, b"\n"]
+            tokens += [b"import 'dart:developer';", b"\n"]
+        for _ in range(rng.randint(1, 40)):
+            pool = rng.choices([self.CALLS, self.DECLARATIONS, self.LEXICAL, self.LINE_ENDINGS, self.UNDECODABLE],
+                               weights=[8, 2, 10, 8, 1])[0]
+            tokens.append(rng.choice(pool))
+        return tokens
+
+    def cases(self, count: int) -> List[Case]:
+        """Generate sources, some of them under lib/ where print() is prohibited."""
+        return [(f"lib/f{i}.dart" if self.random.random() < 0.5 else f"test/f{i}_test.dart", self.tokens())
+                for i in range(count)]
+
+
+def shrink(tokens: List[bytes], failing: Callable[[List[bytes]], bool]) -> List[bytes]:
+    """Drop tokens from a failing source for as long as it still fails.
+
+    Chunks of tokens are dropped, halving the chunk size whenever no chunk
+    can be dropped, down to single tokens.
+
+    Args:
+        tokens: Tokens of a failing source
+        failing: Tells whether a source still fails
+
+    Returns:
+        A source from which no single token can be dropped without passing
+    """
+    chunk = max(len(tokens) // 2, 1)
+    while True:
+        dropped = False
+        i = 0
+        while i < len(tokens):
+            candidate = tokens[:i] + tokens[i + chunk:]
+            if failing(candidate):
+                tokens = candidate
+                dropped = True
+            else:
+                i += chunk
+        if chunk == 1 and not dropped:
+            return tokens
+        if not dropped:
+            chunk //= 2
+
+
+def found(violations: List[LoggingViolation]) -> Found:
+    """Get the comparable form of violations."""
+    return [(violation.line_number, violation.violation_type, violation.line_content) for violation in violations]
+
+
+@contextmanager
+def source_tree(sources: List[Tuple[str, bytes]]) -> Iterator[str]:
+    """Write sources into a temporary directory, and work in it.
+
+    Yields:
+        The directory
+    """
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            for path, data in sources:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                Path(path).write_bytes(data)
+            yield directory
+        finally:
+            os.chdir(original_cwd)
+
+
+class DifferentialTest(unittest.TestCase):
+    """Base class comparing a checker path against the reference on generated sources."""
+
+    def setUp(self):
+        """Set up the rules and the generated sources."""
+        self.rules = load_rules(DEFAULT_RULES_FILE)
+        self.checker = LoggingChecker([], use_git=False, rules=self.rules)
+        self.reference = ReferenceScanner(self.rules)
+        self.cases = SourceGenerator(SEED).cases(CASES)
+
+    def expected_fix(self, path: str, data: bytes) -> bytes:
+        """Get the contents --auto-fix should leave, fixing the reference's violations in memory.
+
+        Undecodable bytes are kept as they are.
+        """
+        lines = _split_lines(data.decode('utf-8', 'surrogateescape'))
+        violations = [LoggingViolation(path, line_number, line, rule_id)
+                      for line_number, rule_id, line in self.reference.violations(path, data)]
+        result = self.checker.fix_lines(path, lines, violations)
+        return ''.join(_apply_line_changes(lines, result.changes)).encode('utf-8', 'surrogateescape')
+
+    def assert_agrees(self, name: str, run: Callable[[List[Tuple[str, bytes]]], Dict[str, object]],
+                      expected: Callable[[str, bytes], object]) -> None:
+        """Assert that a checker path gives the expected result for every generated source.
+
+        Args:
+            name: Name of the path, for the failure message
+            run: Runs the path on (path, data) sources, returning the result of each path
+            expected: The expected result of a source
+        """
+        results = run([(path, b''.join(tokens)) for path, tokens in self.cases])
+        for path, tokens in self.cases:
+            data = b''.join(tokens)
+            if results.get(path) == expected(path, data):
+                continue
+
+            def failing(candidate: List[bytes]) -> bool:
+                candidate_data = b''.join(candidate)
+                return run([(path, candidate_data)]).get(path) != expected(path, candidate_data)
+
+            minimal = b''.join(shrink(tokens, failing))
+            self.fail(f"{name} disagrees with the reference on {path}, reduced to:\n{minimal!r}\n"
+                      f"expected: {expected(path, minimal)!r}\n"
+                      f"actual:   {run([(path, minimal)]).get(path)!r}")
+
+
+class TestReference(unittest.TestCase):
+    """Test cases for the harness itself."""
+
+    def test_code_mask(self):
+        """Test the reference lexer on the cases the checker's lexer handles specially."""
+        text = "a/* /* */ */b'c${d}e'r'\\'f\"g\n'''h\n''' // i\n"
+        mask = ReferenceScanner.code_mask(text)
+        self.assertEqual(''.join(char for char, code in zip(text, mask) if code), "abdf\n \n")
+
+    def test_shrink(self):
+        """Test that a failing source is reduced to the tokens the failure needs."""
+        tokens = [b'a', b'b', b'c', b'd', b'e', b'f', b'g']
+        self.assertEqual(shrink(tokens, lambda candidate: b'c' in candidate and b'f' in candidate), [b'c', b'f'])
+
+    def test_reference_agrees_with_examples(self):
+        """Test that the reference finds what the hand-written tests expect."""
+        text = (b"import 'dart:developer';\nimport 'dart:math' as math;\n/* log('x');\n*/\n"
+                b"void f() {\n  log('a'); math.log(2);\n  debugPrint('b');\n  print('${log('c')}');\n}\n")
+        self.assertEqual(ReferenceScanner(load_rules(DEFAULT_RULES_FILE)).violations('lib/a.dart', text),
+                         [(6, 'log', "log('a'); math.log(2);"), (8, 'log', "print('${log('c')}');"),
+                          (8, 'print', "print('${log('c')}');")])
+
+
+class TestScanModes(DifferentialTest):
+    """Test that every way of scanning finds the reference's violations."""
+
+    def test_in_memory(self):
+        """Test scanning decoded text, raw bytes and through the library API."""
+        self.assert_agrees('scan_text', lambda sources: {
+            path: found(self.checker.scan_text(path, _decode_source(data))) for path, data in sources
+        }, self.reference.violations)
+        self.assert_agrees('scan_bytes', lambda sources: {
+            path: found(self.checker.scan_bytes(Path(path), data).violations) for path, data in sources
+        }, self.reference.violations)
+        self.assert_agrees('check_source', lambda sources: {
+            path: found(check_source(data, path, self.checker)) for path, data in sources
+        }, self.reference.violations)
+
+    def test_memory_mapped(self):
+        """Test reading files through mmap."""
+        def run(sources):
+            with source_tree(sources), mock.patch('check_logging_standards.MMAP_MIN_SIZE', 1):
+                return {path: found(self.checker.scan_file_result(Path(path)).violations) for path, _ in sources}
+        self.assert_agrees('mmap', run, self.reference.violations)
+
+    def test_streamed(self):
+        """Test scanning window by window, with windows small enough to cut through every token."""
+        # A narrow context cuts most lines, and the overlap still holds every line of the generated sources
+        reference = ReferenceScanner(self.rules, context_width=24)
+        checker = LoggingChecker([], use_git=False, rules=self.rules, context_width=24)
+        self.assert_agrees('excerpts', lambda sources: {
+            path: found(checker.scan_bytes(Path(path), data).violations) for path, data in sources
+        }, reference.violations)
+        for window in (1, 7, 64):
+            checker = LoggingChecker([], use_git=False, rules=self.rules, context_width=24, stream_min_size=0)
+            checker.STREAM_WINDOW = window
+            checker.STREAM_OVERLAP = 256
+            self.assert_agrees(f'stream window {window}', lambda sources, checker=checker: {
+                path: found(checker.scan_bytes(Path(path), data).violations) for path, data in sources
+            }, reference.violations)
+
+    def scan_tree(self, sources: List[Tuple[str, bytes]], runs: int = 1, touch: bool = False,
+                  **options) -> Dict[str, Found]:
+        """Scan a tree of sources with a checker made with options, returning the violations of the last run."""
+        with source_tree(sources) as directory:
+            for _ in range(runs):
+                if touch:
+                    for path, _ in sources:
+                        os.utime(path, ns=(10**18, 10**18))
+                checker = LoggingChecker(['lib', 'test'], use_git=False, rules=self.rules, **options)
+                results: Dict[str, Found] = {path: [] for path, _ in sources}
+                for violation in checker.find_violations():
+                    results[violation.file_path].append(found([violation])[0])
+            return results
+
+    def test_directory_scans(self):
+        """Test serial, parallel and pipelined scans of a tree."""
+        self.assert_agrees('serial', self.scan_tree, self.reference.violations)
+        self.assert_agrees('jobs', lambda sources: self.scan_tree(sources, jobs=2), self.reference.violations)
+        self.assert_agrees('readers', lambda sources: self.scan_tree(sources, readers=2), self.reference.violations)
+
+    def test_cached_scans(self):
+        """Test scans answered from the cache, by mtime and by content hash."""
+        self.assert_agrees('cache', lambda sources: self.scan_tree(sources, runs=2, cache_file='cache'),
+                           self.reference.violations)
+        self.assert_agrees('cache by content', lambda sources: self.scan_tree(
+            sources, runs=2, touch=True, cache_file='cache'), self.reference.violations)
+
+    def test_language_server(self):
+        """Test documents opened whole and typed token by token."""
+        self.assert_agrees('lsp', lambda sources: {
+            path: found(LspDocument(self.checker, path, _decode_source(data)).violations()) for path, data in sources
+        }, self.reference.violations)
+
+        def typed(sources):
+            results = {}
+            for path, data in sources:
+                document = LspDocument(self.checker, path, '')
+                text = _decode_source(data)
+                # Typing in chunks at the end of the document
+                position = 0
+                rng = random.Random(len(text))
+                while position < len(text):
+                    size = rng.randint(1, 12)
+                    chunk = text[position:position + size]
+                    document.apply_change((len(document.lines), 0), (len(document.lines), 0), chunk)
+                    position += size
+                results[path] = found(document.violations())
+            return results
+        # Violations are compared by line and rule, as lines grow while typing
+        self.assert_agrees('lsp typing', typed, self.reference.violations)
+
+
+class TestFixModes(DifferentialTest):
+    """Test that every way of fixing writes the same contents."""
+
+    def test_fix_files(self):
+        """Test fixing files in place on several threads, and as a dry run."""
+        def run(sources, write=True):
+            with source_tree(sources):
+                checker = LoggingChecker(['lib', 'test'], use_git=False, rules=self.rules, jobs=2, auto_fix=True)
+                results = checker.fix_files(checker.find_violations(), write=write)
+                fixed = {path: data for path, data in sources}
+                for result in results:
+                    if write:
+                        fixed[result.file_path] = Path(result.file_path).read_bytes()
+                    else:
+                        fixed[result.file_path] = ''.join(_apply_line_changes(result.lines, result.changes)).encode(
+                            'utf-8', 'surrogateescape')
+                return fixed
+        self.assert_agrees('fix_files', run, self.expected_fix)
+        self.assert_agrees('dry run', lambda sources: run(sources, write=False), self.expected_fix)
+
+    def test_fix_source(self):
+        """Test fixing buffers through the library API."""
+        self.assert_agrees('fix_source', lambda sources: {
+            path: fix_source(data.decode('utf-8', 'surrogateescape'), path, self.checker)[0].encode(
+                'utf-8', 'surrogateescape') for path, data in sources
+        }, self.expected_fix)
+
+    def test_language_server_fix_all(self):
+        """Test the edits of the language server's fix-all action."""
+        def run(sources):
+            results = {}
+            for path, data in sources:
+                # Editors hold documents as text, with undecodable bytes already replaced
+                document = LspDocument(self.checker, path, data.decode('utf-8', 'replace'))
+                edits, _ = document.text_edits(document.violations())
+                # Later edits first, so earlier positions stay valid
+                for edit in reversed(edits):
+                    start, end = edit['range']['start'], edit['range']['end']
+                    document.apply_change((start['line'], start['character']), (end['line'], end['character']),
+                                          edit['newText'])
+                results[path] = document.text.encode('utf-8')
+            return results
+        self.assert_agrees('lsp fix all', run,
+                           lambda path, data: self.expected_fix(path, data.decode('utf-8', 'replace').encode('utf-8')))
+
+
+if __name__ == '__main__':
+    unittest.main()
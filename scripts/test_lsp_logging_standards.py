@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test suite for lsp_logging_standards.py
+"""
+
+import io
+import json
+import random
+import unittest
+from typing import Dict, List
+from check_logging_standards import DEFAULT_RULES_FILE, LoggingChecker, check_source, load_rules
+from lsp_logging_standards import LspDocument, LspServer
+
+
+class TestLsp(unittest.TestCase):
+    """Test cases for the language server."""
+
+    # Imports that make the prohibited calls resolve
+    HEADER = "import 'dart:developer';\nimport 'package:flutter/foundation.dart';\n"
+
+    def setUp(self):
+        """Set up a checker with the shipped rules."""
+        self.checker = LoggingChecker([], rules=load_rules(DEFAULT_RULES_FILE))
+
+    def scan(self, text: str) -> List:
+        """Get the (line, rule) pairs a full scan of a text reports."""
+        return sorted((v.line_number, v.violation_type) for v in check_source(text, 'lib/a.dart', self.checker))
+
+    def test_incremental_updates_match_full_scan(self):
+        """Test that random edits give the violations of a full scan, even when they open comments or strings."""
+        pieces = ["debugPrint('a');", "log('b', name: 'x');", "print(1);", "/*", "*/", "'" * 3, '"' * 3, "'", '"',
+                  "${", "}", "//", "\n", "\n", "r'", "x = 1;", "é", "😀"]
+        rng = random.Random(7)
+        for _ in range(60):
+            document = LspDocument(self.checker, 'lib/a.dart',
+                                   self.HEADER + ''.join(rng.choice(pieces) for _ in range(40)))
+            for _ in range(10):
+                offsets = sorted(rng.randint(0, len(document.text)) for _ in range(2))
+                positions = []
+                for offset in offsets:
+                    before = document.text[:offset]
+                    column = before[before.rfind('\n') + 1:]
+                    positions.append((before.count('\n'), len(column.encode('utf-16-le')) // 2))
+                new_text = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 3)))
+                expected_text = document.text[:offsets[0]] + new_text + document.text[offsets[1]:]
+
+                document.apply_change(positions[0], positions[1], new_text)
+                self.assertEqual(document.text, expected_text)
+                self.assertEqual(sorted((v.line_number, v.violation_type) for v in document.violations()),
+                                 self.scan(expected_text))
+
+    def test_edits_are_relexed_locally(self):
+        """Test that an edit is only re-lexed until the lexer state agrees again."""
+        text = self.HEADER + ''.join(f"  x{i} = {'q' * 3}a\n  b{'q' * 3};\n".replace('q', "'") if i % 50 == 0
+                                     else f"  x{i} = 1; // note\n" for i in range(2000))
+        document = LspDocument(self.checker, 'lib/a.dart', text)
+        line = next(i for i, content in enumerate(document.lines) if content.startswith('  x1010 '))
+
+        document.apply_change((line, 2), (line, 2), "debugPrint('x'); ")
+        self.assertLess(document.relexed_lines, 40)
+        self.assertEqual([(v.line_number, v.violation_type) for v in document.violations()], [(line + 1, 'debugPrint')])
+
+        # Opening a block comment changes the state of every later line
+        document.apply_change((line - 1, 0), (line - 1, 0), '/*')
+        self.assertGreaterEqual(document.relexed_lines, len(document.lines) - line)
+        self.assertEqual(document.violations(), [])
+
+    def test_scripted_client(self):
+        """Test a session of open, change, code action and shutdown."""
+        def frame(message: Dict) -> bytes:
+            body = json.dumps({'jsonrpc': '2.0', **message}).encode()
+            return b'Content-Length: %d\r\n\r\n' % len(body) + body
+
+        uri = 'file:///workspace/lib/a.dart'
+        change = {'range': {'start': {'line': 3, 'character': 14}, 'end': {'line': 3, 'character': 14}},
+                  'text': " log('x', name: 'N');"}
+        requests = [
+            {'id': 1, 'method': 'initialize', 'params': {'rootUri': 'file:///workspace'}},
+            {'method': 'initialized', 'params': {}},
+            {'method': 'textDocument/didOpen', 'params': {'textDocument': {
+                'uri': uri, 'languageId': 'dart', 'version': 1, 'text': self.HEADER + "void f() {\n  print('😀');\n}\n"}}},
+            {'method': 'textDocument/didChange', 'params': {
+                'textDocument': {'uri': uri, 'version': 2}, 'contentChanges': [change]}},
+            {'id': 2, 'method': 'textDocument/codeAction', 'params': {
+                'textDocument': {'uri': uri}, 'context': {'diagnostics': []},
+                'range': {'start': {'line': 3, 'character': 0}, 'end': {'line': 3, 'character': 0}}}},
+            {'id': 3, 'method': 'unknown/request'},
+            {'id': 4, 'method': 'shutdown'},
+            {'method': 'exit'},
+        ]
+        output = io.BytesIO()
+        server = LspServer(self.checker, io.BytesIO(b''.join(frame(request) for request in requests)), output)
+        self.assertEqual(server.serve(), 0)
+
+        output.seek(0)
+        reader = LspServer(self.checker, output, io.BytesIO())
+        responses = list(iter(reader.read_message, None))
+        self.assertEqual(responses[0]['result']['capabilities']['textDocumentSync']['change'], 2)
+        self.assertEqual(responses[1]['params']['diagnostics'][0]['code'], 'print')
+
+        # Columns count UTF-16 code units, two for the emoji
+        diagnostics = responses[2]['params']['diagnostics']
+        self.assertEqual([(d['code'], d['range']['start']) for d in diagnostics],
+                         [('log', {'line': 3, 'character': 15}), ('print', {'line': 3, 'character': 2})])
+
+        actions = responses[3]['result']
+        self.assertEqual([action['title'] for action in actions], ['Fix log -> AppLogger.d'])
+        new_texts = [edit['newText'] for edit in actions[0]['edit']['changes'][uri]]
+        self.assertIn("  print('😀'); AppLogger.d('x');\n", new_texts)
+        self.assertTrue(any('app_logger.dart' in new_text for new_text in new_texts))
+
+        self.assertEqual(responses[4]['error']['code'], -32601)
+        self.assertEqual(responses[5], {'jsonrpc': '2.0', 'id': 4, 'result': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
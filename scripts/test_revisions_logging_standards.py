@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test suite for revisions_logging_standards.py
+"""
+
+import io
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+from check_logging_standards import LoggingChecker
+from revisions_logging_standards import RevisionScanner, check_range, check_revision
+
+
+class TestRevisionScanner(unittest.TestCase):
+    """Test cases for checking git revisions and commit ranges without a checkout."""
+
+    # Imports that make the prohibited calls resolve
+    HEADER = "import 'dart:developer';\nimport 'package:flutter/foundation.dart';\n"
+
+    def setUp(self):
+        """Set up a git repository with a history of logging changes."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.temp_dir.name)
+
+        self.git('init', '-q')
+        os.makedirs('lib/untouched')
+        Path('lib/untouched/u.dart').write_text(self.HEADER + "void u() {\n  log('old');\n}\n")
+        Path('lib/a.dart').write_text(self.HEADER + "void a() {\n  x();\n}\n")
+        self.commit('init')
+        Path('lib/a.dart').write_text(self.HEADER + "void a() {\n  debugPrint('a');\n  x();\n}\n")
+        self.commit('add debugPrint')
+        # Moving lines and renaming files changes no violation
+        os.remove('lib/a.dart')
+        Path('lib/b.dart').write_text(self.HEADER + "// Moved\nvoid a() {\n  x();\n  debugPrint('a');\n}\n")
+        Path('lib/b.g.dart').write_text("void g() {\n  debugPrint('generated');\n}\n")
+        self.commit('move')
+        Path('lib/b.dart').write_text(self.HEADER + "void a() {\n  x();\n}\n")
+        self.commit('fix')
+
+    def tearDown(self):
+        """Clean up after tests."""
+        os.chdir(self.original_cwd)
+        self.temp_dir.cleanup()
+
+    def git(self, *args: str) -> str:
+        """Run a git command in the test repository."""
+        return subprocess.run(['git', *args], check=True, stdout=subprocess.PIPE).stdout.decode().strip()
+
+    def commit(self, message: str) -> None:
+        """Commit every change of the working tree."""
+        self.git('add', '-A')
+        self.git('-c', 'user.name=Test', '-c', 'user.email=test@example.com', 'commit', '-q', '-m', message)
+
+    def test_range_changes(self):
+        """Test that every commit reports what it introduced and removed, skipping unchanged subtrees."""
+        scanner = RevisionScanner(LoggingChecker(['lib']))
+        try:
+            changes = [(change.subject, [str(v) for v in change.introduced], [str(v) for v in change.removed])
+                       for change in scanner.range_changes('HEAD~3..HEAD')]
+        finally:
+            scanner.close()
+
+        self.assertEqual(changes, [('add debugPrint', ["lib/a.dart:4: debugPrint('a');"], []),
+                                   ('move', [], []),
+                                   ('fix', [], ["lib/b.dart:6: debugPrint('a');"])])
+        self.assertNotIn(self.git('rev-parse', 'HEAD:lib/untouched'), scanner.store.trees)
+        # The old side of each commit is the new side of the one before, and the fix restores the first blob
+        self.assertEqual((scanner.blobs_scanned, scanner.blobs_reused), (3, 3))
+
+    def test_check_revision(self):
+        """Test that a revision is checked as committed, whatever the working tree holds."""
+        Path('lib/b.dart').write_text(self.HEADER + "void a() {\n  debugPrint('uncommitted');\n}\n")
+        checker = LoggingChecker(['lib'], output_format='json')
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertFalse(check_revision(checker, 'HEAD~1'))
+        self.assertEqual([(v['file'], v['line']) for v in json.loads(output.getvalue())['violations']],
+                         [('lib/b.dart', 6), ('lib/untouched/u.dart', 4)])
+
+        with self.assertRaises(ValueError):
+            check_revision(checker, 'no-such-branch')
+
+    def test_check_range(self):
+        """Test that a range fails on the commits introducing errors, and lists only commits that changed any."""
+        checker = LoggingChecker(['lib'], output_format='json')
+        output = io.StringIO()
+        with redirect_stdout(output), mock.patch('sys.stderr', io.StringIO()):
+            self.assertFalse(check_range(checker, 'HEAD~3..HEAD'))
+        report = json.loads(output.getvalue())
+        self.assertEqual([commit['subject'] for commit in report['commits']], ['add debugPrint', 'fix'])
+        self.assertEqual(report['summary'], {'commits': 3, 'introduced': 1, 'removed': 1})
+
+        with redirect_stdout(io.StringIO()), mock.patch('sys.stderr', io.StringIO()):
+            self.assertTrue(check_range(checker, 'HEAD~1..HEAD'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test suite for store_logging_standards.py
+"""
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any
+from unittest import mock
+from check_logging_standards import LoggingChecker, Rule
+from store_logging_standards import ViolationStore, query_main
+
+
+class TestViolationStore(unittest.TestCase):
+    """Test cases for the SQLite violation store and the query command."""
+
+    HEADER = "import 'dart:developer';\nimport 'package:flutter/foundation.dart';\n"
+
+    def setUp(self):
+        """Set up a source tree with violations in lib and test."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.temp_dir.name)
+        os.makedirs('lib')
+        os.makedirs('test')
+        Path('lib/a.dart').write_text(self.HEADER + "void a() {\n  log('a');\n  debugPrint('a');\n}\n")
+        Path('lib/b.dart').write_text(self.HEADER + "void b() {\n  AppLogger.d('b');\n}\n")
+        Path('test/a_test.dart').write_text(self.HEADER + "void t() {\n  debugPrint('1');\n  debugPrint('2');\n}\n")
+        self.store_file = os.path.join('.dart_tool', 'logging_check.db')
+
+    def tearDown(self):
+        """Clean up after tests."""
+        os.chdir(self.original_cwd)
+        self.temp_dir.cleanup()
+
+    def run_checker(self, **options) -> ViolationStore:
+        """Run a scan recorded in the store, and return the store."""
+        store = ViolationStore(self.store_file)
+        LoggingChecker(['lib', 'test'], use_git=False, store=store, **options).find_violations()
+        store.close()
+        return store
+
+    def query(self, *args: str) -> Any:
+        """Run the query command with JSON output and return its result."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(query_main([*args, '--store', self.store_file, '--format', 'json']), 0)
+        return json.loads(output.getvalue())
+
+    def test_incremental_updates(self):
+        """Test that only changed files are written, and violations keep the run that introduced them."""
+        self.assertEqual(self.run_checker().files_changed, 3)
+        self.assertEqual(self.query('count', '--by', 'directory', '--rule', 'debugPrint'),
+                         [{'directory': 'test', 'count': 2}, {'directory': 'lib', 'count': 1}])
+
+        # Moving a call keeps its violation; the removed and added calls are resolved and introduced
+        Path('lib/a.dart').write_text(self.HEADER + "void a() {\n  debugPrint('a');\n  x();\n  log('new');\n}\n")
+        os.remove('test/a_test.dart')
+        store = self.run_checker()
+        self.assertEqual((store.files_changed, len(store.seen)), (1, 2))
+
+        self.assertEqual(self.query('violations'), [
+            {'file': 'lib/a.dart', 'line': 4, 'rule': 'debugPrint', 'content': "debugPrint('a');"},
+            {'file': 'lib/a.dart', 'line': 6, 'rule': 'log', 'content': "log('new');"},
+        ])
+        changes = [(change['change'], change['file'], change['content'])
+                   for change in self.query('changes', '--since', '1h')]
+        self.assertEqual(sorted(changes), sorted([
+            ('introduced', 'lib/a.dart', "debugPrint('a');"), ('introduced', 'lib/a.dart', "log('a');"),
+            ('introduced', 'test/a_test.dart', "debugPrint('1');"),
+            ('introduced', 'test/a_test.dart', "debugPrint('2');"),
+            ('resolved', 'lib/a.dart', "log('a');"), ('resolved', 'test/a_test.dart', "debugPrint('1');"),
+            ('resolved', 'test/a_test.dart', "debugPrint('2');"), ('introduced', 'lib/a.dart', "log('new');"),
+        ]))
+        self.assertEqual(self.query('changes', '--since', '2999-01-01'), [])
+        self.assertEqual([(run['files'], run['files_changed'], run['complete']) for run in self.query('runs')],
+                         [(2, 1, 1), (3, 3, 1)])
+
+    def test_rule_change_records_every_file(self):
+        """Test that files are written again when the rules change, resolving violations of removed rules."""
+        self.run_checker()
+        store = self.run_checker(rules=[Rule('log', r'(?<!\w)log\(')])
+        self.assertEqual(store.files_changed, 3)
+        self.assertEqual(self.query('files'), [{'file': 'lib/a.dart', 'count': 1}])
+
+    def test_partial_run_keeps_unseen_files(self):
+        """Test that a scan that stopped early doesn't resolve the violations of the files it didn't reach."""
+        self.run_checker()
+        os.remove('test/a_test.dart')
+        os.utime('lib/a.dart', ns=(2 * 10**18,) * 2)  # The newest file, scanned first
+        self.run_checker(fail_fast=True)
+        self.assertEqual(self.query('runs')[0]['complete'], 0)
+        self.assertEqual(self.query('count', '--path', 'test'), [{'rule': 'debugPrint', 'count': 2}])
+
+    def test_missing_store(self):
+        """Test that querying without a store fails instead of creating one."""
+        with mock.patch('sys.stderr', io.StringIO()), redirect_stdout(io.StringIO()):
+            self.assertEqual(query_main(['files', '--store', self.store_file]), 1)
+        self.assertFalse(os.path.exists(self.store_file))
+
+
+if __name__ == '__main__':
+    unittest.main()